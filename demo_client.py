@@ -1,5 +1,6 @@
 import asyncio
 import sys
+import uuid
 from fastmcp import Client
 
 # Windows asyncio fix
@@ -25,6 +26,8 @@ async def interactive_demo():
     
     try:
         async with Client("http://127.0.0.1:8000/sse") as client:
+            # One conversation per demo run, so follow-ups stay with their agent
+            session_id = uuid.uuid4().hex
             while True:
                 # Get user input
                 user_input = input("\n💬 You: ").strip()
@@ -48,12 +51,13 @@ async def interactive_demo():
                 
                 print("\n🔍 Analyzing your message...")
                 
-                # Step 1: Intent Classification
+                # One call classifies and routes, so the model runs once per turn
                 try:
-                    print("1️⃣ Classifying intent...")
-                    classification = await client.call_tool("classify_user_intent", {"user_message": user_input})
+                    print("1️⃣ Classifying intent and routing conversation...")
+                    routing = await client.call_tool("classify_and_route", {"user_message": user_input, "session_id": session_id})
                     
-                    intent_info = get_response_data(classification)
+                    routing_info = get_response_data(routing)
+                    intent_info = routing_info.get('classification', {})
                     print(f"   🎯 Intent: {intent_info.get('intent', 'Unknown')}")
                     print(f"   📊 Confidence: {intent_info.get('confidence', 'Unknown')}")
                     print(f"   🚀 Route To: {intent_info.get('route_to', 'Unknown')}")
@@ -65,16 +69,7 @@ async def interactive_demo():
                         for intent, score in intent_info['all_scores'].items():
                             print(f"      {intent}: {score:.2f}")
                     
-                except Exception as e:
-                    print(f"   ❌ Intent classification failed: {e}")
-                    continue
-                
-                # Step 2: Conversation Routing
-                try:
-                    print("\n2️⃣ Routing conversation...")
-                    routing = await client.call_tool("route_conversation", {"user_message": user_input})
-                    
-                    routing_info = get_response_data(routing)
+                    print("\n2️⃣ Routing result...")
                     print(f"   📍 Routed To: {routing_info.get('routed_to', 'Unknown')}")
                     print(f"   ✅ Status: {routing_info.get('status', 'Unknown')}")
                     
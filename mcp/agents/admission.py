@@ -0,0 +1,106 @@
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+# Named priorities callers can ask for; lower runs first.
+PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+
+
+class Overloaded(Exception):
+    """The queue in front of the model is full; the call was shed."""
+
+
+class AdmissionController:
+    """Caps concurrent model calls and queues the rest by priority.
+
+    At most `max_concurrency` callers hold a slot. Up to `max_queue` more
+    wait, best priority first and FIFO within a priority. When the queue
+    is full, a newcomer that outranks the worst waiter takes its place and
+    that waiter is shed. Otherwise the newcomer is shed. Shed callers get
+    Overloaded. `observe(seconds)` is told how long each admitted caller
+    waited.
+    """
+
+    def __init__(self, max_concurrency: int = 2, max_queue: int = 32,
+                 observe: Optional[Callable[[float], None]] = None):
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max(0, max_queue)
+        self.observe = observe
+        self.active = 0
+        self.admitted = 0
+        self.shed = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+    def _shed_worst(self, priority: int) -> bool:
+        """Make room for `priority` by shedding a worse waiter; False if there is none."""
+        live = [waiter for waiter in self._waiters if not waiter[2].done()]
+        if not live:
+            return False
+        worst = max(live)
+        if worst[0] <= priority:
+            return False
+        self._waiters.remove(worst)
+        heapq.heapify(self._waiters)
+        worst[2].set_exception(Overloaded("model queue is full (displaced by a higher priority request)"))
+        self.shed += 1
+        return True
+
+    async def acquire(self, priority: int = PRIORITIES["normal"]) -> None:
+        if self.active < self.max_concurrency and not self.queued:
+            self.active += 1
+            self.admitted += 1
+            if self.observe:
+                self.observe(0.0)
+            return
+
+        if self.queued >= self.max_queue and not self._shed_worst(priority):
+            self.shed += 1
+            raise Overloaded("model queue is full, try again later")
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        started = time.perf_counter()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled() and future.exception() is None:
+                self.release()  # a slot was handed over just as we gave up; pass it on
+            raise
+        self.admitted += 1
+        if self.observe:
+            self.observe(time.perf_counter() - started)
+
+    def release(self) -> None:
+        """Hand the slot to the best live waiter, or free it."""
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self.active -= 1
+
+    @asynccontextmanager
+    async def slot(self, priority: int = PRIORITIES["normal"]) -> AsyncIterator[None]:
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "shed": self.shed
+        }
@@ -0,0 +1,392 @@
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from fastmcp import Client
+from fastmcp.exceptions import ToolError
+
+DEFAULT_AGENTS_CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config", "agents.json")
+
+
+class PooledSession:
+    """One long-lived MCP client session with a cap on concurrent calls.
+
+    `observe(stage, seconds)` is told how long each call spent getting a
+    connected session ("downstream_connect") and in the tool call itself
+    ("downstream_call").
+    """
+
+    def __init__(self, target: Any, max_concurrency: int, observe: Optional[Callable[[str, float], None]] = None):
+        self.target = target
+        self.observe = observe
+        self.max_concurrency = max_concurrency
+        self.in_flight = 0
+        self.connects = 0
+        self.failures = 0
+        self.last_used = 0.0
+        self._client: Optional[Client] = None
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._connect_lock = asyncio.Lock()
+
+    @property
+    def connected(self) -> bool:
+        return self._client is not None and self._client.is_connected()
+
+    async def _ensure_connected(self) -> Client:
+        async with self._connect_lock:
+            if not self.connected:
+                await self._disconnect()
+                client = Client(self.target)
+                await client.__aenter__()
+                self._client = client
+                self.connects += 1
+            return self._client
+
+    async def _disconnect(self) -> None:
+        client, self._client = self._client, None
+        if client is not None:
+            try:
+                await client.__aexit__(None, None, None)
+            except Exception:
+                pass
+
+    async def _call_once(self, name: str, arguments: Dict[str, Any]) -> Any:
+        started = time.perf_counter()
+        client = await self._ensure_connected()
+        connected = time.perf_counter()
+        if self.observe:
+            self.observe("downstream_connect", connected - started)
+        try:
+            return await client.call_tool(name, arguments)
+        finally:
+            if self.observe:
+                self.observe("downstream_call", time.perf_counter() - connected)
+
+    async def call_tool(self, name: str, arguments: Dict[str, Any]) -> Any:
+        async with self._semaphore:
+            self.in_flight += 1
+            self.last_used = time.monotonic()
+            try:
+                try:
+                    return await self._call_once(name, arguments)
+                except ToolError:
+                    raise
+                except Exception:
+                    # Transport-level failure: drop the session and retry once on a fresh one.
+                    self.failures += 1
+                    await self.reset()
+                    return await self._call_once(name, arguments)
+            finally:
+                self.in_flight -= 1
+
+    async def health_check(self) -> bool:
+        """List tools on an idle, connected session; reset it if that fails."""
+        if not self.connected or self.in_flight:
+            return self.connected
+        try:
+            await self._client.list_tools()
+            return True
+        except Exception:
+            self.failures += 1
+            await self.reset()
+            return False
+
+    async def connect(self) -> bool:
+        """Open the session ahead of the first call; False if the agent is unreachable."""
+        try:
+            await self._ensure_connected()
+            return True
+        except Exception:
+            await self.reset()
+            return False
+
+    async def reset(self) -> None:
+        async with self._connect_lock:
+            await self._disconnect()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "connected": self.connected,
+            "in_flight": self.in_flight,
+            "connects": self.connects,
+            "failures": self.failures
+        }
+
+
+class AgentSessionPool:
+    """A fixed set of sessions to one downstream agent.
+
+    Calls go to the least busy session; each session admits at most
+    `max_concurrency` calls at once. Sessions connect lazily, reconnect after
+    transport errors and are probed in the background while idle.
+    """
+
+    def __init__(self, target: Any, size: int = 2, max_concurrency: int = 16, health_interval: float = 30.0,
+                 observe: Optional[Callable[[str, float], None]] = None):
+        self.target = target
+        self.health_interval = health_interval
+        self.sessions: List[PooledSession] = [
+            PooledSession(target, max_concurrency, observe) for _ in range(max(1, size))
+        ]
+        self._health_task: Optional[asyncio.Task] = None
+
+    def _pick_session(self) -> PooledSession:
+        return min(self.sessions, key=lambda session: (session.in_flight, not session.connected))
+
+    async def call_tool(self, name: str, arguments: Dict[str, Any]) -> Any:
+        self._start_health_checks()
+        return await self._pick_session().call_tool(name, arguments)
+
+    async def warm_up(self) -> int:
+        """Connect every session now; returns how many connected."""
+        self._start_health_checks()
+        return sum(await asyncio.gather(*(session.connect() for session in self.sessions)))
+
+    def _start_health_checks(self) -> None:
+        if self.health_interval > 0 and self._health_task is None:
+            self._health_task = asyncio.get_running_loop().create_task(self._health_loop())
+
+    async def _health_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.health_interval)
+            for session in self.sessions:
+                await session.health_check()
+
+    async def close(self) -> None:
+        if self._health_task is not None:
+            self._health_task.cancel()
+            self._health_task = None
+        for session in self.sessions:
+            await session.reset()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "target": str(self.target),
+            "sessions": [session.stats() for session in self.sessions]
+        }
+
+
+class Replica:
+    """One instance of an agent plus the passive health state the balancer keeps for it."""
+
+    def __init__(self, pool: AgentSessionPool):
+        self.pool = pool
+        self.outstanding = 0
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.ejections = 0
+        self.ejected_until = 0.0
+
+    def stats(self, now: float) -> Dict[str, Any]:
+        return {
+            "target": str(self.pool.target),
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "failures": self.failures,
+            "ejected": self.ejected_until > now,
+            "ejections": self.ejections,
+            "sessions": self.pool.stats()["sessions"]
+        }
+
+
+class ReplicaSet:
+    """Balances calls to one agent across its replicas.
+
+    Each replica has its own AgentSessionPool. Calls go to the replica with the
+    fewest outstanding requests ("least_outstanding") or take turns
+    ("round_robin"). A replica whose calls fail `eject_after` times in a row
+    is ejected for `eject_seconds`, doubled for each back-to-back ejection up
+    to 8x; if every replica is ejected, the one due back soonest is used
+    anyway. A call that fails at the transport level is retried once on
+    another replica. Tool errors mean the replica is up and are not retried.
+
+    With `hedge_percentile` set, a call still running after that percentile
+    of recent call latencies is also sent to a second replica and the first
+    answer wins. Only use it for tools that are safe to run twice.
+    """
+
+    def __init__(self, targets: List[Any], balancing: str = "least_outstanding", eject_after: int = 3,
+                 eject_seconds: float = 10.0, hedge_percentile: float = 0.0, hedge_min_samples: int = 20,
+                 clock: Callable[[], float] = time.monotonic, **pool_options: Any):
+        if balancing not in ("least_outstanding", "round_robin"):
+            raise ValueError(f"Unknown balancing policy: {balancing}")
+        self.targets = list(targets)
+        self.balancing = balancing
+        self.eject_after = eject_after
+        self.eject_seconds = eject_seconds
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.clock = clock
+        self.replicas = [Replica(AgentSessionPool(target, **pool_options)) for target in self.targets]
+        self.hedges = 0
+        self.hedge_wins = 0
+        self._latencies: Deque[float] = deque(maxlen=200)
+        self._turn = 0
+
+    def _pick(self, exclude: List[Replica], healthy_only: bool = False) -> Optional[Replica]:
+        now = self.clock()
+        candidates = [replica for replica in self.replicas if replica not in exclude]
+        healthy = [replica for replica in candidates if replica.ejected_until <= now]
+        if not healthy:
+            if healthy_only or not candidates:
+                return None
+            return min(candidates, key=lambda replica: replica.ejected_until)
+
+        # Rotate the starting point so ties (and round robin) spread evenly.
+        # Retries and hedges do not take a turn, so they cannot skew the rotation.
+        start = self._turn % len(healthy)
+        if not exclude:
+            self._turn += 1
+        rotated = healthy[start:] + healthy[:start]
+        if self.balancing == "round_robin":
+            return rotated[0]
+        return min(rotated, key=lambda replica: replica.outstanding)
+
+    def _record_failure(self, replica: Replica) -> None:
+        replica.failures += 1
+        replica.consecutive_failures += 1
+        if replica.consecutive_failures >= self.eject_after:
+            replica.ejections += 1
+            replica.consecutive_failures = 0
+            backoff = min(2 ** (replica.ejections - 1), 8)
+            replica.ejected_until = self.clock() + self.eject_seconds * backoff
+
+    def _hedge_delay(self) -> Optional[float]:
+        if not self.hedge_percentile or len(self.replicas) < 2 or len(self._latencies) < self.hedge_min_samples:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * self.hedge_percentile / 100.0))]
+
+    async def _attempt(self, replica: Replica, name: str, arguments: Dict[str, Any]) -> Any:
+        replica.outstanding += 1
+        replica.requests += 1
+        started = time.perf_counter()
+        try:
+            response = await replica.pool.call_tool(name, arguments)
+        except ToolError:
+            replica.consecutive_failures = replica.ejections = 0
+            raise
+        except Exception:
+            self._record_failure(replica)
+            raise
+        finally:
+            replica.outstanding -= 1
+        replica.consecutive_failures = replica.ejections = 0
+        self._latencies.append(time.perf_counter() - started)
+        return response
+
+    async def call_tool(self, name: str, arguments: Dict[str, Any]) -> Any:
+        first = self._pick([])
+        tried = [first]
+        attempts = [asyncio.ensure_future(self._attempt(first, name, arguments))]
+        started = list(attempts)
+        try:
+            hedge_delay = self._hedge_delay()
+            if hedge_delay is not None:
+                done, _ = await asyncio.wait(attempts, timeout=hedge_delay)
+                replica = None if done else self._pick(tried, healthy_only=True)
+                if replica is not None:
+                    self.hedges += 1
+                    tried.append(replica)
+                    attempts.append(asyncio.ensure_future(self._attempt(replica, name, arguments)))
+                    started.append(attempts[-1])
+
+            error: Optional[BaseException] = None
+            while attempts:
+                done, pending = await asyncio.wait(attempts, return_when=asyncio.FIRST_COMPLETED)
+                for attempt in done:
+                    if attempt.exception() is None or isinstance(attempt.exception(), ToolError):
+                        if attempt is not started[0]:
+                            self.hedge_wins += 1
+                        return attempt.result()
+                    error = attempt.exception()
+                attempts = list(pending)
+                if not attempts and len(tried) < 2:
+                    # Transport-level failure: retry once on another replica.
+                    replica = self._pick(tried)
+                    if replica is not None:
+                        tried.append(replica)
+                        attempts = [asyncio.ensure_future(self._attempt(replica, name, arguments))]
+                        started.append(attempts[0])
+            raise error
+        finally:
+            for attempt in started:
+                if not attempt.done():
+                    attempt.cancel()
+                elif not attempt.cancelled():
+                    attempt.exception()  # mark the losing attempt's error as retrieved
+
+    async def warm_up(self) -> int:
+        """Connect every replica's sessions. Failures here do not count toward ejection."""
+        return sum(await asyncio.gather(*(replica.pool.warm_up() for replica in self.replicas)))
+
+    async def close(self) -> None:
+        for replica in self.replicas:
+            await replica.pool.close()
+
+    def stats(self) -> Dict[str, Any]:
+        now = self.clock()
+        return {
+            "balancing": self.balancing,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "replicas": [replica.stats(now) for replica in self.replicas]
+        }
+
+
+class AgentPoolRegistry:
+    """Lazily builds one ReplicaSet per agent key from an endpoint map.
+
+    Endpoint values are a single target or a list of replica targets. The
+    map is read on every lookup, so changing an agent's targets replaces its
+    replica set. Pools are bound to the running event loop and rebuilt if it
+    changes.
+    """
+
+    def __init__(self, endpoints: Dict[str, Any], **options: Any):
+        self.endpoints = endpoints
+        self.options = options
+        self._pools: Dict[str, ReplicaSet] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def get(self, agent_key: str) -> ReplicaSet:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._pools = {}
+            self._loop = loop
+
+        targets = self.endpoints[agent_key]
+        if not isinstance(targets, (list, tuple)):
+            targets = [targets]
+        replicas = self._pools.get(agent_key)
+        if replicas is None or replicas.targets != list(targets):
+            if replicas is not None:
+                loop.create_task(replicas.close())
+            replicas = ReplicaSet(targets, **self.options)
+            self._pools[agent_key] = replicas
+        return replicas
+
+    async def warm_up(self) -> Dict[str, int]:
+        """Connect to every configured agent; returns connected sessions per agent."""
+        agent_keys = list(self.endpoints)
+        connected = await asyncio.gather(*(self.get(agent_key).warm_up() for agent_key in agent_keys))
+        return dict(zip(agent_keys, connected))
+
+    async def close(self) -> None:
+        pools, self._pools = self._pools, {}
+        for replicas in pools.values():
+            await replicas.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {agent_key: replicas.stats() for agent_key, replicas in self._pools.items()}
+
+
+def load_agent_config(path: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """Read {agent_key: {"description", "module", "replicas": [urls]}} (AGENTS_CONFIG_PATH)."""
+    path = path or os.getenv("AGENTS_CONFIG_PATH", DEFAULT_AGENTS_CONFIG_PATH)
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
@@ -0,0 +1,234 @@
+"""Offline bulk classification with the intent engine imported in-process.
+
+Streams a JSONL or CSV file of messages through a pool of worker processes
+and writes one JSON line per input row, in input order:
+
+    python mcp/agents/bulk_classify.py tickets.jsonl --output intents.jsonl \
+        --text-field body --id-field ticket_id --processes 4
+
+Progress is checkpointed next to the output (`<output>.checkpoint`); running
+the same command again after a crash resumes where it stopped. Use
+--restart to start over.
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+# Fields of a classification that go into the output.
+OUTPUT_FIELDS = ("intent", "confidence", "route_to", "engine", "tier", "model", "fallback")
+
+Row = Tuple[Any, str]
+
+
+# ------------------------------------------------------------
+# Input
+# ------------------------------------------------------------
+def read_rows(path: str, text_field: str = "message", id_field: str = "id") -> Iterator[Row]:
+    """Yield (id, message) per row without loading the file. Rows without an id get their row number."""
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        records = csv.DictReader(f) if path.endswith(".csv") else (json.loads(line) for line in f if line.strip())
+        for number, record in enumerate(records):
+            yield record.get(id_field, number), str(record.get(text_field) or "")
+
+
+def chunked(rows: Iterator[Row], size: int) -> Iterator[List[Row]]:
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# ------------------------------------------------------------
+# Workers
+# ------------------------------------------------------------
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def init_worker(concurrency: int) -> None:
+    """Import the engine once per process and keep one event loop for its pooled clients.
+
+    `concurrency` is this worker's share of the model calls. Its admission
+    controller gets exactly that many slots and an unbounded queue: an
+    offline run should wait for the model, not shed rows to the rules.
+    """
+    global _loop
+    import intent_agent
+    intent_agent.BATCH_CONCURRENCY = concurrency
+    intent_agent.llm_admission.max_concurrency = concurrency
+    intent_agent.llm_admission.max_queue = sys.maxsize
+    _loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(_loop)
+
+
+def classify_chunk(rows: List[Row]) -> List[Dict[str, Any]]:
+    """Classify one chunk with the engine's batch path (cheap engines, cache, packing, LLM)."""
+    import intent_agent
+    results = _loop.run_until_complete(intent_agent.aclassify_intents([message for _, message in rows]))
+    output = []
+    for (row_id, _), result in zip(rows, results):
+        if isinstance(result, Exception):
+            output.append({"id": row_id, "error": f"{type(result).__name__}: {result}"})
+            continue
+        result = intent_agent.add_routing(dict(result))
+        output.append({"id": row_id, **{field: result[field] for field in OUTPUT_FIELDS if field in result}})
+    return output
+
+
+class InlineExecutor:
+    """Runs chunks in this process; used with --processes 0."""
+
+    def __init__(self, concurrency: int):
+        init_worker(concurrency)
+
+    def submit(self, fn, *args) -> Future:
+        future: Future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def shutdown(self) -> None:
+        _loop.close()
+        asyncio.set_event_loop(None)
+
+
+# ------------------------------------------------------------
+# Checkpoints
+# ------------------------------------------------------------
+def load_checkpoint(path: str, input_path: str) -> Dict[str, Any]:
+    if not os.path.exists(path):
+        return {"input": input_path, "rows": 0, "errors": 0, "output_bytes": 0}
+    with open(path, "r", encoding="utf-8") as f:
+        checkpoint = json.load(f)
+    if checkpoint["input"] != input_path:
+        raise ValueError(f"{path} belongs to {checkpoint['input']}, not {input_path} (use --restart)")
+    return checkpoint
+
+
+def save_checkpoint(path: str, checkpoint: Dict[str, Any]) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+
+# ------------------------------------------------------------
+# Pipeline
+# ------------------------------------------------------------
+def run(input_path: str, output_path: str, text_field: str = "message", id_field: str = "id",
+        processes: Optional[int] = None, concurrency: Optional[int] = None, chunk_size: int = 64,
+        checkpoint_every: int = 1000, restart: bool = False, progress_interval: float = 5.0,
+        limit: Optional[int] = None) -> Dict[str, Any]:
+    """Classify every row of `input_path` into `output_path`; returns a summary.
+
+    Up to two chunks per worker are in flight, so memory stays flat however
+    large the input is. Output is written in input order. After each
+    checkpoint the output is flushed to disk, and the checkpoint records how
+    many rows and bytes are done. A resumed run truncates anything written
+    after it and skips that many input rows.
+    """
+    checkpoint_path = f"{output_path}.checkpoint"
+    if restart:
+        for path in (output_path, checkpoint_path):
+            if os.path.exists(path):
+                os.remove(path)
+    checkpoint = load_checkpoint(checkpoint_path, input_path)
+    resumed_from = checkpoint["rows"]
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+    # `concurrency` is the model calls for the whole run, split evenly across
+    # the workers (each has its own admission controller). Every worker needs
+    # at least one slot, so there are never more workers than model calls.
+    concurrency = max(1, concurrency or int(os.getenv("INTENT_LLM_CONCURRENCY", "4")))
+    processes = min(processes, concurrency)
+    executor = (ProcessPoolExecutor(processes, initializer=init_worker, initargs=(concurrency // processes,))
+                if processes > 0 else InlineExecutor(concurrency))
+
+    rows = islice(read_rows(input_path, text_field, id_field), resumed_from, None if limit is None else limit)
+    in_flight: Deque[Future] = deque()
+    window = max(1, processes) * 2
+    started = last_report = time.perf_counter()
+    done, errors = checkpoint["rows"], checkpoint["errors"]
+    since_checkpoint = 0
+
+    with open(output_path, "a+b") as output:
+        output.truncate(checkpoint["output_bytes"])
+        output.seek(0, os.SEEK_END)
+
+        def write(results: List[Dict[str, Any]]) -> None:
+            nonlocal done, errors, since_checkpoint, last_report
+            output.write("".join(json.dumps(result, default=str) + "\n" for result in results).encode("utf-8"))
+            done += len(results)
+            errors += sum("error" in result for result in results)
+            since_checkpoint += len(results)
+            if since_checkpoint >= checkpoint_every:
+                output.flush()
+                os.fsync(output.fileno())
+                save_checkpoint(checkpoint_path, {"input": input_path, "rows": done, "errors": errors,
+                                                  "output_bytes": output.tell()})
+                since_checkpoint = 0
+            now = time.perf_counter()
+            if progress_interval and now - last_report >= progress_interval:
+                rate = (done - resumed_from) / (now - started)
+                print(f"📦 {done} rows ({errors} errors), {rate:.1f} rows/s", file=sys.stderr)
+                last_report = now
+
+        try:
+            for chunk in chunked(rows, chunk_size):
+                in_flight.append(executor.submit(classify_chunk, chunk))
+                if len(in_flight) >= window:
+                    write(in_flight.popleft().result())
+            while in_flight:
+                write(in_flight.popleft().result())
+        finally:
+            for future in in_flight:
+                future.cancel()
+            executor.shutdown()
+            output.flush()
+            os.fsync(output.fileno())
+            save_checkpoint(checkpoint_path, {"input": input_path, "rows": done, "errors": errors,
+                                              "output_bytes": output.tell()})
+
+    seconds = time.perf_counter() - started
+    return {
+        "input": input_path,
+        "output": output_path,
+        "rows": done,
+        "errors": errors,
+        "resumed_from": resumed_from,
+        "seconds": round(seconds, 3),
+        "rows_per_second": round((done - resumed_from) / seconds, 2) if seconds else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Classify a JSONL/CSV file of messages in bulk")
+    parser.add_argument("input", help="JSONL (one object per line) or .csv file")
+    parser.add_argument("--output", required=True, help="JSONL results, one line per input row in order")
+    parser.add_argument("--text-field", default="message", help="Field holding the message text")
+    parser.add_argument("--id-field", default="id", help="Field copied to the output as `id` (default: row number)")
+    parser.add_argument("--processes", type=int, default=None, help="Worker processes (default: CPU cores; 0 = this process)")
+    parser.add_argument("--concurrency", type=int, default=None,
+                        help="Concurrent model calls in total, split across the processes "
+                             "(default: INTENT_LLM_CONCURRENCY; also caps --processes)")
+    parser.add_argument("--chunk-size", type=int, default=64, help="Rows handed to a worker at a time")
+    parser.add_argument("--checkpoint-every", type=int, default=1000, help="Rows between checkpoints")
+    parser.add_argument("--progress-interval", type=float, default=5.0, help="Seconds between progress lines")
+    parser.add_argument("--limit", type=int, default=None, help="Stop after this many input rows")
+    parser.add_argument("--restart", action="store_true", help="Ignore any checkpoint and start over")
+    args = parser.parse_args()
+
+    summary = run(args.input, args.output, args.text_field, args.id_field, args.processes, args.concurrency,
+                  args.chunk_size, args.checkpoint_every, args.restart, args.progress_interval, args.limit)
+    print(json.dumps(summary, indent=2))
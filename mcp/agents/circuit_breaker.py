@@ -0,0 +1,56 @@
+import time
+from typing import Any, Callable, Dict
+
+
+class CircuitBreaker:
+    """Fails fast for an agent that keeps failing.
+
+    Closed: calls go through and consecutive failures are counted. After
+    `failure_threshold` of them the breaker opens and `allow` says no for
+    `reset_timeout` seconds. Then a single trial call is let through (half
+    open): success closes the breaker, failure opens it again. If the trial
+    never reports back, another one is allowed after a further
+    `reset_timeout`.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 10.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = "closed"
+        self.failures = 0
+        self.opened = 0
+        self.rejected = 0
+        self._retry_at = 0.0
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        now = self.clock()
+        if now >= self._retry_at:
+            self.state = "half_open"
+            self._retry_at = now + self.reset_timeout
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self) -> None:
+        self.state = "closed"
+        self.failures = 0
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                self.opened += 1
+            self.state = "open"
+            self._retry_at = self.clock() + self.reset_timeout
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "opened": self.opened,
+            "rejected": self.rejected
+        }
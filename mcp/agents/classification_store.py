@@ -0,0 +1,137 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+
+def store_version(*parts: str) -> str:
+    """Short hash of whatever shapes a classification (model name, prompt text).
+
+    Entries written under another version are never returned and are dropped
+    when a store is opened, so changing the model or prompt invalidates them.
+    """
+    digest = hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+    return digest[:16]
+
+
+class ClassificationStore:
+    """On-disk classification cache in SQLite (WAL mode), shared by every process using `path`.
+
+    WAL lets several intent-agent workers read while one writes. Calls wait
+    at most `busy_timeout` seconds for a lock held by another worker; past
+    that a lookup counts as a miss and a write is dropped, since the store is
+    only a cache. Opening the store may wait longer (`open_timeout`). Entries
+    expire `ttl` seconds after they were written (0 = never). Every
+    `evict_every` writes the oldest entries beyond `maxsize` are deleted.
+    Lookups never write, so reads from many workers do not contend.
+
+    Every call is blocking; async callers should run them in a thread.
+    """
+
+    def __init__(self, path: str, version: str, maxsize: int = 100000, ttl: float = 7 * 24 * 3600.0,
+                 evict_every: int = 64, busy_timeout: float = 0.05, open_timeout: float = 5.0,
+                 clock: Callable[[], float] = time.time):
+        self.path = path
+        self.version = version
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.evict_every = max(1, evict_every)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.errors = 0
+        self._db = sqlite3.connect(path, timeout=open_timeout, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS classifications ("
+            " version TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL,"
+            " created_at REAL NOT NULL, expires_at REAL,"
+            " PRIMARY KEY (version, key))"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS classifications_age ON classifications (created_at)")
+        self.invalidated = self._db.execute(
+            "DELETE FROM classifications WHERE version != ?", (version,)
+        ).rowcount
+        self._db.execute(f"PRAGMA busy_timeout = {int(busy_timeout * 1000)}")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with self._lock:
+                row = self._db.execute(
+                    "SELECT value FROM classifications"
+                    " WHERE version = ? AND key = ? AND (expires_at IS NULL OR expires_at > ?)",
+                    (self.version, key, self._clock())
+                ).fetchone()
+        except sqlite3.Error:
+            # A locked or damaged store only costs a model call.
+            self.errors += 1
+            self.misses += 1
+            return None
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        now = self._clock()
+        expires_at = now + self.ttl if self.ttl > 0 else None
+        try:
+            with self._lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO classifications (version, key, value, created_at, expires_at)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (self.version, key, json.dumps(value, separators=(",", ":")), now, expires_at)
+                )
+                self._writes += 1
+                if self._writes % self.evict_every == 0:
+                    self._evict(now)
+        except sqlite3.Error:
+            self.errors += 1
+
+    def _evict(self, now: float) -> None:
+        expired = self._db.execute(
+            "DELETE FROM classifications WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,)
+        ).rowcount
+        # Walks the created_at index past the newest `maxsize` rows instead of counting the table.
+        overflow = self._db.execute(
+            "DELETE FROM classifications WHERE rowid IN"
+            " (SELECT rowid FROM classifications ORDER BY created_at DESC LIMIT -1 OFFSET ?)", (self.maxsize,)
+        ).rowcount
+        self.evictions += expired + overflow
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM classifications")
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute(
+                "SELECT COUNT(*) FROM classifications WHERE version = ?", (self.version,)
+            ).fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "path": self.path,
+            "version": self.version,
+            "size": len(self),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidated": self.invalidated,
+            "errors": self.errors,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
@@ -0,0 +1,58 @@
+"""Per-request deadlines carried in a context variable.
+
+A tool opens a `deadline_scope`; everything awaited inside it (classification,
+downstream dispatch) reads the time left with `remaining()` or wraps its work
+in `within_deadline`. Nested scopes can only shorten the deadline.
+"""
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Iterator, Optional
+
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """The request's deadline passed before the work finished."""
+
+
+@contextmanager
+def deadline_scope(timeout_ms: Optional[float]) -> Iterator[None]:
+    """Bound the enclosed work to `timeout_ms` from now; None or <= 0 adds no bound."""
+    if not timeout_ms or timeout_ms <= 0:
+        yield
+        return
+    deadline = time.monotonic() + timeout_ms / 1000.0
+    current = _deadline.get()
+    token = _deadline.set(deadline if current is None else min(current, deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current deadline, or None without one."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+async def within_deadline(awaitable: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+    """Await with the tighter of `timeout` and the request deadline.
+
+    Raises DeadlineExceeded when the request deadline is what ran out, and
+    asyncio.TimeoutError when `timeout` did.
+    """
+    left = remaining()
+    if left is None and timeout is None:
+        return await awaitable
+    limit = min(t for t in (left, timeout) if t is not None)
+    try:
+        return await asyncio.wait_for(awaitable, limit)
+    except asyncio.TimeoutError:
+        if left is not None and left <= limit:
+            raise DeadlineExceeded(f"deadline exceeded after {left * 1000:.0f} ms") from None
+        raise
@@ -0,0 +1,218 @@
+"""Nearest-neighbour intent engine over a memory-mapped index of labeled examples.
+
+Build the index offline (it is also built on first start if missing):
+
+    python mcp/agents/embedding_index.py --examples mcp/agents/config/intent_examples.json \
+        --output mcp/agents/config/intent_index
+"""
+import argparse
+import hashlib
+import json
+import os
+import zlib
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+try:
+    import numpy as np
+except ImportError:  # the embedding engine is simply unavailable without numpy
+    np = None
+
+from classification_cache import normalize_message
+
+CONFIG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config")
+DEFAULT_EXAMPLES_PATH = os.path.join(CONFIG_DIR, "intent_examples.json")
+DEFAULT_INDEX_PATH = os.path.join(CONFIG_DIR, "intent_index")
+
+
+# ------------------------------------------------------------
+# Embedders
+# ------------------------------------------------------------
+class HashingEmbedder:
+    """Hashed bag of character n-grams and words; needs nothing but numpy."""
+
+    def __init__(self, dim: int = 2048, ngram_range: tuple = (3, 5)):
+        self.dim = dim
+        self.ngram_range = ngram_range
+        self.name = f"hashing-{dim}-{ngram_range[0]}-{ngram_range[1]}"
+
+    def _features(self, text: str) -> List[str]:
+        text = normalize_message(text)
+        features = text.split()
+        padded = f" {text} "
+        low, high = self.ngram_range
+        for n in range(low, high + 1):
+            features.extend(padded[i:i + n] for i in range(len(padded) - n + 1))
+        return features
+
+    def encode(self, texts: List[str]) -> "np.ndarray":
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                vectors[row, zlib.crc32(feature.encode("utf-8")) % self.dim] += 1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+
+class SentenceTransformerEmbedder:
+    """Small local embedding model via sentence-transformers (optional dependency)."""
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name)
+        self.name = f"st-{model_name}"
+
+    def encode(self, texts: List[str]) -> "np.ndarray":
+        return self.model.encode(texts, normalize_embeddings=True).astype(np.float32)
+
+
+def create_embedder(model_name: Optional[str] = None):
+    """Use the local model if one is configured and installed, else the hashing embedder."""
+    model_name = model_name or os.getenv("INTENT_EMBEDDING_MODEL")
+    if model_name:
+        try:
+            return SentenceTransformerEmbedder(model_name)
+        except ImportError:
+            pass
+    return HashingEmbedder()
+
+
+# ------------------------------------------------------------
+# Index
+# ------------------------------------------------------------
+def index_fingerprint(examples_path: str, embedder) -> str:
+    """Hash of the example set and the embedder; a different value means the index is stale."""
+    digest = hashlib.sha256(embedder.name.encode("utf-8"))
+    with open(examples_path, "rb") as f:
+        digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+@contextmanager
+def index_lock(index_dir: str) -> Iterator[None]:
+    """Hold an exclusive lock on index_dir across processes (workers importing together)."""
+    os.makedirs(index_dir, exist_ok=True)
+    with open(os.path.join(index_dir, ".lock"), "a+b") as lock_file:
+        if os.name == "nt":
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        else:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if os.name == "nt":
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def _replace_file(path: str, write: Any) -> None:
+    """Write through a temporary file and move it into place, so readers never see half a file."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+
+def build_index(examples_path: str, output_dir: str, embedder=None) -> None:
+    """Embed every labeled example and write vectors.npy + meta.json to output_dir.
+
+    meta.json is replaced last, so it only ever describes a complete vectors.npy.
+    Hold index_lock(output_dir) when other processes may build at the same time.
+    """
+    embedder = embedder or create_embedder()
+    with open(examples_path, "r", encoding="utf-8") as f:
+        examples = json.load(f)
+
+    texts, labels = [], []
+    for intent, messages in examples.items():
+        texts.extend(messages)
+        labels.extend([intent] * len(messages))
+
+    os.makedirs(output_dir, exist_ok=True)
+    vectors = embedder.encode(texts)
+    meta = {"embedder": embedder.name, "fingerprint": index_fingerprint(examples_path, embedder), "labels": labels}
+    _replace_file(os.path.join(output_dir, "vectors.npy"), lambda f: np.save(f, vectors))
+    _replace_file(os.path.join(output_dir, "meta.json"), lambda f: f.write(json.dumps(meta).encode("utf-8")))
+
+
+class EmbeddingIndex:
+    """Cosine k-nearest-neighbour vote over the example vectors.
+
+    Vectors are unit length, so one matrix-vector product gives every
+    similarity. Confidence is the winning intent's share of the
+    similarity-weighted vote times its best similarity.
+    """
+
+    def __init__(self, vectors: "np.ndarray", labels: List[str], embedder, k: int = 5):
+        self.vectors = vectors
+        self.embedder = embedder
+        self.intents = sorted(set(labels))
+        self.label_ids = np.array([self.intents.index(label) for label in labels])
+        self.k = min(k, len(labels))
+
+    def classify(self, message: str) -> Dict[str, Any]:
+        query = self.embedder.encode([message])[0]
+        similarities = self.vectors @ query
+        nearest = np.argpartition(-similarities, self.k - 1)[:self.k]
+        weights = np.clip(similarities[nearest], 0.0, None)
+        votes = np.bincount(self.label_ids[nearest], weights=weights, minlength=len(self.intents))
+
+        total = float(votes.sum())
+        if total <= 0:
+            return {"intent": None, "confidence": 0.0, "reasoning": "No similar examples", "engine": "embedding"}
+
+        winner = int(votes.argmax())
+        best_similarity = float(similarities[nearest][self.label_ids[nearest] == winner].max())
+        return {
+            "intent": self.intents[winner],
+            "confidence": round(float(votes[winner]) / total * best_similarity, 2),
+            "reasoning": f"Nearest examples are {self.intents[winner]} (similarity {best_similarity:.2f})",
+            "engine": "embedding"
+        }
+
+
+def load_embedding_index(index_dir: Optional[str] = None, examples_path: Optional[str] = None) -> Optional[EmbeddingIndex]:
+    """Memory-map the index, building it first if it is missing or its examples or embedder changed.
+
+    Returns None when numpy is not installed.
+    """
+    if np is None:
+        return None
+    index_dir = index_dir or os.getenv("INTENT_INDEX_PATH", DEFAULT_INDEX_PATH)
+    examples_path = examples_path or os.getenv("INTENT_EXAMPLES_PATH", DEFAULT_EXAMPLES_PATH)
+    embedder = create_embedder()
+    fingerprint = index_fingerprint(examples_path, embedder)
+
+    meta_path = os.path.join(index_dir, "meta.json")
+    with index_lock(index_dir):
+        meta = None
+        if os.path.exists(meta_path):
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        if meta is None or meta.get("embedder") != embedder.name or meta.get("fingerprint") != fingerprint:
+            build_index(examples_path, index_dir, embedder)
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        # The map keeps pointing at this file even if a later build replaces it.
+        vectors = np.load(os.path.join(index_dir, "vectors.npy"), mmap_mode="r")
+    return EmbeddingIndex(vectors, meta["labels"], embedder)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the intent embedding index")
+    parser.add_argument("--examples", default=DEFAULT_EXAMPLES_PATH, help="JSON file of {intent: [examples]}")
+    parser.add_argument("--output", default=DEFAULT_INDEX_PATH, help="Directory for vectors.npy and meta.json")
+    parser.add_argument("--model", default=None, help="sentence-transformers model (default: hashing embedder)")
+    args = parser.parse_args()
+
+    with index_lock(args.output):
+        build_index(args.examples, args.output, create_embedder(args.model))
+    print(f"✅ Index written to {args.output}")
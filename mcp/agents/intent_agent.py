@@ -1,140 +1,1049 @@
-from fastmcp import FastMCP, Client
-from typing import Dict, Any
+from fastmcp import FastMCP
+from fastmcp.exceptions import ToolError
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+from contextlib import asynccontextmanager
+from collections import deque
+from contextvars import ContextVar
+from typing import Dict, Any, Awaitable, Callable, List, Optional, Tuple
+import atexit
+import functools
+import importlib
+import inspect
 import json
-import subprocess
+import os
 import sys, asyncio
+import time
 
-mcp = FastMCP("intent_agent")
+from admission import PRIORITIES, AdmissionController, Overloaded
+from agent_pool import AgentPoolRegistry, load_agent_config
+from circuit_breaker import CircuitBreaker
+from classification_cache import ClassificationCache, normalize_message
+from classification_store import ClassificationStore, store_version
+from deadlines import DeadlineExceeded, deadline_scope, within_deadline
+from json_extract import IncrementalJSONExtractor, extract_first_json
+from llm_backends import DEFAULT_MODEL, LLM_TIMEOUT, get_backend, set_generation_observer
+from metrics import MetricsRegistry, latency_buckets
+from profiling import Profiler
+from embedding_index import load_embedding_index
+from rule_classifier import load_rule_classifier
+from session_store import SessionRecord, SessionStore
+from singleflight import SingleFlight
+from traffic_recorder import TrafficRecorder
+
+STARTED_AT = time.monotonic()
+
+
+@asynccontextmanager
+async def lifespan(server: FastMCP):
+    # Runs before the SSE server accepts connections, so a supervisor
+    # waiting for a tool list only sees the agent once it is warm. Each
+    # step is bounded by WARMUP_TIMEOUT, which leaves room inside the
+    # supervisor's own startup timeout.
+    if warm_up_on_start and warmup_report is None:
+        await warm_up()
+    yield {}
+
+
+mcp = FastMCP("intent_agent", lifespan=lifespan)
 
 # ------------------------------------------------------------
-# Local LLM helper (Ollama CLI)
+# Metrics (scraped from /metrics, or via the get_metrics tool)
 # ------------------------------------------------------------
-def query_local_llm(prompt: str, model: str = "gemma:2b") -> str:
+metrics = MetricsRegistry()
+# The top buckets must reach past the model timeout, or slow calls all land in +Inf.
+STAGE_SECONDS = metrics.histogram("intent_stage_seconds", "Time spent in each request stage",
+                                  latency_buckets(LLM_TIMEOUT))
+TOOL_SECONDS = metrics.histogram("intent_tool_seconds", "End-to-end latency per MCP tool",
+                                 latency_buckets(LLM_TIMEOUT))
+CLASSIFICATIONS = metrics.counter("intent_classifications_total", "Classifications by the engine that answered")
+FALLBACKS = metrics.counter("intent_fallbacks_total", "Model outputs that could not be parsed")
+ROUTES = metrics.counter("intent_routes_total", "Downstream dispatches by agent and status")
+DEADLINES = metrics.counter("intent_deadline_exceeded_total", "Requests whose deadline ran out, by stage")
+TOPIC_CHANGES = metrics.counter("intent_topic_changes_total", "Follow-ups a cheap engine moved to a new intent")
+SHED = metrics.counter("intent_llm_shed_total", "Model calls shed because the queue was full, by shed mode")
+TIER_ANSWERS = metrics.counter("intent_model_tier_total", "Model classifications by the tier that answered")
+ESCALATIONS = metrics.counter("intent_escalations_total", "Classifications passed to the next model tier, by the unsure model")
+metrics.gauge("intent_escalation_rate", "Escalations per model classification",
+              lambda: ESCALATIONS.total() / TIER_ANSWERS.total() if TIER_ANSWERS.total() else 0.0)
+
+
+PROMPT_TOKENS = metrics.counter("intent_llm_prompt_tokens_total", "Prompt tokens the model had to evaluate")
+
+
+def observe_stage(stage: str, seconds: float) -> None:
+    STAGE_SECONDS.observe(seconds, stage=stage)
+
+
+def observe_generation(stats: Dict[str, Any]) -> None:
+    """Record the model server's own timings (nanoseconds) as stages.
+
+    llm_prompt_eval only covers prompt tokens that were not already cached,
+    so it shows whether the system prompt prefix is being reused.
+    """
+    for field, stage in (("load_duration", "llm_load"), ("prompt_eval_duration", "llm_prompt_eval"),
+                         ("eval_duration", "llm_eval")):
+        if field in stats:
+            observe_stage(stage, stats[field] / 1e9)
+    PROMPT_TOKENS.inc(stats.get("prompt_eval_count", 0))
+
+
+set_generation_observer(observe_generation)
+
+first_request_seconds: Optional[float] = None
+metrics.gauge("intent_time_to_first_request_seconds", "Seconds from process start to the first tool call (0 until then)",
+              lambda: first_request_seconds or 0.0)
+
+# Opt-in capture of tool calls as JSONL for test/replay_traffic.py.
+traffic_recorder = TrafficRecorder(
+    os.getenv("INTENT_RECORD_PATH"),
+    sample_rate=float(os.getenv("INTENT_RECORD_SAMPLE", "1"))
+) if os.getenv("INTENT_RECORD_PATH") else None
+if traffic_recorder is not None:
+    atexit.register(traffic_recorder.close)
+
+# Seconds per stage for the request being handled, when something wants them.
+request_stages: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_stages", default=None)
+
+
+def _collect_stage(seconds: float, labels: Dict[str, Any]) -> None:
+    stages = request_stages.get()
+    if stages is not None:
+        stage = labels["stage"]
+        stages[stage] = stages.get(stage, 0.0) + seconds
+
+
+STAGE_SECONDS.listeners.append(_collect_stage)
+
+# Calls slower than this (0 = off) are logged to stderr with their stage
+# breakdown and kept for get_slow_requests. The user's message text is only
+# included with INTENT_SLOW_REQUEST_MESSAGES=1.
+SLOW_REQUEST_MS = float(os.getenv("INTENT_SLOW_REQUEST_MS", "0"))
+SLOW_REQUEST_MESSAGES = os.getenv("INTENT_SLOW_REQUEST_MESSAGES", "0") == "1"
+slow_requests: deque = deque(maxlen=int(os.getenv("INTENT_SLOW_REQUEST_KEEP", "100")))
+SLOW_REQUESTS = metrics.counter("intent_slow_requests_total", "Tool calls over INTENT_SLOW_REQUEST_MS")
+
+# On-demand cProfile / stack sampling sessions, driven by the admin tools.
+profiler = Profiler(os.getenv("INTENT_PROFILE_DIR", "profiles"))
+
+
+def log_slow_request(tool: str, arguments: Dict[str, Any], seconds: float, stages: Dict[str, float],
+                     error: Optional[BaseException]) -> None:
+    SLOW_REQUESTS.inc(tool=tool)
+    entry = {
+        "ts": round(time.time(), 3),
+        "tool": tool,
+        "ms": round(seconds * 1000, 3),
+        "stages": {stage: round(value * 1000, 3) for stage, value in
+                   sorted(stages.items(), key=lambda item: item[1], reverse=True)},
+        "session_id": arguments.get("session_id"),
+    }
+    if SLOW_REQUEST_MESSAGES:
+        entry["message"] = arguments.get("user_message")
+    if error is not None:
+        entry["error"] = f"{type(error).__name__}: {error}"
+    slow_requests.append(entry)
+    print(f"🐢 slow request {json.dumps(entry, default=str)}", file=sys.stderr)
+
+
+def traced(tool: str):
+    """Tool decorator: latency metric, time to first request, profiling
+    request limits, and per-stage timings for the traffic recorder and the
+    slow-request log when either is on."""
+    def decorate(fn: Callable[..., Awaitable[Dict[str, Any]]]):
+        signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        async def wrapper(*args: Any, **kwargs: Any) -> Dict[str, Any]:
+            global first_request_seconds
+            if first_request_seconds is None:
+                first_request_seconds = time.monotonic() - STARTED_AT
+            recording = traffic_recorder is not None and traffic_recorder.sampled()
+            stages: Optional[Dict[str, float]] = {} if recording or SLOW_REQUEST_MS else None
+            token = request_stages.set(stages)
+            started_at, started = time.time(), time.perf_counter()
+            result, error = None, None
+            try:
+                result = await fn(*args, **kwargs)
+                return result
+            except Exception as e:
+                error = e
+                raise
+            finally:
+                seconds = time.perf_counter() - started
+                request_stages.reset(token)
+                TOOL_SECONDS.observe(seconds, tool=tool)
+                if profiler.active:
+                    profiler.request_done()
+                if stages is not None:
+                    arguments = {name: value for name, value in signature.bind(*args, **kwargs).arguments.items()
+                                 if value != signature.parameters[name].default}
+                    if recording:
+                        traffic_recorder.record(tool, arguments, result, seconds, stages, error, started_at)
+                    if SLOW_REQUEST_MS and seconds * 1000 >= SLOW_REQUEST_MS:
+                        log_slow_request(tool, arguments, seconds, stages, error)
+        return wrapper
+    return decorate
+
+# Normalized message -> classification. INTENT_CACHE_SIZE=0 disables it.
+classification_cache = ClassificationCache(
+    maxsize=int(os.getenv("INTENT_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("INTENT_CACHE_TTL", "3600"))
+)
+metrics.gauge("intent_cache_hits", "Classification cache hits", lambda: classification_cache.hits)
+metrics.gauge("intent_cache_misses", "Classification cache misses", lambda: classification_cache.misses)
+metrics.gauge("intent_cache_size", "Entries in the classification cache", lambda: len(classification_cache))
+
+# Conversation id -> last intent and agent, so follow-ups stay with their agent.
+# INTENT_SESSION_PATH keeps them across restarts.
+session_store = SessionStore(
+    maxsize=int(os.getenv("INTENT_SESSION_SIZE", "10000")),
+    ttl=float(os.getenv("INTENT_SESSION_TTL", "1800")),
+    path=os.getenv("INTENT_SESSION_PATH") or None
+)
+atexit.register(session_store.save)
+metrics.gauge("intent_sessions", "Conversations in the session store", lambda: len(session_store))
+
+# Concurrent classifications of the same normalized message share one model call.
+inflight_classifications = SingleFlight()
+metrics.gauge("intent_llm_calls_collapsed", "Classifications that joined an identical in-flight model call",
+              lambda: inflight_classifications.collapsed)
+
+# Model tiers, fastest first. An answer below ESCALATE_BELOW confidence, or
+# one that does not parse, is asked again of the next tier.
+MODEL_TIERS = [model.strip() for model in os.getenv("INTENT_MODEL_TIERS", DEFAULT_MODEL).split(",") if model.strip()]
+ESCALATE_BELOW = float(os.getenv("INTENT_ESCALATE_BELOW", "0.7"))
+
+# Classification cascade: cheap engines first, the LLM only when they are unsure.
+INTENT_ENGINES = [engine.strip() for engine in os.getenv("INTENT_ENGINES", "rules,embedding,llm").split(",") if engine.strip()]
+RULE_CONFIDENCE_THRESHOLD = float(os.getenv("INTENT_RULE_THRESHOLD", "0.6"))
+EMBEDDING_CONFIDENCE_THRESHOLD = float(os.getenv("INTENT_EMBEDDING_THRESHOLD", "0.5"))
+rule_classifier = load_rule_classifier()
+# None when numpy is missing or the engine is not configured; the cascade skips it.
+embedding_index = load_embedding_index() if "embedding" in INTENT_ENGINES else None
+
+# Batch classification: messages per packed prompt (1 = no packing), concurrent
+# model calls for the rest, and the largest batch accepted by the tool.
+BATCH_PACK_SIZE = int(os.getenv("INTENT_BATCH_PACK_SIZE", "1"))
+BATCH_CONCURRENCY = int(os.getenv("INTENT_BATCH_CONCURRENCY", "4"))
+BATCH_MAX_SIZE = int(os.getenv("INTENT_BATCH_MAX_SIZE", "256"))
+
+# Deadline for tool calls that do not pass deadline_ms (0 = none).
+DEFAULT_DEADLINE_MS = float(os.getenv("INTENT_DEADLINE_MS", "0"))
+
+# Admission control in front of the model: concurrent generations and how
+# many more may wait. Calls that do not fit are shed: "rules" answers with
+# the rule engine's best guess, "error" fails the call.
+llm_admission = AdmissionController(
+    max_concurrency=int(os.getenv("INTENT_LLM_CONCURRENCY", "4")),
+    max_queue=int(os.getenv("INTENT_LLM_QUEUE_SIZE", "32")),
+    observe=lambda seconds: observe_stage("llm_queue", seconds)
+)
+SHED_MODE = os.getenv("INTENT_SHED_MODE", "rules")
+# A tentative rule match on one of these moves a request up one priority level.
+PRIORITY_INTENTS = [intent.strip() for intent in os.getenv("INTENT_PRIORITY_INTENTS", "Human Transfer").split(",") if intent.strip()]
+metrics.gauge("intent_llm_queue_depth", "Model calls waiting for a slot", lambda: llm_admission.queued)
+metrics.gauge("intent_llm_active", "Model calls holding a slot", lambda: llm_admission.active)
+
+# ------------------------------------------------------------
+# Local LLM helper (pluggable backend, see llm_backends.py)
+# ------------------------------------------------------------
+async def aquery_local_llm(prompt: str, model: str = DEFAULT_MODEL, system: Optional[str] = None) -> str:
+    """Generate with the configured backend without blocking the event loop."""
     try:
-        result = subprocess.run(
-            ["ollama", "run", model],
-            input=prompt.encode("utf-8"),
-            capture_output=True,
-            check=True
-        )
-        return result.stdout.decode("utf-8").strip()
+        return await get_backend().agenerate(prompt, model, system)
     except Exception as e:
         return f"Error calling local model: {e}"
 
 # ------------------------------------------------------------
 # Intent classification with local LLM
 # ------------------------------------------------------------
-def classify_intent(user_message: str) -> Dict[str, Any]:
-    """Classify user intent using a local LLM model."""
-    prompt = f"""
-    You are an intent classifier. 
-    Analyze the following message and decide the intent.
-    Possible intents: Support, Billing, General Inquiry, Human Transfer.
-    Return JSON strictly in this format:
-    {{
-        "intent": "...",
-        "confidence": 0.xx,
-        "reasoning": "short explanation"
-    }}
-
-    Message: "{user_message}"
-    """
+# The instructions are sent as the system prompt, identical on every call, so
+# the model server can reuse the evaluated prefix; only the message varies.
+SYSTEM_PROMPT = """You are an intent classifier.
+Analyze the message and decide the intent.
+Possible intents: Support, Billing, General Inquiry, Human Transfer.
+Return JSON strictly in this format:
+{
+    "intent": "...",
+    "confidence": 0.xx,
+    "reasoning": "short explanation"
+}"""
+
+BATCH_SYSTEM_PROMPT = """You are an intent classifier.
+Analyze each of the numbered messages and decide its intent.
+Possible intents: Support, Billing, General Inquiry, Human Transfer.
+Return a JSON array strictly in this format, one object per message, in order:
+[
+    {"intent": "...", "confidence": 0.xx, "reasoning": "short explanation"}
+]"""
+
+
+def build_prompt(user_message: str) -> str:
+    return f'Message: "{user_message}"'
+
+
+def build_batch_prompt(user_messages: List[str]) -> str:
+    numbered = "\n".join(f'{i}. "{message}"' for i, message in enumerate(user_messages, 1))
+    return f"Messages:\n{numbered}"
+
+
+# Optional on-disk layer under the in-memory cache (INTENT_STORE_PATH), kept
+# across restarts and shared by every worker using the same file. Entries are
+# tagged with the models and prompts, so changing any of them invalidates them.
+CLASSIFIER_VERSION = store_version(",".join(MODEL_TIERS), str(ESCALATE_BELOW), SYSTEM_PROMPT, build_prompt("{message}"),
+                                   BATCH_SYSTEM_PROMPT, build_batch_prompt(["{message}"]))
+classification_store = ClassificationStore(
+    os.getenv("INTENT_STORE_PATH"),
+    CLASSIFIER_VERSION,
+    maxsize=int(os.getenv("INTENT_STORE_SIZE", "100000")),
+    ttl=float(os.getenv("INTENT_STORE_TTL", "604800")),
+    busy_timeout=float(os.getenv("INTENT_STORE_BUSY_TIMEOUT", "0.05"))
+) if os.getenv("INTENT_STORE_PATH") else None
+if classification_store is not None:
+    atexit.register(classification_store.close)
+    metrics.gauge("intent_store_hits", "Classification store hits", lambda: classification_store.hits)
+    metrics.gauge("intent_store_misses", "Classification store misses", lambda: classification_store.misses)
+
+
+def _fallback_classification(response: str) -> Dict[str, Any]:
+    return {
+        "intent": "Human Transfer",
+        "confidence": 0.5,
+        "reasoning": f"Fallback: could not parse model output. Raw response: {response}",
+        "fallback": True
+    }
 
-    response = query_local_llm(prompt)
 
-    # print('\n\n\n')
-    # print('response')
-    # print(response)
-    # print('\n\n\n')
+def _deadline_classification() -> Dict[str, Any]:
+    DEADLINES.inc(stage="classification")
+    return {
+        "intent": "Human Transfer",
+        "confidence": 0.0,
+        "reasoning": "Fallback: the request deadline passed before the model answered",
+        "engine": "deadline",
+        "fallback": True
+    }
+
+
+def parse_classification(response: str) -> Dict[str, Any]:
+    """Take the first {intent, ...} object in the output, ignoring prose and code fences."""
+    parsed = extract_first_json(response, required_keys=("intent",))
+    if parsed is None:
+        FALLBACKS.inc()
+        parsed = _fallback_classification(response)
+
+    parsed["engine"] = "llm"
+    return parsed
+
+
+async def astream_classification(prompt: str, model: str = DEFAULT_MODEL,
+                                 system: str = SYSTEM_PROMPT) -> Dict[str, Any]:
+    """Stream model output and stop generation as soon as a classification object closes."""
+    extractor = IncrementalJSONExtractor(required_keys=("intent",))
+    stream = get_backend().astream(prompt, model, system)
+    error = None
+    with metrics.timer(STAGE_SECONDS, stage="llm_call"):
+        # Stopping early skips the server's closing timing stats, so time to
+        # first token (load + prompt eval + one token) is recorded instead.
+        started, first_chunk = time.perf_counter(), True
+        try:
+            async for chunk in stream:
+                if first_chunk:
+                    observe_stage("llm_first_token", time.perf_counter() - started)
+                    first_chunk = False
+                if extractor.feed(chunk) is not None:
+                    break
+        except Exception as e:
+            error = e
+        finally:
+            await stream.aclose()
 
+    with metrics.timer(STAGE_SECONDS, stage="parse"):
+        if error is not None:
+            return parse_classification(f"Error calling local model: {error}")
+        if not extractor.done:
+            return parse_classification(extractor.text.strip())
+        extractor.result["engine"] = "llm"
+        return extractor.result
+
+
+def needs_escalation(result: Dict[str, Any], tier: int) -> bool:
+    """True if a larger tier is left and this answer is unparsed or not confident enough."""
+    if tier + 1 >= len(MODEL_TIERS):
+        return False
     try:
-        parsed = json.loads(response)
-    except json.JSONDecodeError:
-        parsed = {
-            "intent": "Human Transfer",
-            "confidence": 0.5,
-            "reasoning": f"Fallback: could not parse model output. Raw response: {response}"
-        }
+        confidence = float(result.get("confidence", 0.0))
+    except (TypeError, ValueError):
+        confidence = 0.0
+    return bool(result.get("fallback")) or confidence < ESCALATE_BELOW
+
+
+def answered_by(result: Dict[str, Any], tier: int) -> Dict[str, Any]:
+    result["tier"] = tier
+    result["model"] = MODEL_TIERS[tier]
+    TIER_ANSWERS.inc(tier=tier, model=MODEL_TIERS[tier])
+    return result
+
 
+def escalation_cut_short(result: Dict[str, Any], reason: str) -> Dict[str, Any]:
+    """Keep an unsure answer whose escalation could not run, for this request only.
+
+    It is marked as a fallback so it is neither cached nor stored, and the
+    next request for the message gets another chance at the larger tier.
+    """
+    result["reasoning"] = f"Not escalated ({reason}), unsure answer: {result.get('reasoning', '')}"
+    result["fallback"] = True
+    return result
+
+
+def parse_batch_classification(response: str, count: int) -> Optional[List[Dict[str, Any]]]:
+    """Parse a packed answer; None if it is not exactly `count` classifications."""
+    parsed = extract_first_json(response, opening="[")
+    if not isinstance(parsed, list) or len(parsed) != count:
+        return None
+    if not all(isinstance(item, dict) and "intent" in item for item in parsed):
+        return None
+    for item in parsed:
+        item["engine"] = "llm"
     return parsed
 
+
+def classify_with_rules(user_message: str) -> Dict[str, Any]:
+    result = rule_classifier.classify(user_message)
+    result["engine"] = "rules"
+    return result
+
+
+def classify_with_embeddings(user_message: str) -> Optional[Dict[str, Any]]:
+    if embedding_index is None:
+        return None
+    return embedding_index.classify(user_message)
+
+
+# Engines that are cheap enough to try before the LLM, with their confidence bars.
+CHEAP_ENGINES = {
+    "rules": (classify_with_rules, lambda: RULE_CONFIDENCE_THRESHOLD),
+    "embedding": (classify_with_embeddings, lambda: EMBEDDING_CONFIDENCE_THRESHOLD),
+}
+
+
+def run_cheap_engines(user_message: str) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """Run the cheap engines in cascade order: (first confident answer, best answer so far)."""
+    best = None
+    for engine in INTENT_ENGINES:
+        if engine not in CHEAP_ENGINES:
+            continue
+        classify, threshold = CHEAP_ENGINES[engine]
+        result = classify(user_message)
+        if result is None or result["intent"] is None:
+            continue
+        if result["confidence"] >= threshold():
+            return result, result
+        if best is None or result["confidence"] > best["confidence"]:
+            best = result
+    return None, best
+
+
+def classify_with_cheap_engines(user_message: str) -> Optional[Dict[str, Any]]:
+    """Return the first confident cheap answer.
+
+    Without "llm" in the cascade the most confident cheap answer is returned
+    whatever its score.
+    """
+    confident, best = run_cheap_engines(user_message)
+    if confident is not None:
+        return confident
+    if "llm" in INTENT_ENGINES:
+        return None
+    return best or {"intent": "Human Transfer", "confidence": 0.0, "reasoning": "No engine matched", "engine": "rules"}
+
+
+async def _remember(key: str, result: Dict[str, Any]) -> None:
+    # Fallbacks are not cached so the next request gets another go at the model.
+    if not result.get("fallback"):
+        classification_cache.set(key, result)
+        if classification_store is not None:
+            # SQLite blocks (up to its busy timeout); keep it off the event loop.
+            await asyncio.to_thread(classification_store.set, key, dict(result))
+
+
+async def classify_without_llm(user_message: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+    """Try the cheap engines, the cache and the store. Returns (cache key, result or None)."""
+    with metrics.timer(STAGE_SECONDS, stage="cheap_engines"):
+        result = classify_with_cheap_engines(user_message)
+    if result is not None:
+        CLASSIFICATIONS.inc(engine=result["engine"])
+        return "", result
+
+    key = normalize_message(user_message)
+    result = classification_cache.get(key)
+    if result is not None:
+        CLASSIFICATIONS.inc(engine="cache")
+    elif classification_store is not None:
+        with metrics.timer(STAGE_SECONDS, stage="store"):
+            result = await asyncio.to_thread(classification_store.get, key)
+        if result is not None:
+            CLASSIFICATIONS.inc(engine="store")
+            classification_cache.set(key, result)
+    return key, result
+
+
+def llm_priority(user_message: str, priority: str = "normal") -> int:
+    """Queue priority for a model call: the caller's, raised one level by a priority-intent hint."""
+    if priority not in PRIORITIES:
+        raise ValueError(f"Unknown priority: {priority!r} (expected one of {', '.join(PRIORITIES)})")
+    level = PRIORITIES[priority]
+    if PRIORITY_INTENTS and rule_classifier.classify(user_message)["intent"] in PRIORITY_INTENTS:
+        level = max(0, level - 1)
+    return level
+
+
+async def admitted(call: Callable[[], Awaitable[Any]], level: int) -> Any:
+    """Run a model call once admission control gives it a slot."""
+    async with llm_admission.slot(level):
+        return await call()
+
+
+def _shed_classification(user_message: str) -> Dict[str, Any]:
+    """Answer a shed request from the rules, or raise Overloaded in "error" mode."""
+    SHED.inc(mode=SHED_MODE)
+    if SHED_MODE == "error":
+        raise Overloaded("The intent classifier is busy, try again later")
+    result = classify_with_rules(user_message)
+    if result["intent"] is None:
+        result = {"intent": "Human Transfer", "confidence": 0.0, "reasoning": "No rule matched", "engine": "rules"}
+    result["reasoning"] = f"Model busy, rule-based guess: {result['reasoning']}"
+    result["fallback"] = True
+    return result
+
+
+async def classify_with_tiers(user_message: str, level: int, start: int = 0,
+                              result: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Ask the model tiers from `start` up until one is confident.
+
+    `result` is the answer already given by tier `start - 1`, if any. When a
+    larger tier cannot get a model slot, the smaller tier's answer stands,
+    marked as cut short.
+    """
+    with metrics.timer(STAGE_SECONDS, stage="prompt_build"):
+        prompt = build_prompt(user_message)
+    tier = start - 1
+    for next_tier in range(start, len(MODEL_TIERS)):
+        model = MODEL_TIERS[next_tier]
+        try:
+            candidate = await admitted(lambda: astream_classification(prompt, model), level)
+        except Overloaded:
+            if result is None:
+                raise
+            return escalation_cut_short(answered_by(result, tier), "larger model busy")
+        tier, result = next_tier, candidate
+        if not needs_escalation(result, tier):
+            break
+        ESCALATIONS.inc(model=model)
+    return answered_by(result, tier)
+
+
+async def aclassify_intent(user_message: str, priority: str = "normal") -> Dict[str, Any]:
+    """Classify user intent without blocking the event loop.
+
+    Concurrent calls for the same normalized message share one model call;
+    it is counted and remembered once, and the callers that joined it are
+    counted as "coalesced".
+    """
+    key, result = await classify_without_llm(user_message)
+    if result is not None:
+        return result
+
+    joined = True
+
+    async def classify_with_model() -> Dict[str, Any]:
+        nonlocal joined
+        joined = False
+        result = await classify_with_tiers(user_message, llm_priority(user_message, priority))
+        CLASSIFICATIONS.inc(engine="llm")
+        await _remember(key, result)
+        return result
+
+    try:
+        result = await within_deadline(inflight_classifications.do(key, classify_with_model))
+    except DeadlineExceeded:
+        return _deadline_classification()
+    except Overloaded:
+        return _shed_classification(user_message)
+    if joined:
+        CLASSIFICATIONS.inc(engine="coalesced")
+    return result
+
+
+async def aclassify_intents(user_messages: List[str], priority: str = "low") -> List[Any]:
+    """Classify many messages; returns a classification or an exception per message.
+
+    Rule and cache hits are answered directly. The rest are packed
+    BATCH_PACK_SIZE to a prompt for the first model tier when packing is
+    enabled; anything a packed answer does not cover, or that needs a larger
+    tier, is classified one by one. Packed prompts and single calls share
+    one limit of BATCH_CONCURRENCY model calls at a time. Batches queue for
+    the model at low priority by default.
+    """
+    if priority not in PRIORITIES:
+        raise ValueError(f"Unknown priority: {priority!r} (expected one of {', '.join(PRIORITIES)})")
+    results: List[Any] = [None] * len(user_messages)
+    pending: List[Tuple[int, str]] = []  # (index, cache key) of messages that need the model
+    for index, message in enumerate(user_messages):
+        try:
+            key, result = await classify_without_llm(message)
+        except Exception as e:
+            results[index] = e
+            continue
+        if result is not None:
+            results[index] = result
+        else:
+            pending.append((index, key))
+
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def classify_one(index: int) -> None:
+        async with semaphore:
+            try:
+                results[index] = await aclassify_intent(user_messages[index], priority)
+            except Exception as e:
+                results[index] = e
+
+    async def escalate_one(index: int, key: str, packed: Dict[str, Any]) -> None:
+        async with semaphore:
+            try:
+                result = await within_deadline(
+                    classify_with_tiers(user_messages[index], PRIORITIES[priority], start=1, result=packed))
+            except DeadlineExceeded:
+                DEADLINES.inc(stage="classification")
+                result = escalation_cut_short(answered_by(packed, 0), "deadline passed")
+            except Exception as e:
+                results[index] = e
+                return
+        CLASSIFICATIONS.inc(engine="llm")
+        await _remember(key, result)
+        results[index] = result
+
+    async def classify_packed(chunk: List[Tuple[int, str]]) -> None:
+        if len(chunk) == 1:
+            await classify_one(chunk[0][0])
+            return
+        prompt = build_batch_prompt([user_messages[index] for index, _ in chunk])
+        async with semaphore:
+            try:
+                with metrics.timer(STAGE_SECONDS, stage="llm_call"):
+                    response = await within_deadline(admitted(
+                        lambda: aquery_local_llm(prompt, MODEL_TIERS[0], BATCH_SYSTEM_PROMPT), PRIORITIES[priority]))
+            except (DeadlineExceeded, Overloaded):
+                response = ""
+        packed = parse_batch_classification(response, len(chunk))
+        if packed is None:
+            await asyncio.gather(*(classify_one(index) for index, _ in chunk))
+            return
+        follow_ups = []
+        for (index, key), result in zip(chunk, packed):
+            if needs_escalation(result, 0):
+                ESCALATIONS.inc(model=MODEL_TIERS[0])
+                follow_ups.append(escalate_one(index, key, result))
+                continue
+            CLASSIFICATIONS.inc(engine="llm")
+            await _remember(key, answered_by(result, 0))
+            results[index] = result
+        await asyncio.gather(*follow_ups)
+
+    pack_size = max(1, BATCH_PACK_SIZE)
+    await asyncio.gather(*(classify_packed(pending[start:start + pack_size])
+                           for start in range(0, len(pending), pack_size)))
+    return results
+
 # ------------------------------------------------------------
-# FastMCP Tools
+# Routing
 # ------------------------------------------------------------
-@mcp.tool()
-def classify_user_intent(user_message: str) -> Dict[str, Any]:
-    """Classify user intent using local LLM."""
-    result = classify_intent(user_message)
-
-    # Add routing
-    intent = result.get("intent", "Human Transfer")
-    if intent == "Support":
-        result["route_to"] = "support_agent"
-        result["next_action"] = "Route to SupportAgent for technical assistance"
-    elif intent == "Billing":
-        result["route_to"] = "billing_agent"
-        result["next_action"] = "Route to BillingAgent for payment and account issues"
-    elif intent == "General Inquiry":
-        result["route_to"] = "general_agent"
-        result["next_action"] = "Route to GeneralInfoAgent for general questions"
-    else:
-        result["route_to"] = "human_agent"
-        result["next_action"] = "Route to HumanAgent for escalation"
+# intent -> (agent key, next action). Anything else goes to the human agent.
+INTENT_ROUTES = {
+    "Support": ("support_agent", "Route to SupportAgent for technical assistance"),
+    "Billing": ("billing_agent", "Route to BillingAgent for payment and account issues"),
+    "General Inquiry": ("general_agent", "Route to GeneralInfoAgent for general questions"),
+    "Human Transfer": ("human_agent", "Route to HumanAgent for escalation"),
+}
 
-    return result
+# Replicas, descriptions and modules per downstream agent (config/agents.json).
+AGENT_CONFIG = load_agent_config()
+AGENT_ENDPOINTS: Dict[str, Any] = {agent_key: agent["replicas"] for agent_key, agent in AGENT_CONFIG.items()}
+AGENT_MODULES = {agent_key: agent["module"] for agent_key, agent in AGENT_CONFIG.items()}
 
+# "sse": one process per agent over loopback HTTP (default).
+# "inprocess": import the agents here and call them over the in-memory transport.
+AGENT_TRANSPORT = os.getenv("AGENT_TRANSPORT", "sse")
 
-@mcp.tool()
-async def route_conversation(user_message: str) -> Dict[str, Any]:
-    """Route conversation to appropriate specialized agent."""
-    classification = classify_intent(user_message)
-    route_to = classification.get("intent", "Human Transfer")
-
-    # Map intent to agents
-    if route_to == "Support":
-        agent_key = "support_agent"
-    elif route_to == "Billing":
-        agent_key = "billing_agent"
-    elif route_to == "General Inquiry":
-        agent_key = "general_agent"
-    else:
-        agent_key = "human_agent"
 
-    agent_endpoints = {
-        "support_agent": "http://127.0.0.1:8001/sse",
-        "billing_agent": "http://127.0.0.1:8002/sse",
-        "general_agent": "http://127.0.0.1:8003/sse",
-        "human_agent": "http://127.0.0.1:8004/sse"
+def inprocess_endpoints() -> Dict[str, Any]:
+    """Import every downstream agent and return its FastMCP server per agent key."""
+    return {
+        agent_key: importlib.import_module(module_name).mcp
+        for agent_key, module_name in AGENT_MODULES.items()
     }
 
-    if agent_key not in agent_endpoints:
+
+if AGENT_TRANSPORT == "inprocess":
+    AGENT_ENDPOINTS.update(inprocess_endpoints())
+elif AGENT_TRANSPORT != "sse":
+    raise ValueError(f"Unknown AGENT_TRANSPORT: {AGENT_TRANSPORT!r} (expected 'sse' or 'inprocess')")
+
+# Long-lived, health-checked MCP sessions per downstream replica, balanced
+# per agent with passive health tracking and ejection of failing replicas.
+agent_pools = AgentPoolRegistry(
+    AGENT_ENDPOINTS,
+    balancing=os.getenv("AGENT_BALANCING", "least_outstanding"),
+    eject_after=int(os.getenv("AGENT_EJECT_AFTER", "3")),
+    eject_seconds=float(os.getenv("AGENT_EJECT_SECONDS", "10")),
+    hedge_percentile=float(os.getenv("AGENT_HEDGE_PERCENTILE", "0")),
+    size=int(os.getenv("AGENT_POOL_SIZE", "2")),
+    max_concurrency=int(os.getenv("AGENT_POOL_MAX_CONCURRENCY", "16")),
+    health_interval=float(os.getenv("AGENT_POOL_HEALTH_INTERVAL", "30")),
+    observe=observe_stage
+)
+
+# A downstream call never waits longer than this, deadline or not.
+AGENT_CALL_TIMEOUT = float(os.getenv("AGENT_CALL_TIMEOUT", "10"))
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("AGENT_CIRCUIT_FAILURES", "5"))
+CIRCUIT_RESET_SECONDS = float(os.getenv("AGENT_CIRCUIT_RESET_SECONDS", "10"))
+circuit_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def circuit_breaker(agent_key: str) -> CircuitBreaker:
+    breaker = circuit_breakers.get(agent_key)
+    if breaker is None:
+        breaker = circuit_breakers[agent_key] = CircuitBreaker(CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_SECONDS)
+    return breaker
+
+
+def add_routing(classification: Dict[str, Any]) -> Dict[str, Any]:
+    """Attach route_to/next_action for the classified intent."""
+    intent = classification.get("intent", "Human Transfer")
+    route_to, next_action = INTENT_ROUTES.get(intent, INTENT_ROUTES["Human Transfer"])
+    classification["route_to"] = route_to
+    classification["next_action"] = next_action
+    return classification
+
+
+def classify_follow_up(user_message: str, record: SessionRecord) -> Dict[str, Any]:
+    """Keep a follow-up with its conversation's intent unless a cheap engine confidently disagrees."""
+    with metrics.timer(STAGE_SECONDS, stage="cheap_engines"):
+        confident, _ = run_cheap_engines(user_message)
+    if confident is not None:
+        if confident["intent"] != record.intent:
+            TOPIC_CHANGES.inc()
+        CLASSIFICATIONS.inc(engine=confident["engine"])
+        return confident
+
+    CLASSIFICATIONS.inc(engine="session")
+    return {
+        "intent": record.intent,
+        "confidence": record.confidence,
+        "reasoning": f"Follow-up in a conversation already routed to {record.route_to}",
+        "engine": "session"
+    }
+
+
+async def remember_turn(session_id: Optional[str], classification: Dict[str, Any]) -> None:
+    # Fallbacks (unparsable, shed, out of time) would overwrite a good intent with a guess.
+    if session_id and not classification.get("fallback"):
+        session_store.update(session_id, classification["intent"], classification["route_to"],
+                             classification.get("confidence", 0.0))
+        if session_store.save_due():
+            snapshot = session_store.snapshot()
+            if snapshot is not None:
+                # Serializing up to INTENT_SESSION_SIZE rows would stall every client.
+                await asyncio.to_thread(session_store.write, snapshot)
+
+
+async def aclassify_in_session(user_message: str, session_id: Optional[str] = None,
+                               priority: str = "normal") -> Dict[str, Any]:
+    """Classify and add routing; a known session skips the model on continuation turns."""
+    record = session_store.get(session_id) if session_id else None
+    if record is None:
+        classification = await aclassify_intent(user_message, priority)
+    else:
+        classification = classify_follow_up(user_message, record)
+    classification = add_routing(classification)
+    await remember_turn(session_id, classification)
+    return classification
+
+
+async def dispatch_to_agent(agent_key: str, user_message: str) -> Dict[str, Any]:
+    """Call handle_request on the downstream agent and wrap the outcome."""
+    if agent_key not in AGENT_ENDPOINTS:
+        # route_to comes from the client: don't let it mint new series.
+        ROUTES.inc(agent="unknown", status="unknown")
         return {"error": f"Unknown agent: {agent_key}"}
 
-    agent_url = agent_endpoints[agent_key]
+    breaker = circuit_breaker(agent_key)
+    if not breaker.allow():
+        ROUTES.inc(agent=agent_key, status="circuit_open")
+        return _dispatch_failure(agent_key, "circuit open: agent is failing, not calling it for now")
 
     try:
-        async with Client(agent_url) as client:
-            response = await client.call_tool("handle_request", {"user_message": user_message})
+        response = await within_deadline(
+            agent_pools.get(agent_key).call_tool("handle_request", {"user_message": user_message}),
+            AGENT_CALL_TIMEOUT
+        )
 
-            if hasattr(response, 'structured_content'):
-                agent_response = response.structured_content
-            elif hasattr(response, 'data'):
-                agent_response = response.data
-            else:
-                agent_response = response
+        if hasattr(response, 'structured_content'):
+            agent_response = response.structured_content
+        elif hasattr(response, 'data'):
+            agent_response = response.data
+        else:
+            agent_response = response
 
-            return {
-                "routed_to": agent_key,
-                "agent_response": agent_response,
-                "status": "success"
-            }
-    except Exception as e:
+        breaker.record_success()
+        ROUTES.inc(agent=agent_key, status="success")
         return {
             "routed_to": agent_key,
-            "error": str(e),
-            "status": "failed",
-            "message": f"Failed to communicate with {agent_key}: {str(e)}"
+            "agent_response": agent_response,
+            "status": "success"
         }
+    except DeadlineExceeded as e:
+        # The caller ran out of time; that says nothing about the agent's health.
+        DEADLINES.inc(stage="dispatch")
+        ROUTES.inc(agent=agent_key, status="deadline")
+        return _dispatch_failure(agent_key, str(e))
+    except ToolError as e:
+        breaker.record_success()
+        ROUTES.inc(agent=agent_key, status="failed")
+        return _dispatch_failure(agent_key, str(e))
+    except Exception as e:
+        breaker.record_failure()
+        ROUTES.inc(agent=agent_key, status="failed")
+        return _dispatch_failure(agent_key, str(e) or f"no answer within {AGENT_CALL_TIMEOUT}s")
+
+
+def _dispatch_failure(agent_key: str, error: str) -> Dict[str, Any]:
+    return {
+        "routed_to": agent_key,
+        "error": error,
+        "status": "failed",
+        "message": f"Failed to communicate with {agent_key}: {error}"
+    }
+
+# ------------------------------------------------------------
+# FastMCP Tools
+# ------------------------------------------------------------
+def request_deadline(deadline_ms: Optional[float]):
+    """Deadline scope for one tool call; falls back to INTENT_DEADLINE_MS."""
+    return deadline_scope(DEFAULT_DEADLINE_MS if deadline_ms is None else deadline_ms)
+
+
+@mcp.tool()
+@traced("classify_user_intent")
+async def classify_user_intent(user_message: str, deadline_ms: Optional[float] = None,
+                               priority: str = "normal", session_id: Optional[str] = None) -> Dict[str, Any]:
+    """Classify user intent using local LLM.
+
+    `deadline_ms` bounds the whole call; past it the answer is a Human
+    Transfer fallback instead of waiting on the model. `priority` ("high",
+    "normal", "low") orders the call in the model queue when it is busy.
+    With `session_id`, follow-ups keep the conversation's intent unless a
+    cheap engine confidently detects a new topic.
+    """
+    with request_deadline(deadline_ms):
+        return await aclassify_in_session(user_message, session_id, priority)
+
+
+@mcp.tool()
+@traced("classify_user_intents")
+async def classify_user_intents(messages: List[str], deadline_ms: Optional[float] = None,
+                                priority: str = "low") -> Dict[str, Any]:
+    """Classify a batch of messages. Results come back in input order, with per-item errors."""
+    if len(messages) > BATCH_MAX_SIZE:
+        return {"error": f"Batch too large: {len(messages)} messages (max {BATCH_MAX_SIZE})", "status": "failed"}
+
+    with request_deadline(deadline_ms):
+        items = []
+        for index, result in enumerate(await aclassify_intents(messages, priority)):
+            if isinstance(result, Exception):
+                items.append({"index": index, "status": "failed", "error": str(result)})
+            else:
+                items.append({"index": index, "status": "success", **add_routing(result)})
+
+        return {"results": items, "count": len(items), "status": "success"}
+
+
+@mcp.tool()
+@traced("route_conversation")
+async def route_conversation(user_message: str, classification: Optional[Dict[str, Any]] = None,
+                             deadline_ms: Optional[float] = None, priority: str = "normal",
+                             session_id: Optional[str] = None) -> Dict[str, Any]:
+    """Route conversation to appropriate specialized agent.
+
+    Pass the result of classify_user_intent as `classification` to skip the
+    second model call. `deadline_ms` bounds classification and dispatch together.
+    With `session_id`, follow-ups stay with the conversation's agent.
+    """
+    with request_deadline(deadline_ms):
+        if classification is None:
+            try:
+                classification = await aclassify_in_session(user_message, session_id, priority)
+            except Overloaded as e:
+                return {"error": str(e), "status": "failed"}
+        else:
+            if not classification.get("route_to"):
+                classification = add_routing(dict(classification))
+            if "intent" in classification:
+                await remember_turn(session_id, classification)
+        agent_key = classification["route_to"]
+
+        return await dispatch_to_agent(agent_key, user_message)
+
+
+@mcp.tool()
+@traced("classify_and_route")
+async def classify_and_route(user_message: str, deadline_ms: Optional[float] = None,
+                             priority: str = "normal", session_id: Optional[str] = None) -> Dict[str, Any]:
+    """Classify once and route: returns the classification and the agent response."""
+    with request_deadline(deadline_ms):
+        try:
+            classification = await aclassify_in_session(user_message, session_id, priority)
+        except Overloaded as e:
+            return {"error": str(e), "status": "failed"}
+        result = await dispatch_to_agent(classification["route_to"], user_message)
+        result["classification"] = classification
+        return result
+
+@mcp.tool()
+def get_cache_stats() -> Dict[str, Any]:
+    """Report classification cache size and hit/miss/eviction counters, plus the on-disk store's."""
+    stats = classification_cache.stats()
+    if classification_store is not None:
+        stats["store"] = classification_store.stats()
+    return stats
+
+
+@mcp.tool()
+def get_agent_pool_stats() -> Dict[str, Any]:
+    """Report replica load, ejections and hedging per agent, plus its circuit breaker."""
+    stats = agent_pools.stats()
+    for agent_key, breaker in circuit_breakers.items():
+        stats.setdefault(agent_key, {})["circuit"] = breaker.stats()
+    return stats
+
+
+@mcp.tool()
+def get_metrics() -> Dict[str, Any]:
+    """Per-stage and per-tool latency summaries plus fallback and routing counters."""
+    return metrics.snapshot()
+
+
+# ------------------------------------------------------------
+# Admin tools: on-demand profiling and the slow-request log
+# (only with INTENT_ADMIN_TOOLS=1: any MCP client could use them)
+# ------------------------------------------------------------
+async def start_profiling(mode: str = "cprofile", seconds: Optional[float] = None, requests: Optional[int] = None,
+                          top: int = 20, sort: str = "cumulative", save: bool = False) -> Dict[str, Any]:
+    """Start profiling the intent agent until `seconds` pass or `requests` tool calls finish.
+
+    `mode` is "cprofile" (exact call counts and times, slows the agent while
+    on) or "sampling" (stack samples every 5 ms from a side thread, cheap).
+    With `save`, stop writes a .pstats or collapsed-stack file to
+    INTENT_PROFILE_DIR. Without a limit the session runs until stop_profiling.
+    """
+    try:
+        return {**profiler.start(mode, seconds, requests, top, sort, save), "status": "success"}
+    except (ValueError, RuntimeError) as e:
+        return {"error": str(e), "status": "failed"}
+
+
+async def stop_profiling() -> Dict[str, Any]:
+    """Stop the running profiling session and return its hottest functions."""
+    report = profiler.stop()
+    if report is None:
+        return {"error": "No profiling session has run", "status": "failed"}
+    return {**report, "status": "success"}
+
+
+async def get_profile_report() -> Dict[str, Any]:
+    """Status of the running session, or the report of the last finished one."""
+    if profiler.active or profiler.last_report is None:
+        return profiler.status()
+    return {**profiler.last_report, "active": False}
+
+
+async def get_slow_requests(limit: int = 20) -> Dict[str, Any]:
+    """The most recent tool calls over INTENT_SLOW_REQUEST_MS, newest first, with per-stage milliseconds."""
+    entries = list(slow_requests)[-limit:][::-1] if limit > 0 else []
+    return {"threshold_ms": SLOW_REQUEST_MS, "requests": entries, "count": len(entries)}
+
+
+if os.getenv("INTENT_ADMIN_TOOLS", "0") == "1":
+    for admin_tool in (start_profiling, stop_profiling, get_profile_report, get_slow_requests):
+        mcp.tool()(admin_tool)
+
+
+@mcp.custom_route("/metrics", methods=["GET"])
+async def metrics_endpoint(request: Request) -> PlainTextResponse:
+    """Prometheus text exposition of the same metrics."""
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+# ------------------------------------------------------------
+# Warm-up (runs in the server's lifespan, before the first request)
+# ------------------------------------------------------------
+# Only the served agent warms up on start; in-memory clients (tests, the
+# single-process router) skip it unless they call warm_up() themselves.
+warm_up_on_start = False
+# Default: two thirds of the supervisor's startup timeout, the rest is for
+# imports and binding the port. Otherwise a cold model gets us restarted.
+WARMUP_TIMEOUT = float(os.getenv("INTENT_WARMUP_TIMEOUT",
+                                 float(os.getenv("AGENT_STARTUP_TIMEOUT", "30")) * 2 / 3))
+WARMUP_MESSAGE = "Hello, I need some help with my account"
+warmup_report: Optional[Dict[str, Any]] = None
+metrics.gauge("intent_warmup_seconds", "Seconds spent warming up before serving",
+              lambda: warmup_report["seconds"] if warmup_report else 0.0)
+
+
+async def warm_up() -> Dict[str, Any]:
+    """Load the model with the system prompt, connect to the downstream agents
+    and run the cheap engines once, so the first request pays for none of it.
+
+    Failures are reported, not raised: a cold agent is better than no agent.
+    """
+    global warmup_report
+    started = time.perf_counter()
+    report: Dict[str, Any] = {}
+
+    async def warm_model() -> None:
+        if "llm" not in INTENT_ENGINES:
+            return
+        step = time.perf_counter()
+        # Every tier, so the first escalation does not pay for a model load
+        # either; together, so they share one timeout.
+        await asyncio.gather(*(get_backend().warm_up(build_prompt(WARMUP_MESSAGE), model, SYSTEM_PROMPT)
+                               for model in MODEL_TIERS))
+        report["model_seconds"] = round(time.perf_counter() - step, 3)
+
+    async def warm_agents() -> None:
+        step = time.perf_counter()
+        report["agent_sessions"] = await agent_pools.warm_up()
+        report["agents_seconds"] = round(time.perf_counter() - step, 3)
+
+    steps = {"model": warm_model(), "agents": warm_agents()}
+    outcomes = await asyncio.gather(
+        *(asyncio.wait_for(step, WARMUP_TIMEOUT) for step in steps.values()), return_exceptions=True
+    )
+    report["errors"] = {
+        name: f"{type(outcome).__name__}: {outcome}"
+        for name, outcome in zip(steps, outcomes) if isinstance(outcome, BaseException)
+    }
+
+    step = time.perf_counter()
+    run_cheap_engines(WARMUP_MESSAGE)
+    report["engines_seconds"] = round(time.perf_counter() - step, 3)
+
+    report["seconds"] = round(time.perf_counter() - started, 3)
+    warmup_report = report
+    print(f"🔥 Warm-up finished in {report['seconds']:.2f}s"
+          + (f" (failed: {', '.join(report['errors'])})" if report["errors"] else ""), file=sys.stderr)
+    return report
 
 # ------------------------------------------------------------
 # Entry point
@@ -143,4 +1052,5 @@ if __name__ == "__main__":
     if sys.platform.startswith("win"):
         asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
 
+    warm_up_on_start = os.getenv("INTENT_WARMUP", "1") != "0"
     mcp.run(transport="sse", host="127.0.0.1", port=8000)
\ No newline at end of file
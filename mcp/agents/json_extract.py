@@ -0,0 +1,87 @@
+import json
+import re
+from typing import Any, Optional, Sequence
+
+_TRAILING_COMMA = re.compile(r",(\s*[}\]])")
+
+
+def _loads_lenient(text: str) -> Any:
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        return json.loads(_TRAILING_COMMA.sub(r"\1", text))
+
+
+class IncrementalJSONExtractor:
+    """Pulls the first complete JSON value out of text that arrives in chunks.
+
+    Anything around the value (prose, ```json fences) is ignored. Brackets
+    inside strings are tracked so they do not end the value early. Feed
+    chunks with `feed`; it returns the value as soon as its closing bracket
+    arrives, so the caller can stop generation right there.
+    """
+
+    def __init__(self, opening: str = "{", required_keys: Sequence[str] = ()):
+        self.opening = opening
+        self.required_keys = tuple(required_keys)
+        self.text = ""
+        self.result: Any = None
+        self._pos = 0
+        self._start: Optional[int] = None
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    @property
+    def done(self) -> bool:
+        return self.result is not None
+
+    def _accept(self, value: Any) -> bool:
+        if self.opening == "{":
+            return isinstance(value, dict) and all(key in value for key in self.required_keys)
+        return isinstance(value, list)
+
+    def feed(self, chunk: str) -> Any:
+        """Add text; return the extracted value once complete, else None."""
+        if self.done:
+            return self.result
+        self.text += chunk
+        text = self.text
+        while self._pos < len(text):
+            char = text[self._pos]
+            if self._start is None:
+                if char == self.opening:
+                    self._start, self._depth = self._pos, 1
+            elif self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    candidate = text[self._start:self._pos + 1]
+                    try:
+                        value = _loads_lenient(candidate)
+                    except json.JSONDecodeError:
+                        value = None
+                    if value is not None and self._accept(value):
+                        self.result = value
+                        self._pos += 1
+                        return value
+                    # Not what we wanted; keep looking after this value's opening bracket.
+                    self._pos = self._start
+                    self._start = None
+            self._pos += 1
+        return None
+
+
+def extract_first_json(text: str, opening: str = "{", required_keys: Sequence[str] = ()) -> Any:
+    """Extract the first matching JSON value from a complete string, or None."""
+    return IncrementalJSONExtractor(opening, required_keys).feed(text)
@@ -0,0 +1,66 @@
+import json
+import os
+import re
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+DEFAULT_AGENT_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config", "agent_rules.json")
+
+
+def _term_pattern(term: str) -> str:
+    """Escape a keyword or phrase; a trailing `*` matches any word ending ("crash*")."""
+    term = term.strip().lower()
+    if term.endswith("*"):
+        return re.escape(term[:-1]) + r"\w*"
+    return re.escape(term)
+
+
+class KeywordMatcher:
+    """Matches many keyword rules against a message with one compiled regex.
+
+    Every rule becomes a named group of a single word-bounded alternation, so a
+    message is scanned once no matter how many rules or keywords there are.
+    Rules are given in priority order; `first_match` returns the highest
+    priority rule found anywhere in the message.
+    """
+
+    def __init__(self, rules: Sequence[Tuple[str, Sequence[str]]]):
+        self.names: List[str] = [name for name, _ in rules]
+        alternatives = []
+        for index, (_, keywords) in enumerate(rules):
+            # Longest first so phrases win over the words they contain.
+            terms = sorted((_term_pattern(k) for k in keywords if k.strip()), key=len, reverse=True)
+            if terms:
+                alternatives.append(f"(?P<r{index}>{'|'.join(terms)})")
+        self._regex = re.compile(r"\b(?:" + "|".join(alternatives) + r")\b", re.IGNORECASE) if alternatives else None
+
+    def iter_matches(self, message: str) -> Iterator[Tuple[int, str]]:
+        """Yield (rule index, matched text) for every non-overlapping hit."""
+        if self._regex is None:
+            return
+        for match in self._regex.finditer(message):
+            yield int(match.lastgroup[1:]), match.group(0)
+
+    def first_match(self, message: str) -> Optional[int]:
+        """Index of the highest priority rule that matches, or None."""
+        return min((index for index, _ in self.iter_matches(message)), default=None)
+
+
+class ResponseTable:
+    """Priority-ordered keyword rules mapped to canned responses."""
+
+    def __init__(self, rules: Sequence[Dict[str, Any]], default: str):
+        self.rules = list(rules)
+        self.default = default
+        self.matcher = KeywordMatcher([(rule["name"], rule["keywords"]) for rule in self.rules])
+
+    def respond(self, message: str) -> str:
+        index = self.matcher.first_match(message)
+        return self.default if index is None else self.rules[index]["response"]
+
+
+def load_response_table(agent_name: str, path: Optional[str] = None) -> ResponseTable:
+    """Build the ResponseTable for one agent from the shared rules file."""
+    path = path or os.getenv("AGENT_RULES_PATH", DEFAULT_AGENT_RULES_PATH)
+    with open(path, "r", encoding="utf-8") as f:
+        config = json.load(f)[agent_name]
+    return ResponseTable(config["rules"], config["default"])
@@ -0,0 +1,318 @@
+import asyncio
+import json
+import os
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Union
+
+import httpx
+
+# ------------------------------------------------------------
+# Configuration (environment driven)
+# ------------------------------------------------------------
+DEFAULT_MODEL = os.getenv("INTENT_LLM_MODEL", "gemma:2b")
+DEFAULT_BACKEND = os.getenv("INTENT_LLM_BACKEND", "http")
+OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://127.0.0.1:11434")
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+LLM_TIMEOUT = float(os.getenv("INTENT_LLM_TIMEOUT", "120"))
+LLM_MAX_CONNECTIONS = int(os.getenv("INTENT_LLM_MAX_CONNECTIONS", "8"))
+LLM_THREAD_WORKERS = int(os.getenv("INTENT_LLM_THREADS", "8"))
+
+# Bounded pool used to run blocking backends without stalling the event loop.
+_executor = ThreadPoolExecutor(max_workers=LLM_THREAD_WORKERS, thread_name_prefix="llm")
+
+
+# Called with Ollama's timing fields (load_duration, prompt_eval_duration,
+# prompt_eval_count, eval_duration, in nanoseconds) whenever a response has them.
+_generation_observer: Optional[Callable[[Dict[str, Any]], None]] = None
+
+
+def set_generation_observer(observer: Optional[Callable[[Dict[str, Any]], None]]) -> None:
+    global _generation_observer
+    _generation_observer = observer
+
+
+def _observe_generation(data: Dict[str, Any]) -> None:
+    if _generation_observer is not None and "prompt_eval_duration" in data:
+        _generation_observer(data)
+
+
+def _with_system(prompt: str, system: Optional[str]) -> str:
+    """For backends without a separate system prompt: put it in front of the prompt."""
+    return f"{system}\n{prompt}" if system else prompt
+
+
+def _parse_keep_alive(value: Union[str, int, None]) -> Union[str, int, None]:
+    """Ollama accepts either a duration string ("30m") or seconds (-1 = forever)."""
+    if value is None or isinstance(value, int):
+        return value
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+
+# ------------------------------------------------------------
+# Backends
+# ------------------------------------------------------------
+class LLMBackend:
+    """Base class for anything that can turn a prompt into model output.
+
+    `system` is the static instruction block. Keeping it separate from the
+    per-request prompt lets backends that support it reuse the processed
+    prefix across calls.
+    """
+
+    name = "base"
+
+    def generate(self, prompt: str, model: str = DEFAULT_MODEL, system: Optional[str] = None) -> str:
+        raise NotImplementedError
+
+    async def agenerate(self, prompt: str, model: str = DEFAULT_MODEL, system: Optional[str] = None) -> str:
+        """Async variant. Defaults to running `generate` on the bounded thread pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_executor, self.generate, prompt, model, system)
+
+    async def astream(self, prompt: str, model: str = DEFAULT_MODEL, system: Optional[str] = None) -> AsyncIterator[str]:
+        """Yield output as it is generated. Closing the iterator early stops generation.
+
+        Backends without native streaming yield the whole answer once.
+        """
+        yield await self.agenerate(prompt, model, system)
+
+    async def warm_up(self, prompt: str, model: str = DEFAULT_MODEL, system: Optional[str] = None) -> None:
+        """Load the model (and, where supported, the processed system prompt) before real traffic."""
+        await self.agenerate(prompt, model, system)
+
+    def close(self) -> None:
+        pass
+
+    async def aclose(self) -> None:
+        self.close()
+
+
+class SubprocessBackend(LLMBackend):
+    """Runs `ollama run <model>` once per prompt (the original behaviour)."""
+
+    name = "subprocess"
+
+    def __init__(self, command: str = "ollama", timeout: float = LLM_TIMEOUT):
+        self.command = command
+        self.timeout = timeout
+
+    def generate(self, prompt: str, model: str = DEFAULT_MODEL, system: Optional[str] = None) -> str:
+        result = subprocess.run(
+            [self.command, "run", model],
+            input=_with_system(prompt, system).encode("utf-8"),
+            capture_output=True,
+            check=True,
+            timeout=self.timeout
+        )
+        return result.stdout.decode("utf-8").strip()
+
+    async def agenerate(self, prompt: str, model: str = DEFAULT_MODEL, system: Optional[str] = None) -> str:
+        process = await asyncio.create_subprocess_exec(
+            self.command, "run", model,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(
+                process.communicate(_with_system(prompt, system).encode("utf-8")), timeout=self.timeout
+            )
+        except BaseException:
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+            raise
+        if process.returncode != 0:
+            raise subprocess.CalledProcessError(process.returncode, [self.command, "run", model], stdout, stderr)
+        return stdout.decode("utf-8").strip()
+
+    async def astream(self, prompt: str, model: str = DEFAULT_MODEL, system: Optional[str] = None) -> AsyncIterator[str]:
+        process = await asyncio.create_subprocess_exec(
+            self.command, "run", model,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL
+        )
+        try:
+            process.stdin.write(_with_system(prompt, system).encode("utf-8"))
+            await process.stdin.drain()
+            process.stdin.close()
+            while True:
+                chunk = await asyncio.wait_for(process.stdout.read(256), timeout=self.timeout)
+                if not chunk:
+                    break
+                yield chunk.decode("utf-8", errors="ignore")
+        finally:
+            # Reached on early close too: stop the model instead of letting it finish.
+            if process.returncode is None:
+                process.kill()
+            await process.wait()
+
+
+class OllamaHTTPBackend(LLMBackend):
+    """Talks to the Ollama server API over a pooled, long-lived HTTP client.
+
+    `keep_alive` is forwarded with every request so the model stays resident
+    between calls. The system prompt goes in Ollama's `system` field, so every
+    request starts with the same tokens and the server can reuse the cached
+    prefix instead of evaluating it again. If the server cannot be reached and
+    a `fallback` backend is given, the prompt is handed to it instead. Other
+    errors, read timeouts included, are raised: re-running a generation that
+    a live but busy server could not finish would only add to its load.
+    """
+
+    name = "http"
+
+    def __init__(
+        self,
+        base_url: str = OLLAMA_HOST,
+        keep_alive: Union[str, int, None] = OLLAMA_KEEP_ALIVE,
+        timeout: float = LLM_TIMEOUT,
+        max_connections: int = LLM_MAX_CONNECTIONS,
+        fallback: Optional[LLMBackend] = None
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.keep_alive = _parse_keep_alive(keep_alive)
+        self.fallback = fallback
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections
+        )
+        self._timeout = timeout
+        self._client = httpx.Client(base_url=self.base_url, timeout=timeout, limits=self._limits)
+        # httpx.AsyncClient is bound to the loop it was first used on.
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._async_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_async_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_loop is not loop:
+            self._async_client = httpx.AsyncClient(
+                base_url=self.base_url, timeout=self._timeout, limits=self._limits
+            )
+            self._async_loop = loop
+        return self._async_client
+
+    def _payload(self, prompt: str, model: str, stream: bool = False, system: Optional[str] = None,
+                 options: Optional[Dict[str, Any]] = None) -> dict:
+        payload = {"model": model, "prompt": prompt, "stream": stream}
+        if system:
+            payload["system"] = system
+        if options:
+            payload["options"] = options
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive
+        return payload
+
+    def _answer(self, response: httpx.Response) -> str:
+        response.raise_for_status()
+        data = response.json()
+        _observe_generation(data)
+        return data.get("response", "").strip()
+
+    def generate(self, prompt: str, model: str = DEFAULT_MODEL, system: Optional[str] = None) -> str:
+        try:
+            response = self._client.post("/api/generate", json=self._payload(prompt, model, system=system))
+        except httpx.ConnectError:
+            if self.fallback is None:
+                raise
+            return self.fallback.generate(prompt, model, system)
+        return self._answer(response)
+
+    async def agenerate(self, prompt: str, model: str = DEFAULT_MODEL, system: Optional[str] = None) -> str:
+        try:
+            response = await self._get_async_client().post(
+                "/api/generate", json=self._payload(prompt, model, system=system)
+            )
+        except httpx.ConnectError:
+            if self.fallback is None:
+                raise
+            return await self.fallback.agenerate(prompt, model, system)
+        return self._answer(response)
+
+    async def astream(self, prompt: str, model: str = DEFAULT_MODEL, system: Optional[str] = None) -> AsyncIterator[str]:
+        """Stream Ollama's NDJSON chunks. Closing early drops the connection, which stops generation."""
+        client = self._get_async_client()
+        payload = self._payload(prompt, model, stream=True, system=system)
+        try:
+            async with client.stream("POST", "/api/generate", json=payload) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    data = json.loads(line)
+                    if data.get("response"):
+                        yield data["response"]
+                    if data.get("done"):
+                        _observe_generation(data)
+                        break
+        except httpx.ConnectError:
+            # Nothing was generated yet, so the fallback can start from scratch.
+            if self.fallback is None:
+                raise
+            async for chunk in self.fallback.astream(prompt, model, system):
+                yield chunk
+
+    async def warm_up(self, prompt: str, model: str = DEFAULT_MODEL, system: Optional[str] = None) -> None:
+        """Load the model and evaluate the system prompt once, generating a single token."""
+        try:
+            response = await self._get_async_client().post(
+                "/api/generate", json=self._payload(prompt, model, system=system, options={"num_predict": 1})
+            )
+        except httpx.ConnectError:
+            if self.fallback is None:
+                raise
+            await self.fallback.warm_up(prompt, model, system)
+            return
+        self._answer(response)
+
+    def close(self) -> None:
+        self._client.close()
+        if self.fallback is not None:
+            self.fallback.close()
+
+    async def aclose(self) -> None:
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+        self.close()
+
+
+# ------------------------------------------------------------
+# Backend registry
+# ------------------------------------------------------------
+_backend: Optional[LLMBackend] = None
+_backend_lock = threading.Lock()
+
+
+def create_backend(kind: str = DEFAULT_BACKEND) -> LLMBackend:
+    """Build a backend by name: "http" (with subprocess fallback) or "subprocess"."""
+    if kind == "subprocess":
+        return SubprocessBackend()
+    if kind == "http":
+        return OllamaHTTPBackend(fallback=SubprocessBackend())
+    raise ValueError(f"Unknown LLM backend: {kind}")
+
+
+def get_backend() -> LLMBackend:
+    """Return the process-wide backend, creating it on first use."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_backend()
+    return _backend
+
+
+def set_backend(backend: Optional[LLMBackend]) -> None:
+    """Swap the process-wide backend (closing the previous one)."""
+    global _backend
+    with _backend_lock:
+        if _backend is not None and _backend is not backend:
+            _backend.close()
+        _backend = backend
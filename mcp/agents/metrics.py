@@ -0,0 +1,160 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+                   60.0, 120.0, 300.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def latency_buckets(longest: float) -> Tuple[float, ...]:
+    """DEFAULT_BUCKETS, plus one above `longest` (e.g. a timeout) if they stop short of it."""
+    if longest < DEFAULT_BUCKETS[-1]:
+        return DEFAULT_BUCKETS
+    return DEFAULT_BUCKETS + (longest * 2,)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(_label_key(labels), 0.0)
+
+    def total(self) -> float:
+        """Sum over every label combination."""
+        return sum(self._values.values())
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        lines += [f"{self.name}{_format_labels(key)} {value}" for key, value in sorted(self._values.items())]
+        return lines
+
+    def snapshot(self) -> Dict[str, float]:
+        return {_format_labels(key) or "total": value for key, value in sorted(self._values.items())}
+
+
+class Histogram:
+    """Fixed-bucket histogram; quantiles are estimated from bucket bounds."""
+
+    def __init__(self, name: str, help: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        # label key -> [bucket counts..., +Inf count], sum
+        self._series: Dict[LabelKey, Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+        # Called with (value, labels) after every observation.
+        self.listeners: List[Callable[[float, Dict[str, Any]], None]] = []
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            counts, total = self._series.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            total[0] += value
+        for listener in self.listeners:
+            listener(value, labels)
+
+    def _quantile(self, counts: List[int], q: float) -> float:
+        count = sum(counts)
+        if not count:
+            return 0.0
+        rank, seen = q * count, 0
+        for index, bucket_count in enumerate(counts):
+            seen += bucket_count
+            if seen >= rank:
+                return self.buckets[index] if index < len(self.buckets) else float("inf")
+        return float("inf")
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_format_labels(key, ('le', str(bound)))} {cumulative}")
+            cumulative += counts[-1]
+            lines.append(f"{self.name}_bucket{_format_labels(key, ('le', '+Inf'))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {total[0]}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {cumulative}")
+        return lines
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        summary = {}
+        for key, (counts, total) in sorted(self._series.items()):
+            count = sum(counts)
+            summary[_format_labels(key) or "total"] = {
+                "count": count,
+                "sum_seconds": round(total[0], 6),
+                "mean_seconds": round(total[0] / count, 6) if count else 0.0,
+                "p50_seconds": self._quantile(counts, 0.50),
+                "p95_seconds": self._quantile(counts, 0.95),
+                "p99_seconds": self._quantile(counts, 0.99),
+            }
+        return summary
+
+
+class MetricsRegistry:
+    """Counters, histograms and callback gauges, rendered as JSON or Prometheus text."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+        self._gauges: Dict[str, Tuple[str, Callable[[], float]]] = {}
+
+    def counter(self, name: str, help: str) -> Counter:
+        return self._metrics.setdefault(name, Counter(name, help))
+
+    def histogram(self, name: str, help: str, buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._metrics.setdefault(name, Histogram(name, help, buckets))
+
+    def gauge(self, name: str, help: str, read: Callable[[], float]) -> None:
+        """Register a gauge whose value is read when metrics are collected."""
+        self._gauges[name] = (help, read)
+
+    @contextmanager
+    def timer(self, histogram: Histogram, **labels: Any) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            histogram.observe(time.perf_counter() - started, **labels)
+
+    def render_prometheus(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines += metric.render()
+        for name, (help, read) in self._gauges.items():
+            lines += [f"# HELP {name} {help}", f"# TYPE {name} gauge", f"{name} {read()}"]
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict[str, Any]:
+        snapshot = {name: metric.snapshot() for name, metric in self._metrics.items()}
+        snapshot.update({name: read() for name, (_, read) in self._gauges.items()})
+        return snapshot
@@ -0,0 +1,205 @@
+import asyncio
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+MODES = ("cprofile", "sampling")
+
+Frame = Tuple[str, int, str]
+
+
+def _describe(frame: Frame) -> str:
+    filename, line, name = frame
+    return f"{os.path.basename(filename)}:{line}({name})"
+
+
+class StackSampler:
+    """Records one thread's stack every `interval` seconds from a background thread.
+
+    Unlike cProfile it adds nothing to the sampled thread's own calls, so it
+    is the safer choice under production load.
+    """
+
+    def __init__(self, thread_id: int, interval: float = 0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+                frame = frame.f_back
+            if stack:
+                self.stacks[tuple(reversed(stack))] += 1
+                self.samples += 1
+
+    def top(self, limit: int) -> List[Dict[str, Any]]:
+        """Functions by samples on top of the stack (self) and anywhere on it (inclusive)."""
+        own: Counter = Counter()
+        inclusive: Counter = Counter()
+        for stack, count in self.stacks.items():
+            own[stack[-1]] += count
+            for frame in set(stack):
+                inclusive[frame] += count
+        return [
+            {
+                "function": _describe(frame),
+                "self_samples": own[frame],
+                "inclusive_samples": inclusive[frame],
+                "self_percent": round(100.0 * own[frame] / self.samples, 2)
+            }
+            for frame, _ in own.most_common(limit)
+        ]
+
+    def collapsed(self) -> str:
+        """Brendan Gregg's collapsed-stack format, for flamegraph.pl or speedscope."""
+        return "".join(
+            ";".join(_describe(frame) for frame in stack) + f" {count}\n"
+            for stack, count in self.stacks.most_common()
+        )
+
+
+class Profiler:
+    """One on-demand profiling session at a time: cProfile or stack sampling.
+
+    A session ends after `seconds`, after `requests` calls to `request_done()`,
+    or on `stop()`, whichever comes first. Start it from the thread that runs
+    the event loop: cProfile only sees the thread that enabled it. With
+    `save`, the pstats dump or collapsed stacks are written to `output_dir`.
+    When no session is running the only cost to callers is checking `active`.
+    """
+
+    def __init__(self, output_dir: str, clock: Callable[[], float] = time.monotonic):
+        self.output_dir = output_dir
+        self.active = False
+        self.last_report: Optional[Dict[str, Any]] = None
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._session: Dict[str, Any] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def start(self, mode: str = "cprofile", seconds: Optional[float] = None, requests: Optional[int] = None,
+              top: int = 20, sort: str = "cumulative", save: bool = False, interval: float = 0.005) -> Dict[str, Any]:
+        if mode not in MODES:
+            raise ValueError(f"Unknown profiling mode: {mode!r} (expected one of {', '.join(MODES)})")
+        if sort not in pstats.Stats.sort_arg_dict_default:
+            raise ValueError(f"Unknown sort key: {sort!r}")
+        with self._lock:
+            if self.active:
+                raise RuntimeError("A profiling session is already running")
+            if mode == "cprofile":
+                profile = cProfile.Profile()
+                profile.enable()
+            else:
+                profile = StackSampler(threading.get_ident(), interval)
+                profile.start()
+            self._session = {
+                "mode": mode, "profile": profile, "top": top, "sort": sort, "save": save,
+                "started": self._clock(), "seconds": seconds, "requests_left": requests, "requests": 0
+            }
+            self.active = True
+        if seconds:
+            try:
+                self._timer = asyncio.get_running_loop().call_later(seconds, self.stop)
+            except RuntimeError:
+                pass  # no loop: the time limit is checked on the next request instead
+        return self.status()
+
+    def request_done(self) -> None:
+        """Count a finished request toward the session's limits."""
+        if not self.active:
+            return
+        session = self._session
+        session["requests"] += 1
+        if session["requests_left"] is not None:
+            session["requests_left"] -= 1
+        expired = session["seconds"] and self._clock() - session["started"] >= session["seconds"]
+        if session["requests_left"] == 0 or expired:
+            self.stop()
+
+    def stop(self) -> Optional[Dict[str, Any]]:
+        """End the running session and return its report (the previous one if none is running)."""
+        with self._lock:
+            if not self.active:
+                return self.last_report
+            self.active = False
+            session, self._session = self._session, {}
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            profile = session["profile"]
+            if session["mode"] == "cprofile":
+                profile.disable()
+            else:
+                profile.stop()
+
+        report = {
+            "mode": session["mode"],
+            "seconds": round(self._clock() - session["started"], 3),
+            "requests": session["requests"],
+        }
+        stats: Optional[pstats.Stats] = None
+        if session["mode"] == "cprofile":
+            stats = pstats.Stats(profile).sort_stats(session["sort"])
+            report["sort"] = session["sort"]
+            report["top"] = [
+                {
+                    "function": _describe(function),
+                    "calls": stats.stats[function][1],
+                    "total_seconds": round(stats.stats[function][2], 6),
+                    "cumulative_seconds": round(stats.stats[function][3], 6)
+                }
+                for function in stats.fcn_list[:session["top"]]
+            ]
+        else:
+            report["samples"] = profile.samples
+            report["top"] = profile.top(session["top"])
+        if session["save"]:
+            report["path"] = self._save(profile, stats)
+        self.last_report = report
+        return report
+
+    def _save(self, profile: Any, stats: Optional[pstats.Stats]) -> str:
+        os.makedirs(self.output_dir, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        if stats is not None:
+            path = os.path.join(self.output_dir, f"profile-{stamp}.pstats")
+            stats.dump_stats(path)
+        else:
+            path = os.path.join(self.output_dir, f"profile-{stamp}.collapsed")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(profile.collapsed())
+        return path
+
+    def status(self) -> Dict[str, Any]:
+        if not self.active:
+            return {"active": False, "last_report": self.last_report is not None}
+        session = self._session
+        return {
+            "active": True,
+            "mode": session["mode"],
+            "elapsed_seconds": round(self._clock() - session["started"], 3),
+            "seconds": session["seconds"],
+            "requests": session["requests"],
+            "requests_left": session["requests_left"]
+        }
@@ -0,0 +1,62 @@
+import json
+import math
+import os
+from typing import Any, Dict, Optional
+
+from keyword_matcher import KeywordMatcher
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config", "intent_rules.json")
+
+
+def load_rules(path: str = DEFAULT_RULES_PATH) -> Dict[str, Dict[str, float]]:
+    """Load {intent: {keyword or phrase: weight}} from a JSON file."""
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class RuleClassifier:
+    """Deterministic keyword/phrase scorer used ahead of the LLM.
+
+    Every (intent, term) pair is one rule of a shared KeywordMatcher, so a
+    message is scanned once for all intents. A message scores the summed
+    weight of the distinct terms it contains per intent. Confidence combines
+    how strong the winning evidence is (1 - e^-score) with how much of the
+    total evidence it holds, so a single weak word or a tie between intents
+    stays below the threshold and goes to the LLM.
+    """
+
+    def __init__(self, rules: Dict[str, Dict[str, float]]):
+        self.rules = rules
+        # Longest terms first so phrases win over the words they contain.
+        self._terms = sorted(
+            ((intent, term, weight) for intent, terms in rules.items() for term, weight in terms.items()),
+            key=lambda entry: len(entry[1]), reverse=True
+        )
+        self._matcher = KeywordMatcher([(intent, [term]) for intent, term, _ in self._terms])
+
+    def scores(self, message: str) -> Dict[str, float]:
+        scores = {intent: 0.0 for intent in self.rules}
+        for index in {index for index, _ in self._matcher.iter_matches(message)}:
+            intent, _, weight = self._terms[index]
+            scores[intent] += weight
+        return scores
+
+    def classify(self, message: str) -> Dict[str, Any]:
+        scores = self.scores(message)
+        total = sum(scores.values())
+        if total <= 0:
+            return {"intent": None, "confidence": 0.0, "reasoning": "No rule keywords matched", "all_scores": scores}
+
+        intent = max(scores, key=scores.get)
+        top = scores[intent]
+        confidence = (1 - math.exp(-top)) * (top / total)
+        return {
+            "intent": intent,
+            "confidence": round(confidence, 2),
+            "reasoning": f"Rule match for {intent} (score {top:.1f} of {total:.1f})",
+            "all_scores": scores
+        }
+
+
+def load_rule_classifier(path: Optional[str] = None) -> RuleClassifier:
+    return RuleClassifier(load_rules(path or os.getenv("INTENT_RULES_PATH", DEFAULT_RULES_PATH)))
@@ -0,0 +1,158 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class SessionRecord:
+    """What we remember about one conversation: its last intent and agent."""
+
+    __slots__ = ("intent", "route_to", "confidence", "turns", "updated_at")
+
+    def __init__(self, intent: str, route_to: str, confidence: float, turns: int, updated_at: float):
+        self.intent = intent
+        self.route_to = route_to
+        self.confidence = confidence
+        self.turns = turns
+        self.updated_at = updated_at
+
+    def to_row(self) -> list:
+        return [self.intent, self.route_to, self.confidence, self.turns, self.updated_at]
+
+
+class SessionStore:
+    """Bounded LRU of conversation records, expiring `ttl` seconds after the last turn.
+
+    With `path` set, records are loaded from that file at start and written
+    back (atomically, as compact JSON rows) by `save()`. `update()` never
+    writes; callers check `save_due()`, which turns true `save_interval`
+    seconds after the last save, and can split a save into `snapshot()`
+    under the lock and `write()` elsewhere, e.g. off the event loop.
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 1800.0, path: Optional[str] = None,
+                 save_interval: float = 5.0, clock: Callable[[], float] = time.time):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.path = path
+        self.save_interval = save_interval
+        self._clock = clock
+        self._sessions: "OrderedDict[str, SessionRecord]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._saved_at = clock()
+        # Snapshots are numbered so a slow write never replaces a newer one.
+        self._write_lock = threading.Lock()
+        self._snapshots = 0
+        self._written = 0
+        self.evictions = 0
+        self.expirations = 0
+        if path:
+            self.load()
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0
+
+    def _expired(self, record: SessionRecord, now: float) -> bool:
+        return self.ttl > 0 and now - record.updated_at >= self.ttl
+
+    def get(self, session_id: str) -> Optional[SessionRecord]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            record = self._sessions.get(session_id)
+            if record is None:
+                return None
+            if self._expired(record, self._clock()):
+                del self._sessions[session_id]
+                self.expirations += 1
+                self._dirty = True
+                return None
+            self._sessions.move_to_end(session_id)
+            return record
+
+    def update(self, session_id: str, intent: str, route_to: str, confidence: float) -> Optional[SessionRecord]:
+        """Record a turn routed to `route_to`; returns the updated record."""
+        if not self.enabled:
+            return None
+        now = self._clock()
+        with self._lock:
+            previous = self._sessions.get(session_id)
+            turns = previous.turns + 1 if previous is not None and not self._expired(previous, now) else 1
+            record = self._sessions[session_id] = SessionRecord(intent, route_to, confidence, turns, now)
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.maxsize:
+                self._sessions.popitem(last=False)
+                self.evictions += 1
+            self._dirty = True
+        return record
+
+    def save_due(self) -> bool:
+        return bool(self.path) and self._dirty and self._clock() - self._saved_at >= self.save_interval
+
+    def load(self) -> None:
+        if not self.path or not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            rows = json.load(f)
+        now = self._clock()
+        with self._lock:
+            # Rows are saved least recently used first, so eviction order survives a restart.
+            for session_id, row in rows.items():
+                record = SessionRecord(*row)
+                if not self._expired(record, now):
+                    self._sessions[session_id] = record
+            while len(self._sessions) > max(self.maxsize, 0):
+                self._sessions.popitem(last=False)
+
+    def snapshot(self) -> Optional[Tuple[int, Dict[str, list]]]:
+        """The rows to save, or None if nothing changed since the last snapshot."""
+        if not self.path:
+            return None
+        with self._lock:
+            if not self._dirty:
+                return None
+            self._dirty = False
+            self._saved_at = self._clock()
+            self._snapshots += 1
+            return self._snapshots, {session_id: record.to_row() for session_id, record in self._sessions.items()}
+
+    def write(self, snapshot: Tuple[int, Dict[str, list]]) -> None:
+        """Write a snapshot to `path`, unless a newer one is already there."""
+        number, rows = snapshot
+        with self._write_lock:
+            if number < self._written:
+                return
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(rows, f, separators=(",", ":"))
+            os.replace(tmp_path, self.path)
+            self._written = number
+
+    def save(self) -> None:
+        """Write the live records to `path` if anything changed since the last save."""
+        snapshot = self.snapshot()
+        if snapshot is not None:
+            self.write(snapshot)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._sessions.clear()
+            self._dirty = True
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "size": len(self._sessions),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "persistent": bool(self.path)
+            }
@@ -0,0 +1,50 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+
+class SingleFlight:
+    """Lets concurrent callers with the same key share one in-flight call.
+
+    The first caller for a key starts the call as a task; callers arriving
+    while it runs wait on the same task instead of starting their own.
+    A caller that gives up (cancelled, timed out) only stops waiting; the
+    call itself is cancelled once nobody is waiting for it. Every caller
+    gets its own shallow copy of a dict result, so one caller's changes do
+    not leak into another's.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.collapsed = 0
+        self._in_flight: Dict[str, Tuple[asyncio.Task, list]] = {}
+
+    async def do(self, key: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        entry = self._in_flight.get(key)
+        if entry is None:
+            task = asyncio.ensure_future(call())
+            entry = self._in_flight[key] = (task, [0])
+            task.add_done_callback(lambda _: self._forget(key, task))
+            self.calls += 1
+        else:
+            self.collapsed += 1
+
+        task, waiters = entry
+        waiters[0] += 1
+        try:
+            result = await asyncio.shield(task)
+        finally:
+            waiters[0] -= 1
+            if not waiters[0] and not task.done():
+                task.cancel()
+        return dict(result) if isinstance(result, dict) else result
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        entry = self._in_flight.get(key)
+        if entry is not None and entry[0] is task:
+            del self._in_flight[key]
+
+    def __len__(self) -> int:
+        return len(self._in_flight)
+
+    def stats(self) -> Dict[str, int]:
+        return {"calls": self.calls, "collapsed": self.collapsed, "in_flight": len(self)}
@@ -0,0 +1,76 @@
+import json
+import random
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+def route_of(result: Any) -> Optional[str]:
+    """The routing decision in a tool result: classify tools give route_to, dispatches routed_to."""
+    if not isinstance(result, dict):
+        return None
+    if "classification" in result:
+        return route_of(result["classification"])
+    return result.get("route_to") or result.get("routed_to")
+
+
+class TrafficRecorder:
+    """Appends one compact JSON line per tool call to `path`.
+
+    Each line holds the wall-clock start time, tool, message, session id, any
+    other non-default arguments, the result, its routing decision, total
+    milliseconds and milliseconds per stage. `sample_rate` records that
+    fraction of calls. Lines are written whole under a lock and flushed, so
+    several processes can append to the same file. They are written as calls
+    finish, so a slow call comes after later fast ones; sort by "ts" to get
+    the order they arrived in.
+    """
+
+    def __init__(self, path: str, sample_rate: float = 1.0, clock=time.time):
+        self.path = path
+        self.sample_rate = sample_rate
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+        self.recorded = 0
+        self.errors = 0
+
+    def sampled(self) -> bool:
+        return self.sample_rate >= 1.0 or random.random() < self.sample_rate
+
+    def record(self, tool: str, arguments: Dict[str, Any], result: Any, seconds: float,
+               stages: Dict[str, float], error: Optional[BaseException] = None,
+               started_at: Optional[float] = None) -> None:
+        """`started_at` is the call's wall-clock start; by default, `seconds` before now."""
+        if started_at is None:
+            started_at = self._clock() - seconds
+        arguments = {name: value for name, value in arguments.items() if value is not None}
+        entry = {
+            "ts": round(started_at, 6),
+            "tool": tool,
+            "message": arguments.pop("user_message", None),
+            "session_id": arguments.pop("session_id", None),
+        }
+        if arguments:
+            entry["args"] = arguments
+        if error is not None:
+            entry["error"] = f"{type(error).__name__}: {error}"
+        else:
+            entry["result"] = result
+            entry["route"] = route_of(result)
+        entry["ms"] = round(seconds * 1000, 3)
+        entry["stages"] = {stage: round(value * 1000, 3) for stage, value in stages.items()}
+        try:
+            line = json.dumps(entry, separators=(",", ":"), default=str) + "\n"
+            with self._lock:
+                self._file.write(line)
+                self._file.flush()
+                self.recorded += 1
+        except (OSError, ValueError):
+            # Recording must never fail the call it describes.
+            self.errors += 1
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
@@ -1,72 +1,254 @@
+"""Supervisor for the agent stack.
+
+Starts every agent in parallel, waits until each SSE endpoint answers a tool
+list, restarts agents that crash (with exponential backoff) and shuts all of
+them down cleanly on Ctrl+C / SIGTERM:
+
+    python start_all_agents.py
+"""
+import asyncio
+import json
+import os
+import signal
 import subprocess
 import sys
 import time
-import os
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+from fastmcp import Client
+
+REPO_ROOT = Path(__file__).resolve().parent
+LOG_DIR = Path(os.getenv("AGENT_LOG_DIR", REPO_ROOT / "logs"))
+STARTUP_TIMEOUT = float(os.getenv("AGENT_STARTUP_TIMEOUT", "30"))
+SHUTDOWN_TIMEOUT = float(os.getenv("AGENT_SHUTDOWN_TIMEOUT", "10"))
+RESTART_BACKOFF = float(os.getenv("AGENT_RESTART_BACKOFF", "1"))
+RESTART_BACKOFF_MAX = float(os.getenv("AGENT_RESTART_BACKOFF_MAX", "30"))
+# An agent that stays up this long gets its backoff reset.
+STABLE_AFTER = 60.0
+LOCAL_HOSTS = ("127.0.0.1", "localhost")
+# Agents get their own process group, so Ctrl+C in the terminal reaches only
+# the supervisor, which then stops them in order instead of racing restarts.
+if sys.platform.startswith("win"):
+    CHILD_PROCESS_GROUP = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+else:
+    CHILD_PROCESS_GROUP = {"start_new_session": True}
+
+
+@dataclass
+class AgentSpec:
+    script: str
+    port: int
+    description: str
+    env: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/sse"
+
+
+def load_agents(config_path: Optional[str] = None) -> List[AgentSpec]:
+    """The intent agent plus one process per local replica in config/agents.json.
+
+    Replicas on other hosts are listed for the router but not started here.
+    """
+    config_path = config_path or os.getenv("AGENTS_CONFIG_PATH", REPO_ROOT / "mcp/agents/config/agents.json")
+    with open(config_path, "r", encoding="utf-8") as f:
+        config = json.load(f)
+
+    agents = [AgentSpec("mcp/agents/intent_agent.py", 8000, "Intent Agent (Main Router)")]
+    for agent in config.values():
+        replicas = [urlparse(url) for url in agent["replicas"]]
+        local = [url for url in replicas if url.hostname in LOCAL_HOSTS]
+        for number, url in enumerate(local, start=1):
+            description = agent["description"] + (f" #{number}" if len(local) > 1 else "")
+            agents.append(AgentSpec(f"mcp/agents/{agent['module']}.py", url.port, description,
+                                    {"AGENT_PORT": str(url.port)}))
+    return agents
+
+
+async def wait_until_ready(url: str, timeout: float, process: Optional[asyncio.subprocess.Process] = None) -> None:
+    """Poll until the SSE endpoint lists its tools; fail early if the process exits."""
+    deadline = time.monotonic() + timeout
+    while True:
+        if process is not None and process.returncode is not None:
+            raise RuntimeError(f"process exited with code {process.returncode}")
+        try:
+            async with Client(url) as client:
+                await client.list_tools()
+                return
+        except Exception:
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"{url} did not become ready within {timeout}s")
+            await asyncio.sleep(0.1)
+
+
+@dataclass
+class AgentProcess:
+    """One supervised agent: its process, readiness and restart history."""
+
+    spec: AgentSpec
+    process: Optional[asyncio.subprocess.Process] = None
+    ready: asyncio.Event = field(default_factory=asyncio.Event)
+    startup_seconds: Optional[float] = None
+    restarts: int = 0
+    error: Optional[str] = None
+
+    async def start(self) -> None:
+        self.ready.clear()
+        LOG_DIR.mkdir(parents=True, exist_ok=True)
+        log = open(LOG_DIR / f"{Path(self.spec.script).stem}_{self.spec.port}.log", "ab")
+        started = time.perf_counter()
+        try:
+            self.process = await asyncio.create_subprocess_exec(
+                sys.executable, str(REPO_ROOT / self.spec.script),
+                cwd=str(REPO_ROOT), env={**os.environ, **self.spec.env},
+                stdout=log, stderr=asyncio.subprocess.STDOUT, **CHILD_PROCESS_GROUP,
+            )
+        finally:
+            log.close()  # the child keeps its own handle
+        try:
+            await wait_until_ready(self.spec.url, STARTUP_TIMEOUT, self.process)
+        except RuntimeError as e:
+            self.error = str(e)
+            raise
+        self.startup_seconds = time.perf_counter() - started
+        self.error = None
+        self.ready.set()
+
+    async def stop(self) -> None:
+        process = self.process
+        if process is None or process.returncode is not None:
+            return
+        process.terminate()
+        try:
+            await asyncio.wait_for(process.wait(), SHUTDOWN_TIMEOUT)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+
+
+class Supervisor:
+    """Runs the agents, restarts crashed ones with backoff, stops them all on request."""
+
+    def __init__(self, agents: List[AgentSpec]):
+        self.agents = [AgentProcess(spec) for spec in agents]
+        self._stopping = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+
+    async def _supervise(self, agent: AgentProcess) -> None:
+        backoff = RESTART_BACKOFF
+        while not self._stopping.is_set():
+            try:
+                await agent.start()
+                print(f"✅ {agent.spec.description} ready on port {agent.spec.port} "
+                      f"in {agent.startup_seconds:.2f}s")
+            except RuntimeError as e:
+                if self._stopping.is_set():
+                    return
+                print(f"❌ {agent.spec.description} failed to start: {e}")
+                await agent.stop()
+            else:
+                up_since = time.monotonic()
+                await agent.process.wait()
+                if self._stopping.is_set():
+                    return
+                print(f"⚠️  {agent.spec.description} exited with code {agent.process.returncode}")
+                if time.monotonic() - up_since > STABLE_AFTER:
+                    backoff = RESTART_BACKOFF
+
+            agent.ready.clear()
+            try:
+                await asyncio.wait_for(self._stopping.wait(), backoff)
+                return
+            except asyncio.TimeoutError:
+                pass
+            agent.restarts += 1
+            print(f"🔄 Restarting {agent.spec.description} (attempt {agent.restarts})")
+            backoff = min(backoff * 2, RESTART_BACKOFF_MAX)
+
+    async def start(self) -> Dict[str, Optional[float]]:
+        """Launch every agent at once and wait for the first readiness of each.
+
+        Returns per-agent startup seconds (None for agents that did not come up).
+        Returns early if a stop is requested meanwhile.
+        """
+        self._tasks = [asyncio.create_task(self._supervise(agent)) for agent in self.agents]
+
+        async def all_ready() -> None:
+            for agent in self.agents:
+                await agent.ready.wait()
+
+        waits = [asyncio.create_task(all_ready()), asyncio.create_task(self._stopping.wait())]
+        await asyncio.wait(waits, timeout=STARTUP_TIMEOUT + 1, return_when=asyncio.FIRST_COMPLETED)
+        for wait in waits:
+            wait.cancel()
+        return {agent.spec.description: agent.startup_seconds for agent in self.agents}
+
+    def request_stop(self) -> None:
+        """Stop restarting agents and cut start() short; safe to call from a signal handler."""
+        self._stopping.set()
+
+    async def stop(self) -> None:
+        self._stopping.set()
+        await asyncio.gather(*(agent.stop() for agent in self.agents))
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def status(self) -> List[Dict[str, object]]:
+        return [
+            {
+                "agent": agent.spec.description,
+                "port": agent.spec.port,
+                "ready": agent.ready.is_set(),
+                "pid": agent.process.pid if agent.process else None,
+                "startup_seconds": agent.startup_seconds,
+                "restarts": agent.restarts,
+                "error": agent.error,
+            }
+            for agent in self.agents
+        ]
+
+
+async def run() -> None:
+    agents = load_agents()
+    if os.getenv("AGENT_TRANSPORT", "sse") == "inprocess":
+        agents = agents[:1]  # the intent agent hosts the other agents itself
+    missing = [spec.script for spec in agents if not (REPO_ROOT / spec.script).exists()]
+    if missing:
+        print(f"❌ Missing agent files: {', '.join(missing)}")
+        return
+
+    supervisor = Supervisor(agents)
+    stop = asyncio.Event()
+
+    def request_stop() -> None:
+        stop.set()
+        supervisor.request_stop()
+
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(signum, request_stop)
+        except NotImplementedError:  # Windows
+            signal.signal(signum, lambda *_: loop.call_soon_threadsafe(request_stop))
 
-def start_agent(script_name, port, description):
-    try:
-        if sys.platform.startswith("win"):
-            cmd = f'start "Agent: {description}" python {script_name}'
-            subprocess.run(cmd, shell=True, check=True)
-        else:
-            cmd = f'nohup python {script_name} > {script_name}.log 2>&1 &'
-            subprocess.run(cmd, shell=True, check=True)
-        
-        print(f"✅ Started {description} on port {port}")
-        return True
-    except subprocess.CalledProcessError as e:
-        print(f"❌ Failed to start {description}: {e}")
-        return False
-
-def main():
-    """Main startup function."""
     print("🚀 Starting LLM-Based Agentic Chatbot System")
     print("=" * 50)
-    
-    # Define all agents
-    agents = [
-        ("mcp/agents/intent_agent.py", 8000, "Intent Agent (Main Router)"),
-        ("mcp/agents/working_support_agent.py", 8001, "Support Agent"),
-        ("mcp/agents/working_billing_agent.py", 8002, "Billing Agent"),
-        ("mcp/agents/working_general_agent.py", 8003, "General Info Agent"),
-        ("mcp/agents/working_human_agent.py", 8004, "Human Agent"),
-    ]
-    
-    # Check if all agent files exist
-    missing_files = []
-    for script_name, _, _ in agents:
-        if not Path(script_name).exists():
-            missing_files.append(script_name)
-    
-    if missing_files:
-        print(f"❌ Missing agent files: {', '.join(missing_files)}")
-        print("Please make sure all agent files are in the current directory.")
-        return
-    
-    print("📁 All agent files found. Starting agents...\n")
-    
-    # Start all agents
-    started_count = 0
-    for script_name, port, description in agents:
-        if start_agent(script_name, port, description):
-            started_count += 1
-        time.sleep(1)  # Small delay between starts
-    
-    print(f"\n🎯 Started {started_count}/{len(agents)} agents successfully!")
-    
-    if started_count == len(agents):
-        print("\n🚀 All agents are now running!")
-        print("\n📋 Next steps:")
-        print("1. Wait a few seconds for all agents to fully start")
-        print("2. Test the system:")
-        print("   • Run: python test_llm_system.py")
-        print("   • Or run: python demo_client.py")
-        print("\n🔧 To stop all agents, close their terminal windows")
-        print("   or use: taskkill /f /im python.exe (Windows)")
-    else:
-        print(f"\n⚠️  {len(agents) - started_count} agents failed to start.")
-        print("Please check the error messages above and try again.")
+    started = time.perf_counter()
+    startup = await supervisor.start()
+    if not stop.is_set():
+        ready = sum(seconds is not None for seconds in startup.values())
+        print(f"\n🎯 {ready}/{len(agents)} agents ready in {time.perf_counter() - started:.2f}s")
+        print(f"📄 Logs: {LOG_DIR}")
+        print("🔧 Press Ctrl+C to stop all agents")
+
+    await stop.wait()
+    print("\n🛑 Stopping agents...")
+    await supervisor.stop()
+    print("✅ All agents stopped")
+
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(run())
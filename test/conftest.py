@@ -0,0 +1,76 @@
+"""Fixtures shared by the intent-agent tests."""
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "mcp", "agents"))
+
+from llm_backends import LLMBackend, set_backend
+import intent_agent
+
+
+class CountingBackend(LLMBackend):
+    """Answers every prompt with the same output and counts the calls."""
+
+    name = "counting"
+
+    def __init__(self, response):
+        self.response = response
+        self.calls = 0
+
+    def generate(self, prompt, model="gemma:2b", system=None):
+        self.calls += 1
+        return self.response
+
+
+@pytest.fixture
+def engines(monkeypatch):
+    """Call with the cascade a test needs, e.g. engines("rules", "llm").
+
+    The engine list is restored afterwards, and the classification cache is
+    empty before and after the test.
+    """
+    intent_agent.classification_cache.clear()
+    yield lambda *names: monkeypatch.setattr(intent_agent, "INTENT_ENGINES", list(names))
+    intent_agent.classification_cache.clear()
+
+
+@pytest.fixture
+def llm_only(engines):
+    """Skip the cheap engines so every classification exercises the model path."""
+    engines("llm")
+
+
+@pytest.fixture
+def rules_only(engines):
+    """Answer from the rule engine alone; no model is needed."""
+    engines("rules")
+
+
+@pytest.fixture
+def counting_backend():
+    """Install a CountingBackend answering with `classification` (a dict, or raw text)."""
+    def install(classification={"intent": "Billing", "confidence": 0.9, "reasoning": "refund"}):
+        response = classification if isinstance(classification, str) else json.dumps(classification)
+        backend = CountingBackend(response)
+        set_backend(backend)
+        return backend
+
+    yield install
+    set_backend(None)
+
+
+def _response_data(response):
+    if hasattr(response, 'structured_content'):
+        return response.structured_content
+    elif hasattr(response, 'data'):
+        return response.data
+    return response
+
+
+@pytest.fixture
+def response_data():
+    """Unwrap a client.call_tool result into the tool's return value."""
+    return _response_data
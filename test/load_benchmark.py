@@ -0,0 +1,222 @@
+"""Concurrent load test for the whole agent stack against a deterministic stub LLM.
+
+Starts the stub LLM, the four working agents and the intent agent, drives
+the intent agent's tools over SSE with a configurable mix and concurrency,
+and prints throughput, latency percentiles and error rates as JSON:
+
+    python test/load_benchmark.py --concurrency 16 --requests 2000 \
+        --mix classify_user_intent=2,classify_and_route=1 --llm-delay 0.05 --output bench.json
+
+Use --no-start to benchmark a stack that is already running.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List
+
+from fastmcp import Client
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from stub_llm_server import start_stub_server
+
+# Windows asyncio fix
+if sys.platform.startswith("win"):
+    asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+AGENTS_DIR = os.path.join(REPO_ROOT, "mcp", "agents")
+
+STACK = [
+    ("working_support_agent.py", "http://127.0.0.1:8001/sse"),
+    ("working_billing_agent.py", "http://127.0.0.1:8002/sse"),
+    ("working_general_agent.py", "http://127.0.0.1:8003/sse"),
+    ("working_human_agent.py", "http://127.0.0.1:8004/sse"),
+    ("intent_agent.py", "http://127.0.0.1:8000/sse"),
+]
+
+DEFAULT_MESSAGES = [
+    "My app keeps crashing when I open it",
+    "Why was I charged for a subscription I canceled?",
+    "What are your business hours?",
+    "I have a legal question about your terms of service",
+    "The system is very slow and keeps giving me database errors",
+    "I need a refund for the charge that was made yesterday",
+    "Hello, I'm not sure who to ask about this",
+    "Something weird happened with my account",
+]
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100.0 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(samples: Dict[str, List[float]], errors: Dict[str, int]) -> Dict[str, Any]:
+    report = {}
+    for tool in sorted(set(samples) | set(errors)):
+        latencies = sorted(samples.get(tool, []))
+        count = len(latencies) + errors.get(tool, 0)
+        report[tool] = {
+            "count": count,
+            "errors": errors.get(tool, 0),
+            "error_rate": round(errors.get(tool, 0) / count, 4) if count else 0.0,
+            "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+            "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+            "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+        }
+    return report
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    weights = {}
+    for part in mix.split(","):
+        tool, _, weight = part.partition("=")
+        weights[tool.strip()] = float(weight or 1)
+    return weights
+
+
+def tool_arguments(tool: str, message: str, rng: random.Random, messages: List[str]) -> Dict[str, Any]:
+    if tool == "classify_user_intents":
+        return {"messages": rng.sample(messages, min(4, len(messages)))}
+    return {"user_message": message}
+
+
+def is_error(response: Any) -> bool:
+    data = getattr(response, "structured_content", None) or getattr(response, "data", None)
+    return isinstance(data, dict) and data.get("status") == "failed"
+
+
+async def wait_until_ready(url: str, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            async with Client(url) as client:
+                await client.list_tools()
+                return
+        except Exception:
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"{url} did not become ready within {timeout}s")
+            await asyncio.sleep(0.2)
+
+
+def stack_for_transport(transport: str) -> List[tuple]:
+    # In single-process mode the intent agent hosts the working agents itself.
+    return STACK[-1:] if transport == "inprocess" else STACK
+
+
+def start_stack(stub_url: str, engines: str, transport: str) -> List[subprocess.Popen]:
+    env = dict(os.environ, OLLAMA_HOST=stub_url, INTENT_LLM_BACKEND="http", INTENT_ENGINES=engines,
+               AGENT_TRANSPORT=transport)
+    return [
+        subprocess.Popen([sys.executable, script], cwd=AGENTS_DIR, env=env,
+                         stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        for script, _ in stack_for_transport(transport)
+    ]
+
+
+async def run_load(args, messages: List[str]) -> Dict[str, Any]:
+    weights = parse_mix(args.mix)
+    tools, tool_weights = list(weights), list(weights.values())
+    samples: Dict[str, List[float]] = {tool: [] for tool in tools}
+    errors: Dict[str, int] = {}
+    remaining = [args.requests]
+
+    async def worker(worker_id: int) -> None:
+        rng = random.Random(args.seed + worker_id)
+        async with Client(args.url) as client:
+            while remaining[0] > 0:
+                remaining[0] -= 1
+                tool = rng.choices(tools, tool_weights)[0]
+                arguments = tool_arguments(tool, rng.choice(messages), rng, messages)
+                started = time.perf_counter()
+                try:
+                    response = await client.call_tool(tool, arguments)
+                    failed = is_error(response)
+                except Exception:
+                    failed = True
+                elapsed = time.perf_counter() - started
+                if failed:
+                    errors[tool] = errors.get(tool, 0) + 1
+                else:
+                    samples[tool].append(elapsed)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(args.concurrency)))
+    duration = time.perf_counter() - started
+
+    total = sum(len(v) for v in samples.values()) + sum(errors.values())
+    return {
+        "config": {
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "mix": weights,
+            "llm_delay": args.llm_delay,
+            "engines": args.engines,
+            "transport": args.transport,
+        },
+        "duration_s": round(duration, 3),
+        "total_requests": total,
+        "throughput_rps": round(total / duration, 2) if duration else 0.0,
+        "error_rate": round(sum(errors.values()) / total, 4) if total else 0.0,
+        "tools": summarize(samples, errors),
+    }
+
+
+async def main(args) -> Dict[str, Any]:
+    messages = DEFAULT_MESSAGES
+    if args.messages:
+        with open(args.messages, "r", encoding="utf-8") as f:
+            messages = [line.strip() for line in f if line.strip()]
+
+    stub, processes = None, []
+    if not args.no_start:
+        stub, stub_url = start_stub_server(delay=args.llm_delay)
+        processes = start_stack(stub_url, args.engines, args.transport)
+    try:
+        await asyncio.gather(*(wait_until_ready(url, args.startup_timeout)
+                               for _, url in stack_for_transport(args.transport)))
+        return await run_load(args, messages)
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=10)
+        if stub is not None:
+            stub.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the agent stack")
+    parser.add_argument("--url", default="http://127.0.0.1:8000/sse", help="Intent agent SSE endpoint")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent client sessions")
+    parser.add_argument("--requests", type=int, default=500, help="Total tool calls to make")
+    parser.add_argument("--mix", default="classify_user_intent=1,route_conversation=1,classify_and_route=1",
+                        help="Comma separated tool=weight pairs")
+    parser.add_argument("--messages", default=None, help="File with one message per line")
+    parser.add_argument("--llm-delay", type=float, default=0.05, help="Stub LLM seconds per generation")
+    parser.add_argument("--engines", default="llm", help="INTENT_ENGINES for the intent agent")
+    parser.add_argument("--transport", default="sse", choices=["sse", "inprocess"],
+                        help="AGENT_TRANSPORT for the intent agent")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--startup-timeout", type=float, default=30.0)
+    parser.add_argument("--no-start", action="store_true", help="Use an already running stack")
+    parser.add_argument("--output", default=None, help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    report = asyncio.run(main(args))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
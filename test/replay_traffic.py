@@ -0,0 +1,198 @@
+"""Replay traffic captured by the intent agent's recorder against a running stack.
+
+Record with INTENT_RECORD_PATH=capture.jsonl on the intent agent, then play
+the capture back and diff routing and latency against the recording:
+
+    python test/replay_traffic.py capture.jsonl --speed 1 --concurrency 16 --output diff.json
+
+--speed 1 keeps the recorded gaps between calls, 2 plays twice as fast and
+max sends as fast as --concurrency allows. A plain JSONL of {"message": ...}
+lines also works; those calls go to classify_user_intent with no timing.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+from fastmcp import Client
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "mcp", "agents"))
+from load_benchmark import is_error, percentile
+from traffic_recorder import route_of
+
+# Windows asyncio fix
+if sys.platform.startswith("win"):
+    asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+
+MISMATCH_EXAMPLES = 20
+
+
+def load_capture(path: str, tools: Optional[List[str]] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Recorded calls in the order they started, skipping failed ones and tools not in `tools`.
+
+    Lines are written as calls finish, so the file itself is in completion order.
+    """
+    records = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            record.setdefault("tool", "classify_user_intent")
+            if "error" in record or (tools and record["tool"] not in tools):
+                continue
+            records.append(record)
+    records.sort(key=lambda record: record.get("ts", 0.0))
+    return records[:limit] if limit else records
+
+
+def schedule(records: List[Dict[str, Any]], speed: float) -> List[float]:
+    """Seconds after the start at which to send each record (all zero for max speed)."""
+    if not speed or not records or "ts" not in records[0]:
+        return [0.0] * len(records)
+    first = records[0]["ts"]
+    return [max(0.0, (record.get("ts", first) - first) / speed) for record in records]
+
+
+def tool_arguments(record: Dict[str, Any]) -> Dict[str, Any]:
+    arguments = dict(record.get("args", {}))
+    if record.get("message") is not None:
+        arguments["user_message"] = record["message"]
+    if record.get("session_id") is not None:
+        arguments["session_id"] = record["session_id"]
+    return arguments
+
+
+def result_data(response: Any) -> Any:
+    return getattr(response, "structured_content", None) or getattr(response, "data", None)
+
+
+async def replay(records: List[Dict[str, Any]], target: Any, speed: float = 1.0,
+                 concurrency: int = 8) -> List[Dict[str, Any]]:
+    """Send every record to `target` (URL or in-process server) on schedule.
+
+    At most `concurrency` calls are in flight, each on its own client
+    session; calls that fall behind schedule go out as soon as one frees up.
+    """
+    offsets = schedule(records, speed)
+    outcomes: List[Dict[str, Any]] = [{} for _ in records]
+    clients: asyncio.Queue = asyncio.Queue()
+    opened = []
+    try:
+        for _ in range(max(1, concurrency)):
+            client = Client(target)
+            await client.__aenter__()
+            opened.append(client)
+            clients.put_nowait(client)
+
+        started = time.perf_counter()
+
+        async def send(index: int) -> None:
+            delay = offsets[index] - (time.perf_counter() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            client = await clients.get()
+            record = records[index]
+            sent = time.perf_counter()
+            try:
+                response = await client.call_tool(record["tool"], tool_arguments(record))
+                outcome = {"route": route_of(result_data(response)), "error": is_error(response)}
+            except Exception as e:
+                outcome = {"route": None, "error": True, "detail": str(e)}
+            finally:
+                clients.put_nowait(client)
+            outcome["ms"] = round((time.perf_counter() - sent) * 1000, 3)
+            outcome["lag_ms"] = round(max(0.0, sent - started - offsets[index]) * 1000, 3)
+            outcomes[index] = outcome
+
+        await asyncio.gather(*(send(index) for index in range(len(records))))
+    finally:
+        for client in opened:
+            await client.__aexit__(None, None, None)
+    return outcomes
+
+
+def latency_summary(values: List[float]) -> Dict[str, float]:
+    values = sorted(values)
+    return {
+        "mean_ms": round(sum(values) / len(values), 2) if values else 0.0,
+        "p50_ms": round(percentile(values, 50), 2),
+        "p95_ms": round(percentile(values, 95), 2),
+        "p99_ms": round(percentile(values, 99), 2),
+    }
+
+
+def compare(records: List[Dict[str, Any]], outcomes: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Routing agreement and recorded-vs-replayed latency, per tool and overall."""
+    report: Dict[str, Any] = {"tools": {}}
+    mismatches = []
+    by_tool: Dict[str, List[int]] = {}
+    for index, record in enumerate(records):
+        by_tool.setdefault(record["tool"], []).append(index)
+        outcome = outcomes[index]
+        if "route" in record and not outcome.get("error") and outcome.get("route") != record["route"]:
+            mismatches.append({"message": record.get("message"), "session_id": record.get("session_id"),
+                               "recorded": record["route"], "replayed": outcome.get("route")})
+
+    for tool, indexes in sorted(by_tool.items()):
+        compared = [i for i in indexes if "route" in records[i] and not outcomes[i].get("error")]
+        agreed = sum(outcomes[i].get("route") == records[i]["route"] for i in compared)
+        recorded = [records[i]["ms"] for i in indexes if "ms" in records[i]]
+        replayed = [outcomes[i]["ms"] for i in indexes if not outcomes[i].get("error")]
+        summary = {
+            "count": len(indexes),
+            "errors": sum(bool(outcomes[i].get("error")) for i in indexes),
+            "route_agreement": round(agreed / len(compared), 4) if compared else None,
+            "recorded": latency_summary(recorded),
+            "replayed": latency_summary(replayed),
+        }
+        if recorded and replayed:
+            summary["p50_delta_ms"] = round(summary["replayed"]["p50_ms"] - summary["recorded"]["p50_ms"], 2)
+            summary["p95_delta_ms"] = round(summary["replayed"]["p95_ms"] - summary["recorded"]["p95_ms"], 2)
+        report["tools"][tool] = summary
+
+    report["total"] = len(records)
+    report["errors"] = sum(bool(outcome.get("error")) for outcome in outcomes)
+    report["route_mismatches"] = len(mismatches)
+    report["mismatch_examples"] = mismatches[:MISMATCH_EXAMPLES]
+    report["max_lag_ms"] = max((outcome.get("lag_ms", 0.0) for outcome in outcomes), default=0.0)
+    return report
+
+
+async def main(args) -> Dict[str, Any]:
+    tools = [tool.strip() for tool in args.tools.split(",")] if args.tools else None
+    records = load_capture(args.capture, tools, args.limit)
+    speed = 0.0 if args.speed == "max" else float(args.speed)
+    started = time.perf_counter()
+    outcomes = await replay(records, args.url, speed, args.concurrency)
+    duration = time.perf_counter() - started
+    report = compare(records, outcomes)
+    report["config"] = {"capture": args.capture, "url": args.url, "speed": args.speed,
+                        "concurrency": args.concurrency}
+    report["duration_s"] = round(duration, 3)
+    report["throughput_rps"] = round(len(records) / duration, 2) if duration else 0.0
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay recorded intent-agent traffic and diff the results")
+    parser.add_argument("capture", help="JSONL written by the recorder (INTENT_RECORD_PATH)")
+    parser.add_argument("--url", default="http://127.0.0.1:8000/sse", help="Intent agent SSE endpoint")
+    parser.add_argument("--speed", default="1", help="1 = recorded pace, 2 = twice as fast, max = no waiting")
+    parser.add_argument("--concurrency", type=int, default=8, help="Calls in flight at once")
+    parser.add_argument("--tools", default=None, help="Only replay these comma separated tools")
+    parser.add_argument("--limit", type=int, default=None, help="Replay at most this many calls")
+    parser.add_argument("--output", default=None, help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    report = asyncio.run(main(args))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
@@ -0,0 +1,177 @@
+"""Deterministic stand-in for the Ollama HTTP API.
+
+Answers POST /api/generate with a canned intent classification so the intent
+agent can be exercised without a real model. Run it directly to point a local
+stack at it:
+
+    python test/stub_llm_server.py --port 11434 --delay 0.2
+"""
+import argparse
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STUB_RULES = [
+    ("Human Transfer", ("legal", "lawyer", "complaint", "manager", "escalate")),
+    ("Billing", ("refund", "charge", "charged", "billing", "subscription", "payment")),
+    ("Support", ("crash", "error", "bug", "slow", "broken", "down")),
+    ("General Inquiry", ("hours", "what", "how", "when", "where")),
+]
+
+MESSAGE_PATTERN = re.compile(r'Message:\s*"(.*)"', re.DOTALL)
+NUMBERED_MESSAGE_PATTERN = re.compile(r'^\s*\d+\.\s*"(.*)"\s*$', re.MULTILINE)
+
+
+def stub_intent(message: str) -> dict:
+    message = message.lower()
+    for intent, keywords in STUB_RULES:
+        if any(word in message for word in keywords):
+            return {"intent": intent, "confidence": 0.9, "reasoning": "stub keyword match"}
+    return {"intent": "Human Transfer", "confidence": 0.4, "reasoning": "stub default"}
+
+
+def stub_classify(prompt: str):
+    """Classify the `Message: "..."` in the prompt, or every numbered message of a batch prompt."""
+    if "Messages:" in prompt:
+        return [stub_intent(message) for message in NUMBERED_MESSAGE_PATTERN.findall(prompt)]
+    match = MESSAGE_PATTERN.search(prompt)
+    return stub_intent(match.group(1) if match else prompt)
+
+
+def stub_timings(server, request: dict) -> dict:
+    """Ollama-style timing fields (nanoseconds), one whitespace token per word.
+
+    Like a real server, a system prompt identical to the previous request's
+    is treated as cached: only the prompt itself is evaluated again.
+    """
+    system = request.get("system") or ""
+    tokens = len(request.get("prompt", "").split())
+    if system != server.cached_system:
+        tokens += len(system.split())
+        server.cached_system = system
+    load_duration = 0 if server.model_loaded else 50_000_000
+    server.model_loaded = True
+    return {
+        "load_duration": load_duration,
+        "prompt_eval_count": tokens,
+        "prompt_eval_duration": tokens * 100_000,
+        "eval_count": 20,
+        "eval_duration": 2_000_000,
+    }
+
+
+def stub_answer(prompt: str, chatty: bool) -> str:
+    """The model's text. In chatty mode the JSON is wrapped the way Gemma tends to wrap it."""
+    answer = json.dumps(stub_classify(prompt), indent=2)
+    if not chatty:
+        return answer
+    return (
+        "Sure! Here is the classification you asked for:\n\n```json\n" + answer + "\n```\n\n"
+        + "The message was classified by looking at its keywords. " * 20
+    )
+
+
+class StubLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    delay = 0.0
+    chatty = False
+    chunk_delay = 0.0
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, body: dict) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._send_json(200, {"models": [{"name": "gemma:2b"}]})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        if self.path != "/api/generate":
+            self._send_json(404, {"error": "not found"})
+            return
+
+        if self.delay:
+            time.sleep(self.delay)
+
+        self.server.request_count += 1
+        self.server.last_request = request
+        answer = stub_answer(request.get("prompt", ""), self.chatty)
+        timings = stub_timings(self.server, request)
+        if request.get("stream", True):
+            self._stream(request.get("model"), answer, timings)
+            return
+        self._send_json(200, {
+            "model": request.get("model"),
+            "response": answer,
+            "done": True,
+            **timings
+        })
+
+    def _stream(self, model: str, answer: str, timings: dict) -> None:
+        """NDJSON chunks like Ollama's streaming mode; counts clients that hang up early."""
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        chunks = [answer[i:i + 8] for i in range(0, len(answer), 8)]
+        try:
+            for chunk in chunks:
+                self.wfile.write((json.dumps({"model": model, "response": chunk, "done": False}) + "\n").encode("utf-8"))
+                self.wfile.flush()
+                if self.chunk_delay:
+                    time.sleep(self.chunk_delay)
+            done = {"model": model, "response": "", "done": True, **timings}
+            self.wfile.write((json.dumps(done) + "\n").encode("utf-8"))
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            self.server.streams_cancelled += 1
+
+
+def start_stub_server(host: str = "127.0.0.1", port: int = 0, delay: float = 0.0,
+                      chatty: bool = False, chunk_delay: float = 0.0):
+    """Start the stub in a background thread. Returns (server, base_url)."""
+    handler = type("ConfiguredStubLLMHandler", (StubLLMHandler,), {
+        "delay": delay, "chatty": chatty, "chunk_delay": chunk_delay
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.request_count = 0
+    server.streams_cancelled = 0
+    server.last_request = None
+    server.cached_system = None
+    server.model_loaded = False
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stub Ollama server for testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--delay", type=float, default=0.0, help="Seconds to sleep per generation")
+    parser.add_argument("--chatty", action="store_true", help="Wrap the JSON in prose and code fences")
+    parser.add_argument("--chunk-delay", type=float, default=0.0, help="Seconds between streamed chunks")
+    args = parser.parse_args()
+
+    server, url = start_stub_server(args.host, args.port, args.delay, args.chatty, args.chunk_delay)
+    print(f"Stub LLM listening on {url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
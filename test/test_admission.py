@@ -0,0 +1,113 @@
+import asyncio
+import json
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "mcp", "agents"))
+
+from fastmcp import Client
+from admission import PRIORITIES, AdmissionController, Overloaded
+from llm_backends import LLMBackend, set_backend
+import intent_agent
+
+
+class SlowBackend(LLMBackend):
+    name = "slow"
+
+    def generate(self, prompt, model="gemma:2b", system=None):
+        time.sleep(0.2)
+        return json.dumps({"intent": "Support", "confidence": 0.9, "reasoning": "model"})
+
+
+def test_waiters_run_by_priority_and_overflow_is_shed():
+    order = []
+
+    async def job(controller, name, priority):
+        async with controller.slot(PRIORITIES[priority]):
+            order.append(name)
+            await asyncio.sleep(0.01)
+
+    async def scenario():
+        controller = AdmissionController(max_concurrency=1, max_queue=2)
+        running = asyncio.ensure_future(job(controller, "first", "normal"))
+        await asyncio.sleep(0)
+        queued = [asyncio.ensure_future(job(controller, name, priority))
+                  for name, priority in (("low", "low"), ("normal", "normal"))]
+        await asyncio.sleep(0)
+        # Queue is full: a high-priority newcomer displaces the low one, another low one is shed.
+        urgent = asyncio.ensure_future(job(controller, "high", "high"))
+        await asyncio.sleep(0)
+        try:
+            await job(controller, "late", "low")
+            assert False, "overflow was admitted"
+        except Overloaded:
+            pass
+        results = await asyncio.gather(running, urgent, *queued, return_exceptions=True)
+        return results, controller.stats()
+
+    results, stats = asyncio.run(scenario())
+    assert order == ["first", "high", "normal"]
+    assert isinstance(results[2], Overloaded)
+    assert stats["shed"] == 2 and stats["active"] == 0 and stats["queued"] == 0
+
+
+def test_cancelled_waiter_gives_up_its_place():
+    async def scenario():
+        controller = AdmissionController(max_concurrency=1, max_queue=4)
+        await controller.acquire()
+        waiter = asyncio.ensure_future(controller.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.sleep(0)
+        controller.release()
+        return controller.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["active"] == 0 and stats["queued"] == 0
+
+
+@pytest.fixture
+def run_burst(llm_only, monkeypatch):
+    """Run tool calls together against a slow model with one slot and no queue."""
+    def run(shed_mode, tool_calls):
+        monkeypatch.setattr(intent_agent, "llm_admission", AdmissionController(max_concurrency=1, max_queue=0))
+        monkeypatch.setattr(intent_agent, "SHED_MODE", shed_mode)
+
+        async def burst():
+            return await asyncio.gather(*(call() for call in tool_calls))
+
+        return asyncio.run(burst())
+
+    set_backend(SlowBackend())
+    yield run
+    set_backend(None)
+
+
+def test_burst_beyond_capacity_falls_back_to_rules(run_burst):
+    messages = ["my app keeps crashing", "I want a refund", "what are your business hours"]
+    results = run_burst("rules", [lambda m=m: intent_agent.aclassify_intent(m) for m in messages])
+    assert results[0]["engine"] == "llm"
+    assert [r["engine"] for r in results[1:]] == ["rules", "rules"]
+    assert [r["intent"] for r in results[1:]] == ["Billing", "General Inquiry"]
+    assert all(r["fallback"] for r in results[1:])
+
+
+def test_busy_error_mode_fails_routing_fast(run_burst, response_data):
+    async def call(client, tool, message):
+        return response_data(await client.call_tool(tool, {"user_message": message}))
+
+    async def tool_calls():
+        async with Client(intent_agent.mcp) as client:
+            return await asyncio.gather(call(client, "classify_user_intent", "my app keeps crashing"),
+                                        call(client, "classify_and_route", "I want a refund"))
+
+    results, = run_burst("error", [tool_calls])
+    assert results[0]["engine"] == "llm"
+    assert results[1]["status"] == "failed" and "busy" in results[1]["error"]
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
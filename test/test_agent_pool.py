@@ -0,0 +1,148 @@
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "mcp", "agents"))
+
+from fastmcp import FastMCP
+from agent_pool import AgentSessionPool, ReplicaSet
+
+slow_agent = FastMCP("slow_agent")
+_active = {"now": 0, "peak": 0}
+
+
+@slow_agent.tool()
+async def handle_request(user_message: str) -> str:
+    _active["now"] += 1
+    _active["peak"] = max(_active["peak"], _active["now"])
+    await asyncio.sleep(0.05)
+    _active["now"] -= 1
+    return f"echo: {user_message}"
+
+
+def test_pool_reuses_sessions():
+    async def scenario():
+        pool = AgentSessionPool(slow_agent, size=1, health_interval=0)
+        try:
+            for i in range(5):
+                response = await pool.call_tool("handle_request", {"user_message": str(i)})
+                assert response.data == f"echo: {i}"
+            return pool.stats()
+        finally:
+            await pool.close()
+
+    stats = asyncio.run(scenario())
+    assert stats["sessions"][0]["connects"] == 1
+
+
+def test_pool_caps_concurrency_per_session():
+    _active["peak"] = 0
+
+    async def scenario():
+        pool = AgentSessionPool(slow_agent, size=1, max_concurrency=2, health_interval=0)
+        try:
+            await asyncio.gather(*(pool.call_tool("handle_request", {"user_message": "x"}) for _ in range(6)))
+        finally:
+            await pool.close()
+
+    asyncio.run(scenario())
+    assert _active["peak"] <= 2
+
+
+def test_pool_reconnects_dropped_session():
+    async def scenario():
+        pool = AgentSessionPool(slow_agent, size=1, health_interval=0)
+        try:
+            await pool.call_tool("handle_request", {"user_message": "first"})
+            await pool.sessions[0].reset()
+            response = await pool.call_tool("handle_request", {"user_message": "second"})
+            assert response.data == "echo: second"
+            return pool.stats()
+        finally:
+            await pool.close()
+
+    stats = asyncio.run(scenario())
+    assert stats["sessions"][0]["connects"] == 2
+
+
+def make_replica(name, delay=0.02):
+    replica = FastMCP(name)
+
+    @replica.tool()
+    async def handle_request(user_message: str) -> str:
+        await asyncio.sleep(delay)
+        return name
+
+    return replica
+
+
+def test_replica_set_spreads_load():
+    replicas = [make_replica("a"), make_replica("b")]
+
+    async def scenario():
+        replica_set = ReplicaSet(replicas, health_interval=0)
+        try:
+            responses = await asyncio.gather(*(
+                replica_set.call_tool("handle_request", {"user_message": "x"}) for _ in range(10)
+            ))
+            return [response.data for response in responses], replica_set.stats()
+        finally:
+            await replica_set.close()
+
+    served, stats = asyncio.run(scenario())
+    assert served.count("a") == served.count("b") == 5
+    assert all(replica["outstanding"] == 0 for replica in stats["replicas"])
+
+
+def test_failing_replica_is_ejected_and_calls_fail_over():
+    now = [0.0]
+    broken = "http://127.0.0.1:9/sse"  # nothing listens on the discard port
+
+    async def scenario():
+        replica_set = ReplicaSet([broken, make_replica("good")], balancing="round_robin", eject_after=2,
+                                 eject_seconds=5.0, clock=lambda: now[0], health_interval=0)
+        try:
+            served = [(await replica_set.call_tool("handle_request", {"user_message": "x"})).data
+                      for _ in range(6)]
+            ejected = replica_set.stats()
+            now[0] += 6.0
+            returned = replica_set.stats()
+            return served, ejected, returned
+        finally:
+            await replica_set.close()
+
+    served, ejected, returned = asyncio.run(scenario())
+    assert served == ["good"] * 6
+    bad = ejected["replicas"][0]
+    assert bad["ejected"] and bad["failures"] == 2 and bad["requests"] == 2
+    assert not returned["replicas"][0]["ejected"]
+
+
+def test_slow_replica_is_hedged():
+    async def scenario():
+        replica_set = ReplicaSet([make_replica("slow", delay=1.0), make_replica("fast", delay=0)], balancing="round_robin",
+                                 hedge_percentile=95, hedge_min_samples=5, health_interval=0)
+        replica_set._latencies.extend([0.1] * 5)  # recent history: calls take ~100 ms
+        try:
+            started = time.perf_counter()
+            served = [(await replica_set.call_tool("handle_request", {"user_message": "x"})).data
+                      for _ in range(4)]
+            return served, time.perf_counter() - started, replica_set.stats()
+        finally:
+            await replica_set.close()
+
+    served, elapsed, stats = asyncio.run(scenario())
+    assert served == ["fast"] * 4
+    assert elapsed < 0.8, f"slow replica was waited on ({elapsed:.2f}s)"
+    assert stats["hedges"] == stats["hedge_wins"] == 2
+
+
+if __name__ == "__main__":
+    test_pool_reuses_sessions()
+    test_pool_caps_concurrency_per_session()
+    test_pool_reconnects_dropped_session()
+    test_replica_set_spreads_load()
+    test_failing_replica_is_ejected_and_calls_fail_over()
+    test_slow_replica_is_hedged()
+    print("✅ Agent pool tests passed")
@@ -0,0 +1,92 @@
+import asyncio
+import json
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "mcp", "agents"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from llm_backends import LLMBackend, OllamaHTTPBackend, set_backend
+from stub_llm_server import start_stub_server
+import intent_agent
+
+MESSAGES = ["app crash", "refund please", "what are your hours", "legal issue", "bug report"]
+
+
+@pytest.fixture
+def run_batch(llm_only, monkeypatch):
+    """Classify a batch against the stub model; returns (results, model requests)."""
+    server, url = start_stub_server()
+    set_backend(OllamaHTTPBackend(base_url=url))
+
+    def run(messages, pack_size):
+        monkeypatch.setattr(intent_agent, "BATCH_PACK_SIZE", pack_size)
+        return asyncio.run(intent_agent.aclassify_intents(messages)), server.request_count
+
+    yield run
+    set_backend(None)
+    server.shutdown()
+
+
+def test_batch_results_keep_input_order(run_batch):
+    results, requests = run_batch(MESSAGES, pack_size=1)
+    assert [r["intent"] for r in results] == [
+        "Support", "Billing", "General Inquiry", "Human Transfer", "Support"
+    ]
+    assert requests == len(MESSAGES)
+
+
+def test_packed_prompts_cut_model_calls(run_batch):
+    results, requests = run_batch(MESSAGES, pack_size=4)
+    assert [r["intent"] for r in results] == [
+        "Support", "Billing", "General Inquiry", "Human Transfer", "Support"
+    ]
+    assert requests == 2  # one packed prompt of 4, one single prompt
+
+
+def test_bad_items_fail_alone(run_batch):
+    results, _ = run_batch(["refund please", None, "app crash"], pack_size=1)
+    assert results[0]["intent"] == "Billing"
+    assert isinstance(results[1], Exception)
+    assert results[2]["intent"] == "Support"
+
+
+class SlowBackend(LLMBackend):
+    """Takes the same time for a packed prompt as for a single message."""
+
+    name = "slow"
+
+    def generate(self, prompt, model="gemma:2b", system=None):
+        time.sleep(0.2)
+        answer = {"intent": "Support", "confidence": 0.9, "reasoning": "slow"}
+        if prompt.startswith("Messages:"):
+            return json.dumps([answer] * (len(prompt.splitlines()) - 1))
+        return json.dumps(answer)
+
+
+def test_packing_is_not_slower_than_single_calls(llm_only, monkeypatch):
+    """Packed prompts run side by side under the batch limit, like single calls."""
+    set_backend(SlowBackend())
+    monkeypatch.setattr(intent_agent, "BATCH_CONCURRENCY", 4)
+    messages = [f"odd thing number {number}" for number in range(8)]
+
+    def elapsed(pack_size):
+        monkeypatch.setattr(intent_agent, "BATCH_PACK_SIZE", pack_size)
+        intent_agent.classification_cache.clear()
+        started = time.perf_counter()
+        results = asyncio.run(intent_agent.aclassify_intents(messages))
+        assert all(result["intent"] == "Support" for result in results)
+        return time.perf_counter() - started
+
+    try:
+        single, packed = elapsed(1), elapsed(2)
+    finally:
+        set_backend(None)
+    assert packed < 0.3 < single  # 4 packed prompts at once, 8 single calls in two rounds
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,112 @@
+import csv
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "mcp", "agents"))
+
+import bulk_classify
+import intent_agent
+
+MESSAGES = [
+    "I need a refund for my subscription",
+    "My app keeps crashing",
+    "What are your business hours?",
+    "I want to speak to a manager about a legal complaint",
+]
+
+
+def write_jsonl(path, count):
+    with open(path, "w", encoding="utf-8") as f:
+        for number in range(count):
+            f.write(json.dumps({"ticket": f"t{number}", "body": MESSAGES[number % len(MESSAGES)]}) + "\n")
+
+
+def read_jsonl(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+@pytest.fixture(autouse=True)
+def worker_settings(rules_only, monkeypatch):
+    """init_worker resizes the engine for this process; undo that after each test."""
+    monkeypatch.setattr(intent_agent, "BATCH_CONCURRENCY", intent_agent.BATCH_CONCURRENCY)
+    monkeypatch.setattr(intent_agent.llm_admission, "max_concurrency", intent_agent.llm_admission.max_concurrency)
+    monkeypatch.setattr(intent_agent.llm_admission, "max_queue", intent_agent.llm_admission.max_queue)
+
+
+def test_results_come_out_in_input_order(tmp_path):
+    source, output = os.path.join(tmp_path, "in.jsonl"), os.path.join(tmp_path, "out.jsonl")
+    write_jsonl(source, 10)
+    summary = bulk_classify.run(source, output, text_field="body", id_field="ticket", processes=0,
+                                chunk_size=3, progress_interval=0)
+    results = read_jsonl(output)
+    assert summary["rows"] == 10 and summary["errors"] == 0
+    assert [result["id"] for result in results] == [f"t{number}" for number in range(10)]
+    assert [result["route_to"] for result in results[:4]] == [
+        "billing_agent", "support_agent", "general_agent", "human_agent"
+    ]
+
+
+def test_killed_job_resumes_from_its_checkpoint(tmp_path):
+    source, output = os.path.join(tmp_path, "in.jsonl"), os.path.join(tmp_path, "out.jsonl")
+    write_jsonl(source, 10)
+    bulk_classify.run(source, output, text_field="body", id_field="ticket", processes=0,
+                      chunk_size=2, progress_interval=0, limit=6)
+    with open(output, "a", encoding="utf-8") as f:
+        f.write('{"id": "t6", "intent": "half-writ')  # written after the checkpoint, then killed
+
+    summary = bulk_classify.run(source, output, text_field="body", id_field="ticket", processes=0,
+                                chunk_size=2, progress_interval=0)
+    assert summary["resumed_from"] == 6
+    assert [result["id"] for result in read_jsonl(output)] == [f"t{number}" for number in range(10)]
+
+
+def test_csv_through_worker_processes(tmp_path):
+    source, output = os.path.join(tmp_path, "in.csv"), os.path.join(tmp_path, "out.jsonl")
+    with open(source, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["message"])
+        writer.writeheader()
+        for number in range(40):
+            writer.writerow({"message": MESSAGES[number % len(MESSAGES)]})
+
+    summary = bulk_classify.run(source, output, processes=2, chunk_size=5, progress_interval=0)
+    results = read_jsonl(output)
+    assert summary["rows"] == 40
+    assert [result["id"] for result in results] == list(range(40))  # row numbers without an id column
+    assert results[5]["intent"] == "Support"
+
+
+def test_worker_admission_gets_its_share_and_does_not_shed():
+    executor = bulk_classify.InlineExecutor(3)
+    try:
+        assert intent_agent.BATCH_CONCURRENCY == 3
+        assert intent_agent.llm_admission.max_concurrency == 3
+        assert intent_agent.llm_admission.max_queue == sys.maxsize
+    finally:
+        executor.shutdown()
+
+
+def test_concurrency_is_split_across_processes(tmp_path, monkeypatch):
+    """A global --concurrency of 4 over 2 workers gives each 2 slots; 8 processes are capped at 4."""
+    created = []
+
+    class RecordingPool(ProcessPoolExecutor):
+        def __init__(self, processes, initializer, initargs):
+            created.append((processes, initargs))
+            super().__init__(processes, initializer=initializer, initargs=initargs)
+
+    monkeypatch.setattr(bulk_classify, "ProcessPoolExecutor", RecordingPool)
+    source, output = os.path.join(tmp_path, "in.jsonl"), os.path.join(tmp_path, "out.jsonl")
+    write_jsonl(source, 4)
+    bulk_classify.run(source, output, text_field="body", processes=2, concurrency=4, progress_interval=0)
+    bulk_classify.run(source, output, text_field="body", processes=8, concurrency=4, progress_interval=0,
+                      restart=True)
+    assert created == [(2, (2,)), (4, (1,))]
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
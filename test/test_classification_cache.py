@@ -0,0 +1,65 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "mcp", "agents"))
+
+from classification_cache import ClassificationCache, normalize_message
+import intent_agent
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_normalize_message():
+    assert normalize_message("  My app keeps   CRASHING!! ") == "my app keeps crashing"
+    assert normalize_message("Refund, please.") == normalize_message("refund please")
+
+
+def test_lru_eviction_and_ttl():
+    clock = FakeClock()
+    cache = ClassificationCache(maxsize=2, ttl=10, clock=clock)
+    cache.set("a", {"intent": "Support"})
+    cache.set("b", {"intent": "Billing"})
+    assert cache.get("a")["intent"] == "Support"  # "a" is now most recent
+    cache.set("c", {"intent": "General Inquiry"})  # evicts "b"
+    assert cache.get("b") is None
+    assert cache.stats()["evictions"] == 1
+
+    clock.now = 11
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert stats["expirations"] == 1
+    assert stats["hits"] == 1 and stats["misses"] == 2
+
+
+def test_cached_values_are_copies():
+    cache = ClassificationCache(maxsize=4, ttl=0)
+    cache.set("a", {"intent": "Support"})
+    cache.get("a")["route_to"] = "support_agent"
+    assert "route_to" not in cache.get("a")
+
+
+def test_classify_intent_hits_cache_for_near_duplicates(llm_only, counting_backend):
+    backend = counting_backend()
+    assert asyncio.run(intent_agent.aclassify_intent("Refund please!"))["intent"] == "Billing"
+    assert asyncio.run(intent_agent.aclassify_intent("refund   PLEASE"))["intent"] == "Billing"
+    assert backend.calls == 1
+
+
+def test_fallbacks_are_not_cached(llm_only, counting_backend):
+    backend = counting_backend("not json at all")
+    assert asyncio.run(intent_agent.aclassify_intent("hmm"))["fallback"] is True
+    asyncio.run(intent_agent.aclassify_intent("hmm"))
+    assert backend.calls == 2
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,119 @@
+import asyncio
+import multiprocessing
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "mcp", "agents"))
+
+from classification_store import ClassificationStore, store_version
+import intent_agent
+
+
+def test_entries_survive_reopen_until_the_version_changes():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "store.db")
+        version = store_version("gemma:2b", "prompt v1")
+        store = ClassificationStore(path, version)
+        store.set("i need a refund", {"intent": "Billing", "confidence": 0.9})
+        store.close()
+
+        reopened = ClassificationStore(path, version)
+        assert reopened.get("i need a refund") == {"intent": "Billing", "confidence": 0.9}
+        reopened.close()
+
+        changed = ClassificationStore(path, store_version("gemma:2b", "prompt v2"))
+        assert changed.get("i need a refund") is None
+        assert changed.invalidated == 1
+        changed.close()
+
+
+def test_store_is_bounded_and_expires():
+    now = [1000.0]
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ClassificationStore(os.path.join(tmp, "store.db"), "v", maxsize=2, ttl=60,
+                                    evict_every=1, clock=lambda: now[0])
+        for index, key in enumerate(["a", "b", "c"]):
+            now[0] += 1
+            store.set(key, {"intent": "Support", "n": index})
+        assert len(store) == 2
+        assert store.get("a") is None  # oldest entry evicted
+        assert store.get("c")["n"] == 2
+
+        now[0] += 60
+        assert store.get("c") is None
+        assert store.stats()["evictions"] == 1
+        store.close()
+
+
+def test_locked_store_drops_writes_quickly():
+    """A write lock held by another worker costs a dropped write, not a long wait."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "store.db")
+        store = ClassificationStore(path, "v", busy_timeout=0.05)
+        store.set("refund", {"intent": "Billing"})
+        other = sqlite3.connect(path, isolation_level=None)
+        other.execute("BEGIN EXCLUSIVE")
+        try:
+            started = time.perf_counter()
+            store.set("crash", {"intent": "Support"})
+            assert time.perf_counter() - started < 1.0
+            assert store.errors == 1
+            assert store.get("refund") == {"intent": "Billing"}  # WAL readers do not wait for writers
+        finally:
+            other.execute("ROLLBACK")
+            other.close()
+        assert store.get("crash") is None
+        store.close()
+
+
+def _write_and_read(path, worker):
+    store = ClassificationStore(path, "v")
+    for index in range(50):
+        store.set(f"worker {worker} message {index}", {"intent": "Support", "worker": worker})
+    for index in range(50):
+        assert store.get(f"worker {worker} message {index}")["worker"] == worker
+    store.close()
+
+
+def test_workers_share_one_store():
+    """Several processes write and read the same file concurrently."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "store.db")
+        ClassificationStore(path, "v").close()
+        workers = [multiprocessing.Process(target=_write_and_read, args=(path, worker)) for worker in range(4)]
+        for process in workers:
+            process.start()
+        for process in workers:
+            process.join(30)
+        assert [process.exitcode for process in workers] == [0, 0, 0, 0]
+
+        store = ClassificationStore(path, "v")
+        assert len(store) == 200
+        assert store.get("worker 3 message 49")["worker"] == 3
+        store.close()
+
+
+def test_agent_answers_from_the_store_after_a_restart(llm_only, counting_backend, monkeypatch, tmp_path):
+    """A classification stored by one process is reused when the memory cache is cold."""
+    backend = counting_backend()
+    store = ClassificationStore(os.path.join(tmp_path, "store.db"), intent_agent.CLASSIFIER_VERSION)
+    monkeypatch.setattr(intent_agent, "classification_store", store)
+    try:
+        assert asyncio.run(intent_agent.aclassify_intent("Refund my last payment!"))["intent"] == "Billing"
+        intent_agent.classification_cache.clear()  # as if the process had restarted
+
+        result = asyncio.run(intent_agent.aclassify_intent("refund my last payment"))
+        assert result["intent"] == "Billing"
+        assert backend.calls == 1
+        assert store.stats()["hits"] == 1
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
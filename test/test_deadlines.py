@@ -0,0 +1,137 @@
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "mcp", "agents"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fastmcp import Client, FastMCP
+from circuit_breaker import CircuitBreaker
+from deadlines import DeadlineExceeded, deadline_scope, remaining, within_deadline
+from llm_backends import OllamaHTTPBackend, set_backend
+from stub_llm_server import start_stub_server
+import intent_agent
+
+stuck_agent = FastMCP("stuck_agent")
+
+
+@stuck_agent.tool()
+async def handle_request(user_message: str) -> str:
+    await asyncio.sleep(1.0)
+    return "too late"
+
+
+def test_deadline_scopes_nest_and_expire():
+    async def scenario():
+        assert remaining() is None
+        with deadline_scope(1000):
+            with deadline_scope(50):
+                assert remaining() <= 0.05
+                try:
+                    await within_deadline(asyncio.sleep(1))
+                    assert False, "deadline did not fire"
+                except DeadlineExceeded:
+                    pass
+            assert 0.5 < remaining() <= 1.0
+            try:
+                await within_deadline(asyncio.sleep(1), timeout=0.01)
+                assert False, "timeout did not fire"
+            except DeadlineExceeded:
+                assert False, "the call timeout expired, not the deadline"
+            except asyncio.TimeoutError:
+                pass
+
+    asyncio.run(scenario())
+
+
+def test_circuit_breaker_opens_and_half_opens():
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=5.0, clock=lambda: now[0])
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    now[0] = 5.0
+    assert breaker.allow() and breaker.state == "half_open"
+    assert not breaker.allow()  # one trial at a time
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    now[0] = 10.0
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
+    assert breaker.stats()["opened"] == 2
+
+
+def test_classification_deadline_returns_fallback(llm_only):
+    server, url = start_stub_server(delay=2.0)
+    set_backend(OllamaHTTPBackend(base_url=url))
+
+    async def scenario():
+        async with Client(intent_agent.mcp) as client:
+            response = await client.call_tool("classify_user_intent",
+                                              {"user_message": "My app crashed", "deadline_ms": 100})
+            return response.structured_content
+
+    try:
+        started = time.perf_counter()
+        result = asyncio.run(scenario())
+        assert time.perf_counter() - started < 1.0
+        assert result["engine"] == "deadline" and result["route_to"] == "human_agent"
+        assert len(intent_agent.classification_cache) == 0
+    finally:
+        set_backend(None)
+        server.shutdown()
+
+
+def route_to_stuck_agent(calls):
+    """Route `calls` (list of deadline_ms) to a billing agent that never answers in time."""
+    classification = {"intent": "Billing", "route_to": "billing_agent"}
+    original = intent_agent.AGENT_ENDPOINTS["billing_agent"]
+    settings = (intent_agent.AGENT_CALL_TIMEOUT, intent_agent.CIRCUIT_FAILURE_THRESHOLD)
+    intent_agent.AGENT_ENDPOINTS["billing_agent"] = stuck_agent
+    intent_agent.AGENT_CALL_TIMEOUT, intent_agent.CIRCUIT_FAILURE_THRESHOLD = 0.1, 2
+    intent_agent.circuit_breakers.clear()
+
+    async def scenario():
+        results = []
+        try:
+            for deadline_ms in calls:
+                started = time.perf_counter()
+                with intent_agent.request_deadline(deadline_ms):
+                    result = await intent_agent.dispatch_to_agent(classification["route_to"], "refund")
+                results.append((result, time.perf_counter() - started))
+        finally:
+            await intent_agent.agent_pools.close()
+        return results
+
+    try:
+        return asyncio.run(scenario()), intent_agent.circuit_breaker("billing_agent").stats()
+    finally:
+        intent_agent.AGENT_ENDPOINTS["billing_agent"] = original
+        intent_agent.AGENT_CALL_TIMEOUT, intent_agent.CIRCUIT_FAILURE_THRESHOLD = settings
+        intent_agent.circuit_breakers.clear()
+
+
+def test_slow_agent_times_out_then_fails_fast():
+    results, breaker = route_to_stuck_agent([None, None, None])
+    assert all(result["status"] == "failed" for result, _ in results)
+    assert all(elapsed < 0.5 for _, elapsed in results)
+    assert "circuit open" in results[2][0]["error"]
+    assert results[2][1] < 0.01
+    assert breaker["state"] == "open" and breaker["rejected"] == 1
+
+
+def test_caller_deadline_does_not_trip_breaker():
+    results, breaker = route_to_stuck_agent([20, 20, 20])
+    assert all("deadline exceeded" in result["error"] for result, _ in results)
+    assert breaker["state"] == "closed"
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,102 @@
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "mcp", "agents"))
+
+import numpy as np
+from embedding_index import DEFAULT_EXAMPLES_PATH, HashingEmbedder, load_embedding_index
+
+
+def test_index_is_built_and_memory_mapped():
+    with tempfile.TemporaryDirectory() as index_dir:
+        index = load_embedding_index(index_dir=index_dir)
+        assert isinstance(index.vectors, np.memmap)
+        with open(os.path.join(index_dir, "meta.json")) as f:
+            assert json.load(f)["embedder"] == HashingEmbedder().name
+
+
+def test_examples_classify_to_their_intent():
+    with tempfile.TemporaryDirectory() as index_dir:
+        index = load_embedding_index(index_dir=index_dir)
+        result = index.classify("the app keeps crashing when I open it")
+        assert result["intent"] == "Support"
+        assert result["engine"] == "embedding"
+        assert index.classify("I was billed twice this month!")["intent"] == "Billing"
+        assert index.classify("hello")["confidence"] < 0.5
+
+
+def test_index_rebuilds_when_embedder_changes():
+    with tempfile.TemporaryDirectory() as index_dir:
+        load_embedding_index(index_dir=index_dir)
+        meta_path = os.path.join(index_dir, "meta.json")
+        with open(meta_path) as f:
+            meta = json.load(f)
+        meta["embedder"] = "some-other-model"
+        with open(meta_path, "w") as f:
+            json.dump(meta, f)
+
+        load_embedding_index(index_dir=index_dir)
+        with open(meta_path) as f:
+            assert json.load(f)["embedder"] == HashingEmbedder().name
+
+
+def test_index_rebuilds_when_examples_change():
+    with tempfile.TemporaryDirectory() as tmp:
+        examples_path = os.path.join(tmp, "examples.json")
+        shutil.copy(DEFAULT_EXAMPLES_PATH, examples_path)
+        index_dir = os.path.join(tmp, "index")
+        rows = len(load_embedding_index(index_dir=index_dir, examples_path=examples_path).vectors)
+
+        with open(examples_path) as f:
+            examples = json.load(f)
+        examples["Billing"].append("my coupon code was not applied")
+        with open(examples_path, "w") as f:
+            json.dump(examples, f)
+
+        index = load_embedding_index(index_dir=index_dir, examples_path=examples_path)
+        assert len(index.vectors) == rows + 1
+        assert index.classify("my coupon code was not applied")["intent"] == "Billing"
+
+
+def _load_and_classify(index_dir, examples_path):
+    index = load_embedding_index(index_dir=index_dir, examples_path=examples_path)
+    assert len(index.vectors) == len(index.label_ids)
+    assert index.classify("the app keeps crashing when I open it")["intent"] == "Support"
+
+
+def test_workers_building_together_see_a_complete_index():
+    """Processes that import at the same time build once and never map a half-written file."""
+    with tempfile.TemporaryDirectory() as tmp:
+        index_dir = os.path.join(tmp, "index")
+        workers = [multiprocessing.Process(target=_load_and_classify, args=(index_dir, DEFAULT_EXAMPLES_PATH))
+                   for _ in range(4)]
+        for process in workers:
+            process.start()
+        for process in workers:
+            process.join(30)
+        assert [process.exitcode for process in workers] == [0, 0, 0, 0]
+        assert not [name for name in os.listdir(index_dir) if name.endswith(".tmp")]
+
+
+def test_classification_is_sub_millisecond():
+    with tempfile.TemporaryDirectory() as index_dir:
+        index = load_embedding_index(index_dir=index_dir)
+        started = time.perf_counter()
+        for _ in range(200):
+            index.classify("the export feature is broken again")
+        assert (time.perf_counter() - started) / 200 < 0.001
+
+
+if __name__ == "__main__":
+    test_index_is_built_and_memory_mapped()
+    test_examples_classify_to_their_intent()
+    test_index_rebuilds_when_embedder_changes()
+    test_index_rebuilds_when_examples_change()
+    test_workers_building_together_see_a_complete_index()
+    test_classification_is_sub_millisecond()
+    print("✅ Embedding index tests passed")
@@ -0,0 +1,69 @@
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "mcp", "agents"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from json_extract import IncrementalJSONExtractor, extract_first_json
+from llm_backends import OllamaHTTPBackend, set_backend
+from stub_llm_server import start_stub_server
+import intent_agent
+
+GEMMA_STYLE = """Sure! Here is the classification:
+
+```json
+{
+    "intent": "Support",
+    "confidence": 0.85,
+    "reasoning": "User says the app {crashes} and \\"freezes\\""
+}
+```
+
+Let me know if you need anything else."""
+
+
+def test_extracts_object_from_prose_and_fences():
+    result = extract_first_json(GEMMA_STYLE, required_keys=("intent",))
+    assert result["intent"] == "Support"
+    assert result["reasoning"] == 'User says the app {crashes} and "freezes"'
+
+
+def test_extracts_incrementally_one_character_at_a_time():
+    extractor = IncrementalJSONExtractor(required_keys=("intent",))
+    closing = GEMMA_STYLE.index("}\n```")
+    for position, char in enumerate(GEMMA_STYLE):
+        result = extractor.feed(char)
+        if result is not None:
+            break
+    assert position == closing
+    assert result["confidence"] == 0.85
+
+
+def test_skips_objects_without_required_keys():
+    text = 'Example: {"foo": 1}. Answer: {"intent": "Billing", "confidence": 0.7, "reasoning": "x",}'
+    assert extract_first_json(text, required_keys=("intent",))["intent"] == "Billing"
+    assert extract_first_json("no json here") is None
+
+
+def test_streaming_classification_stops_early(llm_only):
+    server, url = start_stub_server(chatty=True, chunk_delay=0.01)
+    set_backend(OllamaHTTPBackend(base_url=url))
+    try:
+        started = time.perf_counter()
+        result = asyncio.run(intent_agent.aclassify_intent("My app keeps crashing"))
+        elapsed = time.perf_counter() - started
+        assert result["intent"] == "Support"
+        assert not result.get("fallback")
+        # The chatty answer streams for well over a second; we only wait for the JSON.
+        assert elapsed < 1.0, f"generation was not cut short ({elapsed:.2f}s)"
+    finally:
+        set_backend(None)
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,69 @@
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "mcp", "agents"))
+
+from fastmcp import Client
+from keyword_matcher import KeywordMatcher, load_response_table
+import working_billing_agent
+import working_human_agent
+import working_support_agent
+
+
+def test_first_match_follows_rule_priority():
+    matcher = KeywordMatcher([("crash", ["crash*"]), ("error", ["error", "bug"])])
+    assert matcher.first_match("Got an error right after the crash") == 0
+    assert matcher.first_match("Found a bug") == 1
+    assert matcher.first_match("All good") is None
+
+
+def test_matches_whole_words_and_wildcards():
+    matcher = KeywordMatcher([("charge", ["charge"]), ("crash", ["crash*"])])
+    assert matcher.first_match("please recharge") is None
+    assert matcher.first_match("It CRASHED again") == 1
+
+
+def test_phrases_match():
+    table = load_response_table("human_agent")
+    assert "legal" in table.respond("Question about your Terms of Service")
+
+
+def test_large_rule_tables_compile():
+    rules = [(f"rule{i}", [f"keyword{i}", f"phrase number {i}"]) for i in range(5000)]
+    matcher = KeywordMatcher(rules)
+    assert matcher.first_match("this mentions phrase number 4321 only") == 4321
+
+
+def handle_request(agent, message):
+    """Call the agent's handle_request tool over the in-memory transport."""
+    async def call():
+        async with Client(agent.mcp) as client:
+            return (await client.call_tool("handle_request", {"user_message": message})).data
+
+    return asyncio.run(call())
+
+
+def test_working_agents_keep_their_replies():
+    assert "application crash" in handle_request(working_support_agent, "My app keeps crashing")
+    assert "performance issue" in handle_request(working_support_agent, "It is so slow")
+    assert "refund request" in handle_request(working_billing_agent, "I canceled, refund me")
+    assert "found the charge" in handle_request(working_billing_agent, "Why was I charged?")
+    assert "escalate" in handle_request(working_human_agent, "I want to speak to a manager")
+    assert handle_request(working_human_agent, "hi").startswith("Human Agent: Hello!")
+
+
+def test_billing_matches_every_form_of_cancel():
+    table = load_response_table("billing_agent")
+    for message in ["cancel it", "I canceled", "I cancelled", "I'm canceling", "cancelling now", "cancellation"]:
+        assert "refund request" in table.respond(message), message
+
+
+if __name__ == "__main__":
+    test_first_match_follows_rule_priority()
+    test_matches_whole_words_and_wildcards()
+    test_phrases_match()
+    test_large_rule_tables_compile()
+    test_working_agents_keep_their_replies()
+    test_billing_matches_every_form_of_cancel()
+    print("✅ Keyword matcher tests passed")
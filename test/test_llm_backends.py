@@ -0,0 +1,113 @@
+import asyncio
+import json
+import os
+import sys
+import time
+
+import httpx
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "mcp", "agents"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from llm_backends import LLMBackend, OllamaHTTPBackend, set_backend
+from stub_llm_server import start_stub_server
+import intent_agent
+
+
+class RecordingBackend(LLMBackend):
+    """Fallback that just remembers it was used."""
+
+    name = "recording"
+
+    def __init__(self):
+        self.calls = 0
+
+    def generate(self, prompt, model="gemma:2b", system=None):
+        self.calls += 1
+        return json.dumps({"intent": "Billing", "confidence": 0.8, "reasoning": "fallback"})
+
+
+def test_http_backend_reuses_pooled_client():
+    """The HTTP backend talks to the stub and forwards keep_alive."""
+    server, url = start_stub_server()
+    backend = OllamaHTTPBackend(base_url=url, keep_alive="10m")
+    try:
+        first = json.loads(backend.generate('Message: "My app keeps crashing"'))
+        second = json.loads(backend.generate('Message: "I need a refund"'))
+        assert first["intent"] == "Support"
+        assert second["intent"] == "Billing"
+        assert server.request_count == 2
+        assert server.last_request["keep_alive"] == "10m"
+        assert server.last_request["stream"] is False
+    finally:
+        backend.close()
+        server.shutdown()
+
+
+def test_http_backend_falls_back_when_server_is_down():
+    """Connection errors are handed to the fallback backend."""
+    fallback = RecordingBackend()
+    backend = OllamaHTTPBackend(base_url="http://127.0.0.1:9", fallback=fallback)
+    try:
+        assert json.loads(backend.generate("anything"))["intent"] == "Billing"
+        assert fallback.calls == 1
+    finally:
+        backend.close()
+
+
+def test_http_backend_does_not_fall_back_on_read_timeout():
+    """A slow but live server times out; the generation is not run again on the fallback."""
+    server, url = start_stub_server(delay=0.5)
+    fallback = RecordingBackend()
+    backend = OllamaHTTPBackend(base_url=url, timeout=0.1, fallback=fallback)
+    try:
+        try:
+            backend.generate("anything")
+        except httpx.ReadTimeout:
+            pass
+        else:
+            raise AssertionError("expected a read timeout")
+        assert fallback.calls == 0
+    finally:
+        backend.close()
+        server.shutdown()
+
+
+def test_classify_intent_uses_configured_backend(llm_only):
+    """aclassify_intent goes through the process-wide backend."""
+    server, url = start_stub_server()
+    set_backend(OllamaHTTPBackend(base_url=url))
+    try:
+        result = asyncio.run(intent_agent.aclassify_intent("Why was I charged twice?"))
+        assert result["intent"] == "Billing"
+    finally:
+        set_backend(None)
+        server.shutdown()
+
+
+def test_async_classification_requests_overlap(llm_only, monkeypatch):
+    """Concurrent aclassify_intent calls share the wall clock instead of queueing."""
+    server, url = start_stub_server(delay=0.3)
+    set_backend(OllamaHTTPBackend(base_url=url))
+    messages = ["app crash", "refund please", "what are your hours", "legal issue", "bug report"]
+    monkeypatch.setattr(intent_agent.llm_admission, "max_concurrency", len(messages))
+
+    async def run_burst():
+        return await asyncio.gather(*(intent_agent.aclassify_intent(m) for m in messages))
+
+    try:
+        started = time.perf_counter()
+        results = asyncio.run(run_burst())
+        elapsed = time.perf_counter() - started
+        assert [r["intent"] for r in results] == [
+            "Support", "Billing", "General Inquiry", "Human Transfer", "Support"
+        ]
+        assert elapsed < 0.3 * 3, f"requests did not overlap ({elapsed:.2f}s)"
+    finally:
+        set_backend(None)
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
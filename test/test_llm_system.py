@@ -43,6 +43,7 @@ async def test_llm_system():
                 
                 # Test intent classification
                 print("\n1. Testing Intent Classification...")
+                intent_data = None
                 try:
                     classification = await client.call_tool("classify_user_intent", {"user_message": test_case['message']})
                     
@@ -70,7 +71,11 @@ async def test_llm_system():
                 # Test conversation routing
                 print("\n2. Testing Conversation Routing...")
                 try:
-                    routing = await client.call_tool("route_conversation", {"user_message": test_case['message']})
+                    # Reuse the classification above so the model only runs once
+                    routing_args = {"user_message": test_case['message']}
+                    if intent_data:
+                        routing_args["classification"] = intent_data
+                    routing = await client.call_tool("route_conversation", routing_args)
                     
                     # Access the response data correctly
                     if hasattr(routing, 'structured_content'):
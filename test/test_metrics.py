@@ -0,0 +1,66 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "mcp", "agents"))
+
+from llm_backends import LLM_TIMEOUT
+from metrics import MetricsRegistry
+import intent_agent
+
+
+def test_histogram_buckets_and_prometheus_text():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("demo_seconds", "Demo", buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 5.0):
+        histogram.observe(value, stage="x")
+    registry.counter("demo_total", "Demo").inc(stage="x")
+    registry.gauge("demo_size", "Demo", lambda: 7)
+
+    text = registry.render_prometheus()
+    assert 'demo_seconds_bucket{stage="x",le="0.1"} 2' in text
+    assert 'demo_seconds_bucket{stage="x",le="+Inf"} 4' in text
+    assert 'demo_total{stage="x"} 1.0' in text
+    assert "demo_size 7" in text
+
+    summary = registry.snapshot()["demo_seconds"]['{stage="x"}']
+    assert summary["count"] == 4
+    assert summary["p50_seconds"] == 0.1
+
+
+def test_label_values_are_escaped():
+    registry = MetricsRegistry()
+    registry.counter("demo_total", "Demo").inc(agent='a\\b"c\nd')
+    assert 'demo_total{agent="a\\\\b\\"c\\nd"} 1.0' in registry.render_prometheus()
+
+
+def test_unknown_agents_share_one_series():
+    result = asyncio.run(intent_agent.dispatch_to_agent('evil"agent\n', "hi"))
+    assert "Unknown agent" in result["error"]
+    assert intent_agent.ROUTES.value(agent='evil"agent\n', status="unknown") == 0
+    assert intent_agent.ROUTES.value(agent="unknown", status="unknown") >= 1
+
+
+def test_calls_up_to_the_model_timeout_get_a_finite_quantile():
+    stage = "slow_test_stage"
+    intent_agent.observe_stage(stage, LLM_TIMEOUT + 1)
+    summary = intent_agent.metrics.snapshot()["intent_stage_seconds"][f'{{stage="{stage}"}}']
+    assert LLM_TIMEOUT < summary["p99_seconds"] < float("inf")
+
+
+def test_classification_stages_and_fallbacks_are_recorded(llm_only, counting_backend):
+    counting_backend("I am not sure what you mean.")
+    fallbacks = intent_agent.FALLBACKS.value()
+    result = asyncio.run(intent_agent.aclassify_intent("something odd"))
+    assert result["fallback"] is True
+    assert intent_agent.FALLBACKS.value() == fallbacks + 1
+
+    stages = intent_agent.metrics.snapshot()["intent_stage_seconds"]
+    for stage in ("prompt_build", "llm_call", "parse"):
+        assert stages[f'{{stage="{stage}"}}']["count"] >= 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,112 @@
+import asyncio
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "mcp", "agents"))
+
+from llm_backends import LLMBackend, set_backend
+import intent_agent
+
+
+class TieredBackend(LLMBackend):
+    """The small model is only sure about refunds and cannot format "garbled" answers."""
+
+    name = "tiered"
+
+    def __init__(self):
+        self.calls = []
+
+    def answer(self, message, model):
+        if model == "large":
+            return {"intent": "Support", "confidence": 0.95, "reasoning": "large model"}
+        if "refund" in message:
+            return {"intent": "Billing", "confidence": 0.9, "reasoning": "small model"}
+        return {"intent": "General Inquiry", "confidence": 0.3, "reasoning": "small model guess"}
+
+    def generate(self, prompt, model="gemma:2b", system=None):
+        self.calls.append(model)
+        if "garbled" in prompt and model == "small":
+            return "I am not sure what you mean."
+        if prompt.startswith("Messages:"):
+            return json.dumps([self.answer(line, model) for line in prompt.splitlines()[1:]])
+        return json.dumps(self.answer(prompt, model))
+
+
+@pytest.fixture
+def backend(llm_only, monkeypatch):
+    """Two model tiers, "small" then "large", answered by a TieredBackend."""
+    monkeypatch.setattr(intent_agent, "MODEL_TIERS", ["small", "large"])
+    backend = TieredBackend()
+    set_backend(backend)
+    yield backend
+    set_backend(None)
+
+
+def test_confident_small_model_answers(backend):
+    result = asyncio.run(intent_agent.aclassify_intent("I want a refund"))
+    assert (result["intent"], result["tier"], result["model"]) == ("Billing", 0, "small")
+    assert backend.calls == ["small"]
+
+
+def test_low_confidence_escalates(backend):
+    escalations = intent_agent.ESCALATIONS.value(model="small")
+    result = asyncio.run(intent_agent.aclassify_intent("Something odd happened with my thing"))
+    assert (result["intent"], result["tier"], result["model"]) == ("Support", 1, "large")
+    assert backend.calls == ["small", "large"]
+    assert intent_agent.ESCALATIONS.value(model="small") == escalations + 1
+    assert intent_agent.metrics.snapshot()["intent_escalation_rate"] > 0
+
+
+def test_unparsed_output_escalates(backend):
+    result = asyncio.run(intent_agent.aclassify_intent("garbled refund request"))
+    assert result["model"] == "large"
+    assert not result.get("fallback")
+    assert backend.calls == ["small", "large"]
+
+
+def test_packed_batch_escalates_only_unsure_items(backend, monkeypatch):
+    monkeypatch.setattr(intent_agent, "BATCH_PACK_SIZE", 2)
+    results = asyncio.run(intent_agent.aclassify_intents(["refund me please", "my widget is odd"]))
+    assert [(r["intent"], r["model"]) for r in results] == [("Billing", "small"), ("Support", "large")]
+    assert backend.calls == ["small", "large"]
+
+
+def test_shed_escalation_is_not_cached(backend, monkeypatch):
+    """An unsure small-model answer kept because the large tier was shed is not remembered."""
+    admitted = intent_agent.admitted
+    calls = []
+
+    async def shed_after_first(call, level):
+        calls.append(level)
+        if len(calls) > 1:
+            raise intent_agent.Overloaded("model queue is full")
+        return await admitted(call, level)
+
+    with monkeypatch.context() as patch:
+        patch.setattr(intent_agent, "admitted", shed_after_first)
+        result = asyncio.run(intent_agent.aclassify_intent("Something odd happened with my thing"))
+    assert (result["intent"], result["model"], result["fallback"]) == ("General Inquiry", "small", True)
+    assert len(intent_agent.classification_cache) == 0
+
+    result = asyncio.run(intent_agent.aclassify_intent("Something odd happened with my thing"))
+    assert result["model"] == "large"
+    assert backend.calls == ["small", "small", "large"]
+
+
+def test_batch_escalation_past_deadline_is_not_cached(backend, monkeypatch):
+    async def too_slow(*args, **kwargs):
+        raise intent_agent.DeadlineExceeded("deadline passed")
+
+    monkeypatch.setattr(intent_agent, "BATCH_PACK_SIZE", 2)
+    monkeypatch.setattr(intent_agent, "classify_with_tiers", too_slow)
+    results = asyncio.run(intent_agent.aclassify_intents(["refund me please", "my widget is odd"]))
+    assert (results[1]["model"], results[1]["fallback"]) == ("small", True)
+    assert intent_agent.classification_cache.get("my widget is odd") is None
+    assert intent_agent.classification_cache.get("refund me please")["intent"] == "Billing"
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
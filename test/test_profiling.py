@@ -0,0 +1,116 @@
+import asyncio
+import os
+import pstats
+import sys
+import tempfile
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "mcp", "agents"))
+
+from fastmcp import Client
+from profiling import Profiler
+import intent_agent
+
+
+@pytest.fixture
+def agent_profiler(rules_only):
+    """The intent agent's profiler, stopped after the test."""
+    yield intent_agent.profiler
+    intent_agent.profiler.stop()
+
+
+def test_cprofile_session_ends_after_n_requests(agent_profiler):
+    async def run():
+        async with Client(intent_agent.mcp) as client:
+            await client.call_tool("classify_user_intent", {"user_message": "hello"})  # first-call imports
+            started = await intent_agent.start_profiling(requests=2, top=200)
+            assert started["active"] and started["requests_left"] == 2
+            for message in ["I need a refund", "My app keeps crashing", "What are your hours?"]:
+                await client.call_tool("classify_user_intent", {"user_message": message})
+            return await intent_agent.get_profile_report()
+
+    report = asyncio.run(run())
+    assert report["active"] is False
+    assert report["mode"] == "cprofile" and report["requests"] == 2
+    functions = [entry["function"] for entry in report["top"]]
+    assert any("aclassify_in_session" in function for function in functions)
+    assert not agent_profiler.active
+
+
+def test_only_one_session_at_a_time(agent_profiler):
+    async def run():
+        first = await intent_agent.start_profiling(mode="sampling")
+        second = await intent_agent.start_profiling()
+        stopped = await intent_agent.stop_profiling()
+        return first, second, stopped
+
+    first, second, stopped = asyncio.run(run())
+    assert first["status"] == "success"
+    assert second["status"] == "failed"
+    assert stopped["mode"] == "sampling"
+    assert asyncio.run(intent_agent.start_profiling(mode="perf"))["status"] == "failed"
+
+
+def test_sampling_writes_collapsed_stacks():
+    def busy_loop(until):
+        while time.perf_counter() < until:
+            sum(range(1000))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        profiler = Profiler(tmp)
+        profiler.start(mode="sampling", save=True, interval=0.001)
+        busy_loop(time.perf_counter() + 0.2)
+        report = profiler.stop()
+
+        assert report["samples"] > 10
+        assert any("busy_loop" in entry["function"] for entry in report["top"])
+        with open(report["path"], "r", encoding="utf-8") as f:
+            line = f.readline()
+        assert ";" in line and line.rstrip().rsplit(" ", 1)[1].isdigit()
+
+
+def test_cprofile_dump_loads_with_pstats():
+    with tempfile.TemporaryDirectory() as tmp:
+        profiler = Profiler(tmp)
+        profiler.start(save=True, sort="tottime")
+        sorted(str(number) for number in range(10000))
+        report = profiler.stop()
+        assert report["path"].endswith(".pstats")
+        assert pstats.Stats(report["path"]).total_calls > 0
+
+
+def test_slow_requests_are_logged_with_stages(rules_only, monkeypatch):
+    monkeypatch.setattr(intent_agent, "SLOW_REQUEST_MS", 0.000001)  # every call counts as slow
+    intent_agent.slow_requests.clear()
+
+    async def run():
+        async with Client(intent_agent.mcp) as client:
+            await client.call_tool("classify_user_intent", {"user_message": "I need a refund", "session_id": "s9"})
+            monkeypatch.setattr(intent_agent, "SLOW_REQUEST_MESSAGES", True)
+            await client.call_tool("classify_user_intent", {"user_message": "My app crashed"})
+            return await intent_agent.get_slow_requests()
+
+    slow = asyncio.run(run())
+    assert slow["count"] == 2
+    with_message, entry = slow["requests"]
+    assert (entry["tool"], entry["session_id"]) == ("classify_user_intent", "s9")
+    assert "message" not in entry  # message text is left out unless asked for
+    assert with_message["message"] == "My app crashed"
+    assert "cheap_engines" in entry["stages"]
+    assert intent_agent.SLOW_REQUESTS.value(tool="classify_user_intent") >= 1
+
+
+def test_admin_tools_are_off_by_default():
+    async def run():
+        async with Client(intent_agent.mcp) as client:
+            return {tool.name for tool in await client.list_tools()}
+
+    tools = asyncio.run(run())
+    assert "classify_user_intent" in tools
+    assert not tools & {"start_profiling", "stop_profiling", "get_profile_report", "get_slow_requests"}
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
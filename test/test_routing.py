@@ -0,0 +1,66 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "mcp", "agents"))
+
+from fastmcp import Client
+import intent_agent
+import working_billing_agent
+
+
+@pytest.fixture
+def call(response_data):
+    """Call an intent-agent tool over the in-memory client."""
+    async def call_tool(tool, arguments):
+        try:
+            async with Client(intent_agent.mcp) as client:
+                return response_data(await client.call_tool(tool, arguments))
+        finally:
+            await intent_agent.agent_pools.close()
+
+    return lambda tool, arguments: asyncio.run(call_tool(tool, arguments))
+
+
+@pytest.fixture
+def billing_agent(llm_only, counting_backend, monkeypatch):
+    """An in-memory billing agent, a counting backend and an empty cache; returns the backend."""
+    monkeypatch.setitem(intent_agent.AGENT_ENDPOINTS, "billing_agent", working_billing_agent.mcp)
+    return counting_backend()
+
+
+def test_classify_and_route_uses_one_model_call(billing_agent, call):
+    result = call("classify_and_route", {"user_message": "I need a refund"})
+    assert billing_agent.calls == 1
+    assert result["status"] == "success"
+    assert result["routed_to"] == "billing_agent"
+    assert result["classification"]["route_to"] == "billing_agent"
+    assert "refund" in result["agent_response"]["result"]
+
+
+def test_route_conversation_reuses_client_classification(billing_agent, call):
+    classification = {"intent": "Billing", "confidence": 0.9, "route_to": "billing_agent"}
+    result = call("route_conversation", {"user_message": "charged twice", "classification": classification})
+    assert billing_agent.calls == 0
+    assert result["routed_to"] == "billing_agent"
+    assert result["status"] == "success"
+
+
+def test_inprocess_transport_reaches_every_agent(call, monkeypatch):
+    for agent_key, server in intent_agent.inprocess_endpoints().items():
+        monkeypatch.setitem(intent_agent.AGENT_ENDPOINTS, agent_key, server)
+
+    results = {}
+    for intent, (agent_key, _) in intent_agent.INTENT_ROUTES.items():
+        classification = {"intent": intent, "confidence": 0.9, "route_to": agent_key}
+        results[agent_key] = call("route_conversation", {"user_message": "hello", "classification": classification})
+    for agent_key, result in results.items():
+        assert result["status"] == "success", result
+        assert result["routed_to"] == agent_key
+        assert result["agent_response"]["result"]
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,52 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "mcp", "agents"))
+
+from rule_classifier import RuleClassifier, load_rule_classifier
+import intent_agent
+
+
+def test_default_rules_cover_demo_messages():
+    rules = load_rule_classifier()
+    expectations = {
+        "My app keeps crashing when I open it": "Support",
+        "Why was I charged for a subscription I canceled?": "Billing",
+        "What are your business hours?": "General Inquiry",
+        "I have a legal question about your terms of service": "Human Transfer",
+    }
+    for message, intent in expectations.items():
+        result = rules.classify(message)
+        assert result["intent"] == intent, message
+        assert result["confidence"] >= intent_agent.RULE_CONFIDENCE_THRESHOLD, message
+
+
+def test_keywords_match_whole_words_only():
+    rules = RuleClassifier({"Billing": {"charge": 2.0}})
+    assert rules.classify("please recharge my phone")["intent"] is None
+    assert rules.classify("Why this charge?")["intent"] == "Billing"
+
+
+def test_ambiguous_messages_are_not_confident():
+    rules = RuleClassifier({"Support": {"error": 2.0}, "Billing": {"invoice": 2.0}})
+    assert rules.classify("error on my invoice")["confidence"] < 0.6
+
+
+def test_cascade_only_calls_llm_when_rules_are_unsure(engines, counting_backend):
+    engines("rules", "llm")
+    backend = counting_backend({"intent": "General Inquiry", "confidence": 0.7, "reasoning": "llm"})
+    confident = asyncio.run(intent_agent.aclassify_intent("I want a refund, I was charged twice"))
+    assert confident["engine"] == "rules"
+    assert confident["intent"] == "Billing"
+    assert backend.calls == 0
+
+    unsure = asyncio.run(intent_agent.aclassify_intent("Hello there"))
+    assert unsure["engine"] == "llm"
+    assert backend.calls == 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
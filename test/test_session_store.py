@@ -0,0 +1,102 @@
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "mcp", "agents"))
+
+from session_store import SessionStore
+import intent_agent
+
+
+def test_store_is_bounded_and_expires():
+    now = [0.0]
+    store = SessionStore(maxsize=2, ttl=60, clock=lambda: now[0])
+    store.update("a", "Support", "support_agent", 0.9)
+    store.update("b", "Billing", "billing_agent", 0.8)
+    store.get("a")
+    store.update("c", "Support", "support_agent", 0.7)
+    assert store.get("b") is None and store.stats()["evictions"] == 1
+
+    assert store.update("a", "Support", "support_agent", 0.9).turns == 2
+    now[0] = 61.0
+    assert store.get("a") is None and store.get("c") is None
+    assert store.update("a", "Billing", "billing_agent", 0.9).turns == 1
+
+
+def test_store_persists_across_restarts():
+    now = [1000.0]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "sessions.json")
+        store = SessionStore(ttl=60, path=path, clock=lambda: now[0])
+        store.update("old", "Support", "support_agent", 0.9)
+        now[0] = 1050.0
+        store.update("new", "Billing", "billing_agent", 0.8)
+        store.save()
+
+        now[0] = 1070.0  # "old" is past its TTL by now
+        restored = SessionStore(ttl=60, path=path, clock=lambda: now[0])
+        assert restored.get("old") is None
+        record = restored.get("new")
+        assert (record.intent, record.route_to, record.turns) == ("Billing", "billing_agent", 1)
+
+
+def test_follow_ups_stick_until_the_topic_changes(engines, counting_backend):
+    engines("rules", "llm")
+    backend = counting_backend({"intent": "Billing", "confidence": 0.8, "reasoning": "account charge"})
+    intent_agent.session_store.clear()
+
+    async def conversation():
+        turns = ["something is off with my account", "it still happens", "My app keeps crashing"]
+        return [await intent_agent.aclassify_in_session(turn, "conv-1") for turn in turns]
+
+    try:
+        first, follow_up, new_topic = asyncio.run(conversation())
+        assert backend.calls == 1
+        assert (first["engine"], first["route_to"]) == ("llm", "billing_agent")
+        assert (follow_up["engine"], follow_up["route_to"]) == ("session", "billing_agent")
+        assert (new_topic["engine"], new_topic["route_to"]) == ("rules", "support_agent")
+        record = intent_agent.session_store.get("conv-1")
+        assert (record.intent, record.turns) == ("Support", 3)
+
+        # Without a session the same follow-up needs the model.
+        asyncio.run(intent_agent.aclassify_in_session("it still happens"))
+        assert backend.calls == 2
+    finally:
+        intent_agent.session_store.clear()
+
+
+def test_periodic_save_runs_off_the_event_loop(rules_only, monkeypatch, tmp_path):
+    """update() never writes; the due save is snapshotted on the loop and written in a thread."""
+    path = str(tmp_path / "sessions.json")
+    store = SessionStore(path=path, save_interval=0)
+    monkeypatch.setattr(intent_agent, "session_store", store)
+    store.update("direct", "Support", "support_agent", 0.9)
+    assert not os.path.exists(path) and store.save_due()
+
+    writers = []
+    write = store.write
+    monkeypatch.setattr(store, "write", lambda snapshot: (writers.append(threading.current_thread()),
+                                                          write(snapshot)))
+    asyncio.run(intent_agent.aclassify_in_session("I need a refund", "conv-2"))
+    assert writers and threading.main_thread() not in writers
+    restored = SessionStore(path=path)
+    assert restored.get("direct") is not None and restored.get("conv-2") is not None
+    assert not store.save_due()
+
+
+def test_an_older_snapshot_never_replaces_a_newer_one(tmp_path):
+    store = SessionStore(path=str(tmp_path / "sessions.json"))
+    store.update("a", "Support", "support_agent", 0.9)
+    older = store.snapshot()
+    store.update("b", "Billing", "billing_agent", 0.9)
+    store.write(store.snapshot())
+    store.write(older)  # finished late
+    assert SessionStore(path=store.path).get("b") is not None
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
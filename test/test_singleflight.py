@@ -0,0 +1,114 @@
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "mcp", "agents"))
+
+from llm_backends import LLMBackend, set_backend
+from singleflight import SingleFlight
+import intent_agent
+
+
+class CountingSlowBackend(LLMBackend):
+    name = "counting-slow"
+
+    def __init__(self):
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def generate(self, prompt, model="gemma:2b", system=None):
+        with self._lock:
+            self.calls += 1
+        time.sleep(0.2)
+        return json.dumps({"intent": "Support", "confidence": 0.9, "reasoning": "outage"})
+
+
+def test_concurrent_callers_share_one_call():
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"intent": "Support"}
+
+    async def scenario():
+        flight = SingleFlight()
+        results = await asyncio.gather(*(flight.do("app is down", work) for _ in range(10)))
+        results[0]["intent"] = "changed by one caller"
+        return results, flight.stats()
+
+    results, stats = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert stats == {"calls": 1, "collapsed": 9, "in_flight": 0}
+    assert all(result["intent"] == "Support" for result in results[1:])
+
+
+def test_call_survives_one_caller_leaving_and_stops_when_all_leave():
+    state = {"finished": 0, "cancelled": 0}
+
+    async def work():
+        try:
+            await asyncio.sleep(0.1)
+            state["finished"] += 1
+            return "done"
+        except asyncio.CancelledError:
+            state["cancelled"] += 1
+            raise
+
+    async def scenario():
+        flight = SingleFlight()
+        impatient = asyncio.ensure_future(flight.do("a", work))
+        patient = asyncio.ensure_future(flight.do("a", work))
+        await asyncio.sleep(0.01)
+        impatient.cancel()
+        assert await patient == "done"
+
+        alone = asyncio.ensure_future(flight.do("b", work))
+        await asyncio.sleep(0.01)
+        alone.cancel()
+        await asyncio.sleep(0.01)
+        return len(flight)
+
+    assert asyncio.run(scenario()) == 0
+    assert state == {"finished": 1, "cancelled": 1}
+
+
+def test_identical_messages_trigger_one_model_call(llm_only, monkeypatch):
+    backend = CountingSlowBackend()
+    set_backend(backend)
+    collapsed = intent_agent.inflight_classifications.collapsed
+    counted = (intent_agent.CLASSIFICATIONS.value(engine="llm"), intent_agent.CLASSIFICATIONS.value(engine="coalesced"))
+    remembered = []
+    remember = intent_agent._remember
+
+    async def counting_remember(key, result):
+        remembered.append(key)
+        await remember(key, result)
+
+    monkeypatch.setattr(intent_agent, "_remember", counting_remember)
+    messages = ["App is down", "app is DOWN!", "  app is down  "] * 10
+
+    async def burst():
+        return await asyncio.gather(*(intent_agent.aclassify_intent(m) for m in messages))
+
+    try:
+        results = asyncio.run(burst())
+        assert backend.calls == 1
+        assert all(result["intent"] == "Support" for result in results)
+        assert intent_agent.inflight_classifications.collapsed - collapsed == len(messages) - 1
+        assert intent_agent.metrics.snapshot()["intent_llm_calls_collapsed"] >= len(messages) - 1
+        # One model call: counted and cached once; the joined callers have their own label.
+        assert remembered == ["app is down"]
+        assert intent_agent.CLASSIFICATIONS.value(engine="llm") - counted[0] == 1
+        assert intent_agent.CLASSIFICATIONS.value(engine="coalesced") - counted[1] == len(messages) - 1
+    finally:
+        set_backend(None)
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
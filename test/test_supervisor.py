@@ -0,0 +1,108 @@
+import asyncio
+import os
+import socket
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import start_all_agents
+from start_all_agents import AgentSpec, Supervisor
+
+AGENT_SCRIPT = """
+import time
+from fastmcp import FastMCP
+
+time.sleep({delay})
+mcp = FastMCP("sleepy_agent")
+
+
+@mcp.tool()
+def echo(text: str) -> str:
+    return text
+
+
+mcp.run(transport="sse", host="127.0.0.1", port={port}, show_banner=False)
+"""
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def write_agent(directory: str, name: str, delay: float) -> AgentSpec:
+    port = free_port()
+    path = os.path.join(directory, f"{name}.py")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(AGENT_SCRIPT.format(delay=delay, port=port))
+    return AgentSpec(path, port, name)
+
+
+def test_parallel_start_restart_and_shutdown():
+    log_dir, backoff = start_all_agents.LOG_DIR, start_all_agents.RESTART_BACKOFF
+    with tempfile.TemporaryDirectory() as tmp:
+        start_all_agents.LOG_DIR = start_all_agents.Path(tmp)
+        start_all_agents.RESTART_BACKOFF = 0.1
+        specs = [write_agent(tmp, "slow_a", 1.0), write_agent(tmp, "slow_b", 1.0)]
+
+        async def scenario():
+            supervisor = Supervisor(specs)
+            started = time.perf_counter()
+            startup = await supervisor.start()
+            elapsed = time.perf_counter() - started
+            try:
+                assert all(seconds is not None for seconds in startup.values())
+                # Started side by side: about one agent's startup, not the sum of both.
+                assert elapsed < sum(startup.values()), (elapsed, startup)
+
+                crashed = supervisor.agents[0]
+                crashed.process.kill()
+                for _ in range(200):
+                    if crashed.restarts and crashed.ready.is_set():
+                        break
+                    await asyncio.sleep(0.05)
+                assert crashed.restarts == 1 and crashed.ready.is_set()
+            finally:
+                await supervisor.stop()
+            assert all(agent.process.returncode is not None for agent in supervisor.agents)
+
+        try:
+            asyncio.run(scenario())
+        finally:
+            start_all_agents.LOG_DIR, start_all_agents.RESTART_BACKOFF = log_dir, backoff
+
+
+def test_stop_during_startup_returns_at_once():
+    """A stop requested while agents are still starting cuts start() short, without restarts."""
+    log_dir = start_all_agents.LOG_DIR
+    with tempfile.TemporaryDirectory() as tmp:
+        start_all_agents.LOG_DIR = start_all_agents.Path(tmp)
+        specs = [write_agent(tmp, "very_slow", 20.0)]
+
+        async def scenario():
+            supervisor = Supervisor(specs)
+            asyncio.get_running_loop().call_later(0.5, supervisor.request_stop)
+            started = time.perf_counter()
+            startup = await supervisor.start()
+            assert time.perf_counter() - started < 5
+            assert startup == {"very_slow": None}
+            agent = supervisor.agents[0]
+            # Its own session: a Ctrl+C sent to the terminal's process group does not reach it.
+            if hasattr(os, "getsid"):
+                assert os.getsid(agent.process.pid) == agent.process.pid
+            await supervisor.stop()
+            assert agent.process.returncode is not None and agent.restarts == 0
+
+        try:
+            asyncio.run(scenario())
+        finally:
+            start_all_agents.LOG_DIR = log_dir
+
+
+if __name__ == "__main__":
+    test_parallel_start_restart_and_shutdown()
+    test_stop_during_startup_returns_at_once()
+    print("✅ Supervisor tests passed")
@@ -0,0 +1,132 @@
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "mcp", "agents"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fastmcp import Client
+from llm_backends import LLMBackend, set_backend
+from replay_traffic import compare, load_capture, replay, schedule
+from traffic_recorder import TrafficRecorder
+import intent_agent
+
+
+@pytest.fixture
+def record_calls(rules_only):
+    """Make tool calls against the in-process intent agent with the recorder on."""
+    def record(path, calls):
+        intent_agent.traffic_recorder = TrafficRecorder(path)
+
+        async def run():
+            async with Client(intent_agent.mcp) as client:
+                for tool, arguments in calls:
+                    await client.call_tool(tool, arguments)
+
+        try:
+            asyncio.run(run())
+        finally:
+            intent_agent.traffic_recorder.close()
+            intent_agent.traffic_recorder = None
+
+    return record
+
+
+def test_recorder_writes_compact_lines_with_stages(record_calls):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "capture.jsonl")
+        record_calls(path, [
+            ("classify_user_intent", {"user_message": "I need a refund", "session_id": "s1"}),
+            ("classify_user_intent", {"user_message": "My app keeps crashing", "priority": "high"}),
+        ])
+        with open(path, "r", encoding="utf-8") as f:
+            lines = [json.loads(line) for line in f]
+
+    assert len(lines) == 2
+    first, second = lines
+    assert (first["tool"], first["message"], first["session_id"]) == ("classify_user_intent", "I need a refund", "s1")
+    assert first["route"] == "billing_agent"
+    assert first["result"]["intent"] == "Billing"
+    assert "cheap_engines" in first["stages"]
+    assert first["ms"] > 0 and first["ts"] <= second["ts"]
+    assert "args" not in first  # defaults are left out
+    assert second["args"] == {"priority": "high"}
+
+
+class SlowForCrashesBackend(LLMBackend):
+    name = "slow-for-crashes"
+
+    def generate(self, prompt, model="gemma:2b", system=None):
+        time.sleep(0.5 if "crash" in prompt else 0.0)
+        return json.dumps({"intent": "Support", "confidence": 0.9, "reasoning": "test"})
+
+
+def test_overlapping_calls_replay_in_start_order(llm_only, tmp_path):
+    """A slow call that started first is written last, but stamped and replayed first."""
+    path = str(tmp_path / "capture.jsonl")
+    intent_agent.traffic_recorder = TrafficRecorder(path)
+    set_backend(SlowForCrashesBackend())
+
+    async def run():
+        async with Client(intent_agent.mcp) as client:
+            slow = asyncio.ensure_future(client.call_tool("classify_user_intent", {"user_message": "app crash"}))
+            await asyncio.sleep(0.1)
+            await client.call_tool("classify_user_intent", {"user_message": "a quick one"})
+            await slow
+
+    try:
+        asyncio.run(run())
+    finally:
+        intent_agent.traffic_recorder.close()
+        intent_agent.traffic_recorder = None
+        set_backend(None)
+
+    with open(path, "r", encoding="utf-8") as f:
+        assert [json.loads(line)["message"] for line in f] == ["a quick one", "app crash"]
+    records = load_capture(path)
+    assert [record["message"] for record in records] == ["app crash", "a quick one"]
+    first, second = schedule(records, 1.0)
+    assert first == 0.0 and 0.05 < second < 0.3
+
+
+def test_schedule_scales_recorded_gaps():
+    records = [{"ts": 100.0}, {"ts": 101.0}, {"ts": 103.0}]
+    assert schedule(records, 1.0) == [0.0, 1.0, 3.0]
+    assert schedule(records, 2.0) == [0.0, 0.5, 1.5]
+    assert schedule(records, 0.0) == [0.0, 0.0, 0.0]
+    assert schedule([{"message": "no timestamps"}], 1.0) == [0.0]
+
+
+def test_replay_diffs_routing_against_the_capture(record_calls):
+    """A capture replayed against the same build agrees; a changed route is reported."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "capture.jsonl")
+        record_calls(path, [
+            ("classify_user_intent", {"user_message": "I need a refund"}),
+            ("classify_user_intent", {"user_message": "My app keeps crashing"}),
+            ("classify_user_intent", {"user_message": "What are your business hours?"}),
+        ])
+        records = load_capture(path)
+
+    outcomes = asyncio.run(replay(records, intent_agent.mcp, speed=0, concurrency=2))
+    report = compare(records, outcomes)
+    assert report["route_mismatches"] == 0
+    assert report["tools"]["classify_user_intent"]["route_agreement"] == 1.0
+    assert report["tools"]["classify_user_intent"]["recorded"]["p50_ms"] > 0
+
+    records[0]["route"] = "general_agent"  # as if the old build had routed it elsewhere
+    report = compare(records, outcomes)
+    assert report["route_mismatches"] == 1
+    assert report["mismatch_examples"][0] == {
+        "message": "I need a refund", "session_id": None,
+        "recorded": "general_agent", "replayed": "billing_agent"
+    }
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
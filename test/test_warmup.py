@@ -0,0 +1,163 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "mcp", "agents"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fastmcp import Client
+from llm_backends import LLMBackend, OllamaHTTPBackend, set_backend
+from stub_llm_server import start_stub_server
+import intent_agent
+
+
+def stage_count(stage):
+    return intent_agent.STAGE_SECONDS.snapshot().get(f'{{stage="{stage}"}}', {}).get("count", 0)
+
+
+def test_instructions_go_in_the_system_prompt():
+    """Only the message is in the prompt; the shared prefix is evaluated once."""
+    server, url = start_stub_server()
+    set_backend(OllamaHTTPBackend(base_url=url))
+    tokens = intent_agent.PROMPT_TOKENS.value()
+    prompt_evals = stage_count("llm_prompt_eval")
+
+    def classify(message):
+        prompt = intent_agent.build_prompt(message)
+        return intent_agent.parse_classification(
+            asyncio.run(intent_agent.aquery_local_llm(prompt, system=intent_agent.SYSTEM_PROMPT)))
+
+    try:
+        first = classify("Why was I charged twice?")
+        assert first["intent"] == "Billing"
+        assert server.last_request["system"] == intent_agent.SYSTEM_PROMPT
+        assert server.last_request["prompt"] == 'Message: "Why was I charged twice?"'
+        first_tokens = intent_agent.PROMPT_TOKENS.value() - tokens
+
+        second = classify("My app keeps crashing")
+        assert second["intent"] == "Support"
+        second_tokens = intent_agent.PROMPT_TOKENS.value() - tokens - first_tokens
+        assert 0 < second_tokens < first_tokens  # the system prompt was not evaluated again
+        assert stage_count("llm_prompt_eval") == prompt_evals + 2
+    finally:
+        set_backend(None)
+        server.shutdown()
+
+
+def test_streaming_records_time_to_first_token(llm_only):
+    """The streamed path sends the system prompt too and times the first chunk."""
+    server, url = start_stub_server()
+    set_backend(OllamaHTTPBackend(base_url=url))
+    first_tokens = stage_count("llm_first_token")
+    try:
+        result = asyncio.run(intent_agent.aclassify_intent("What are your business hours?"))
+        assert result["intent"] == "General Inquiry"
+        assert server.last_request["system"] == intent_agent.SYSTEM_PROMPT
+        assert server.last_request["stream"] is True
+        assert stage_count("llm_first_token") == first_tokens + 1
+    finally:
+        set_backend(None)
+        server.shutdown()
+
+
+def test_warm_up_loads_model_and_connects_agents():
+    """warm_up primes the model and opens a session to every downstream agent."""
+    server, url = start_stub_server()
+    set_backend(OllamaHTTPBackend(base_url=url))
+    endpoints = dict(intent_agent.AGENT_ENDPOINTS)
+    intent_agent.AGENT_ENDPOINTS.update(intent_agent.inprocess_endpoints())
+
+    async def run():
+        try:
+            return await intent_agent.warm_up()
+        finally:
+            await intent_agent.agent_pools.close()
+
+    try:
+        report = asyncio.run(run())
+        assert report["errors"] == {}
+        assert server.request_count == 1
+        assert server.last_request["options"] == {"num_predict": 1}
+        assert server.last_request["system"] == intent_agent.SYSTEM_PROMPT
+        assert set(report["agent_sessions"]) == set(endpoints)
+        assert all(report["agent_sessions"].values())
+        assert intent_agent.metrics.snapshot()["intent_warmup_seconds"] == report["seconds"]
+    finally:
+        intent_agent.AGENT_ENDPOINTS.clear()
+        intent_agent.AGENT_ENDPOINTS.update(endpoints)
+        intent_agent.warmup_report = None
+        set_backend(None)
+        server.shutdown()
+
+
+def test_warm_up_survives_unreachable_model():
+    """A model that cannot be loaded is reported, not raised."""
+    set_backend(OllamaHTTPBackend(base_url="http://127.0.0.1:9"))
+    endpoints = dict(intent_agent.AGENT_ENDPOINTS)
+    intent_agent.AGENT_ENDPOINTS.clear()
+    try:
+        report = asyncio.run(intent_agent.warm_up())
+        assert "model" in report["errors"]
+        assert report["agent_sessions"] == {}
+    finally:
+        intent_agent.AGENT_ENDPOINTS.update(endpoints)
+        intent_agent.warmup_report = None
+        set_backend(None)
+
+
+class SlowLoadBackend(LLMBackend):
+    """Each model takes `seconds` to load."""
+
+    name = "slow-load"
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.loaded = []
+
+    async def warm_up(self, prompt, model="gemma:2b", system=None):
+        await asyncio.sleep(self.seconds)
+        self.loaded.append(model)
+
+
+def test_warm_up_fits_in_the_supervisor_startup_timeout(llm_only, monkeypatch):
+    """Model tiers load together within one budget, which defaults below the supervisor's."""
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+    import start_all_agents
+    assert intent_agent.WARMUP_TIMEOUT < start_all_agents.STARTUP_TIMEOUT
+
+    backend = SlowLoadBackend(0.3)
+    set_backend(backend)
+    monkeypatch.setattr(intent_agent, "MODEL_TIERS", ["small", "large"])
+    monkeypatch.setattr(intent_agent, "WARMUP_TIMEOUT", 0.5)  # loading one after the other takes 0.6s
+    endpoints = dict(intent_agent.AGENT_ENDPOINTS)
+    intent_agent.AGENT_ENDPOINTS.clear()
+    try:
+        report = asyncio.run(intent_agent.warm_up())
+        assert report["errors"] == {}
+        assert sorted(backend.loaded) == ["large", "small"]
+    finally:
+        intent_agent.AGENT_ENDPOINTS.update(endpoints)
+        intent_agent.warmup_report = None
+        set_backend(None)
+
+
+def test_first_request_time_is_recorded(rules_only):
+    """The first tool call sets the time-to-first-request gauge; later calls leave it alone."""
+    intent_agent.first_request_seconds = None
+
+    async def call():
+        async with Client(intent_agent.mcp) as client:
+            await client.call_tool("classify_user_intent", {"user_message": "I need a refund"})
+
+    assert intent_agent.metrics.snapshot()["intent_time_to_first_request_seconds"] == 0.0
+    asyncio.run(call())
+    first = intent_agent.metrics.snapshot()["intent_time_to_first_request_seconds"]
+    assert first > 0
+    asyncio.run(call())
+    assert intent_agent.metrics.snapshot()["intent_time_to_first_request_seconds"] == first
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))